@@ -47,6 +47,7 @@ classes = [
     operators.ForceEvaluate,
     operators.SendToUnreal,
     operators.ExportToDisk,
+    operators.CompareDna,
     operators.GenerateMaterial,
     operators.SculptThisShapeKey,
     operators.EditThisShapeKey,
@@ -90,7 +91,8 @@ app_handlers = {
     'undo_post': bpy.app.handlers.persistent(utilities.post_undo),
     'render_init': bpy.app.handlers.persistent(utilities.pre_render),
     'render_complete': bpy.app.handlers.persistent(utilities.post_render),
-    'render_cancel': bpy.app.handlers.persistent(utilities.post_render)
+    'render_cancel': bpy.app.handlers.persistent(utilities.post_render),
+    'depsgraph_update_post': bpy.app.handlers.persistent(utilities.vertex_group_index_listener)
 }
 
 def register():
@@ -127,6 +129,7 @@ def register():
     bpy.app.handlers.render_init.append(app_handlers['render_init'])
     bpy.app.handlers.render_complete.append(app_handlers['render_complete'])
     bpy.app.handlers.render_cancel.append(app_handlers['render_cancel'])
+    bpy.app.handlers.depsgraph_update_post.append(app_handlers['depsgraph_update_post'])
 
 
 def unregister():
@@ -150,6 +153,8 @@ def unregister():
         bpy.app.handlers.render_complete.remove(app_handlers['render_complete'])
     if app_handlers['render_cancel'] in bpy.app.handlers.render_cancel:
         bpy.app.handlers.render_cancel.remove(app_handlers['render_cancel'])
+    if app_handlers['depsgraph_update_post'] in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(app_handlers['depsgraph_update_post'])
 
     try:
         # remove menu items
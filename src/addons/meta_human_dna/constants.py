@@ -1,4 +1,5 @@
 import os
+import sys
 import math
 from pathlib import Path
 from mathutils import Vector, Euler
@@ -37,7 +38,26 @@ TEXTURE_LOGIC_NODE_LABEL = "Texture Logic"
 UV_MAP_NAME = "DiffuseUV"
 VERTEX_COLOR_ATTRIBUTE_NAME = "Color"
 MESH_VERTEX_COLORS_FILE_NAME = "vertex_colors.json"
+IMPORT_REPORT_FILE_NAME = "import_report.json"
 FLOATING_POINT_PRECISION = 0.0001
+SKIN_WEIGHT_EPSILON = 0.00001
+BLEND_SHAPE_DELTA_EPSILON = 0.0001
+JOINT_GROUP_VALUE_EPSILON = 0.0001
+# auto fit falls back to fitting all the bones when more than this fraction of the vertices moved
+AUTO_FIT_MAX_CHANGED_VERTEX_RATIO = 0.5
+DNA_DIFF_MAX_REPORTED_INDICES = 100
+DNA_DIFF_TOLERANCES = {
+    'neutralJointTranslations': 1e-3,
+    'neutralJointRotations': 1e-3,
+    'positions': 1e-3,
+    'normals': 1e-3,
+    'textureCoordinates': 1e-3,
+    'skinWeights': SKIN_WEIGHT_EPSILON,
+    'blendShapeTargetDeltas': BLEND_SHAPE_DELTA_EPSILON,
+    'jointGroupValues': JOINT_GROUP_VALUE_EPSILON,
+    'animatedMapValues': 1e-4
+}
+SHAPE_KEY_CHUNK_SIZE = 64
 
 MESH_SHADER_MAPPING = {
     "head_lod": "head_shader",
@@ -92,6 +112,24 @@ SEND2UE_FACE_SETTINGS = RESOURCES_FOLDER / 'send2ue' / "meta-human_dna.json"
 
 SEND2UE_EXTENSION = RESOURCES_FOLDER / 'send2ue' / "meta_human_dna_extension.py"
 
+if sys.platform == 'win32':
+    USER_CACHE_FOLDER = Path(os.environ.get('LOCALAPPDATA', Path.home() / 'AppData' / 'Local'), ToolInfo.NAME)
+elif sys.platform == 'darwin':
+    USER_CACHE_FOLDER = Path.home() / 'Library' / 'Caches' / ToolInfo.NAME
+else:
+    USER_CACHE_FOLDER = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache'), ToolInfo.NAME)
+
+GEOMETRY_CACHE_FOLDER = USER_CACHE_FOLDER / "geometry"
+GEOMETRY_CACHE_VERSION = 2
+GEOMETRY_CACHE_MAX_SIZE = 2048 # in megabytes
+VERTEX_BONE_CACHE_FOLDER = USER_CACHE_FOLDER / "vertex_bones"
+VERTEX_BONE_CACHE_VERSION = 1
+TOPOLOGY_GROUP_CACHE_FOLDER = USER_CACHE_FOLDER / "topology_groups"
+TOPOLOGY_GROUP_CACHE_VERSION = 1
+
+FILE_COPY_MAX_WORKERS = min(8, os.cpu_count() or 1)
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+
 ALTERNATE_TEXTURE_FILE_EXTENSIONS = [
     ".tga",
     ".png"   
@@ -1,17 +1,35 @@
 from .misc import (
     get_dna_reader,
     get_dna_writer,
-    create_shape_key
+    create_shape_key,
+    DNAFileWrite
+)
+from .cache import (
+    GeometryCache,
+    get_geometry_cache,
+    get_vertex_to_bone_name_mapping,
+    get_topology_vertex_groups
 )
 from .calibrator import DNACalibrator
 from .exporter import DNAExporter
 from .importer import DNAImporter
+from .optimizer import DNAOptimizer
+from .diff import DNADiff, DNADiffReport, compare_dna
 
 __all__ = [
     'get_dna_reader',
     'get_dna_writer',
     'create_shape_key',
+    'DNAFileWrite',
+    'GeometryCache',
+    'get_geometry_cache',
+    'get_vertex_to_bone_name_mapping',
+    'get_topology_vertex_groups',
     'DNACalibrator',
     'DNAExporter',
-    'DNAImporter'
+    'DNAImporter',
+    'DNAOptimizer',
+    'DNADiff',
+    'DNADiffReport',
+    'compare_dna'
 ]
\ No newline at end of file
@@ -0,0 +1,584 @@
+import os
+import re
+import sys
+import json
+import hashlib
+import logging
+import argparse
+import shutil
+import itertools
+import numpy as np
+from pathlib import Path
+from typing import Callable, TYPE_CHECKING
+from collections.abc import Mapping
+from ..constants import (
+    ToolInfo,
+    GEOMETRY_CACHE_FOLDER,
+    GEOMETRY_CACHE_VERSION,
+    GEOMETRY_CACHE_MAX_SIZE,
+    VERTEX_BONE_CACHE_FOLDER,
+    VERTEX_BONE_CACHE_VERSION,
+    TOPOLOGY_GROUP_CACHE_FOLDER,
+    TOPOLOGY_GROUP_CACHE_VERSION,
+    TOPOLOGY_VERTEX_GROUPS_FILE_PATH
+)
+
+if TYPE_CHECKING:
+    from ..bindings import riglogic
+
+logger = logging.getLogger(__name__)
+
+# content hashes are memoized by file path, size and modification time, so a file is only hashed once
+_content_hashes = {}
+
+# the vertex to bone name mapping by DNA content hash
+_vertex_to_bone_names = {}
+
+# the vertex indices of each topology group by the topology groups content hash
+_topology_vertex_groups = {}
+
+# the geometry cache entries are named by the hex digest of the DNA content hash
+GEOMETRY_CACHE_ENTRY_NAME_PATTERN = re.compile(r'[0-9a-f]{40}')
+
+
+def get_dna_content_hash(file_path: Path) -> str:
+    file_path = Path(file_path)
+    stat = file_path.stat()
+    key = (str(file_path.absolute()), stat.st_size, stat.st_mtime_ns)
+    content_hash = _content_hashes.get(key)
+    if content_hash is None:
+        hasher = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                hasher.update(chunk)
+        content_hash = hasher.hexdigest()
+        _content_hashes[key] = content_hash
+    return content_hash
+
+
+def get_csr_arrays(rows: list, dtype) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Packs a list of variable length rows into an offsets array and a flat values array.
+    """
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.fromiter(itertools.chain.from_iterable(rows), dtype=dtype, count=int(offsets[-1]))
+    return offsets, values
+
+
+# the arrays of each field group of the mesh geometry. A group is decoded and cached as a unit
+MESH_GEOMETRY_FIELD_GROUPS = {
+    'positions': ('positions',),
+    'normals': ('normals',),
+    'uvs': ('uvs',),
+    'layouts': ('layout_positions', 'layout_normals', 'layout_uvs'),
+    'faces': ('face_offsets', 'face_layout_indices'),
+    'skin': ('skin_offsets', 'skin_joint_indices', 'skin_weights'),
+    'targets': ('target_channel_indices', 'target_offsets', 'target_vertex_indices', 'target_deltas')
+}
+MESH_GEOMETRY_FIELDS = {
+    name: group for group, names in MESH_GEOMETRY_FIELD_GROUPS.items() for name in names
+}
+
+
+def decode_mesh_geometry_group(
+        reader: 'riglogic.BinaryStreamReader', 
+        mesh_index: int, 
+        group: str
+    ) -> dict[str, np.ndarray]:
+    """
+    Decodes one field group of the geometry of a mesh from the DNA reader into arrays. Values are 
+    left in DNA units and coordinate space. Variable length data (faces, skin weights and blend 
+    shape targets) is stored as offsets and flat value arrays.
+    """
+    if group == 'positions':
+        return {'positions': np.column_stack((
+            reader.getVertexPositionXs(mesh_index),
+            reader.getVertexPositionYs(mesh_index),
+            reader.getVertexPositionZs(mesh_index)
+        )).astype(np.float32).reshape(-1, 3)}
+
+    if group == 'normals':
+        return {'normals': np.column_stack((
+            reader.getVertexNormalXs(mesh_index),
+            reader.getVertexNormalYs(mesh_index),
+            reader.getVertexNormalZs(mesh_index)
+        )).astype(np.float32).reshape(-1, 3)}
+
+    if group == 'uvs':
+        return {'uvs': np.column_stack((
+            reader.getVertexTextureCoordinateUs(mesh_index),
+            reader.getVertexTextureCoordinateVs(mesh_index)
+        )).astype(np.float32).reshape(-1, 2)}
+
+    if group == 'layouts':
+        return {
+            'layout_positions': np.asarray(reader.getVertexLayoutPositionIndices(mesh_index), dtype=np.int32),
+            'layout_normals': np.asarray(reader.getVertexLayoutNormalIndices(mesh_index), dtype=np.int32),
+            'layout_uvs': np.asarray(reader.getVertexLayoutTextureCoordinateIndices(mesh_index), dtype=np.int32)
+        }
+
+    if group == 'faces':
+        face_offsets, face_layout_indices = get_csr_arrays(
+            [reader.getFaceVertexLayoutIndices(mesh_index, index) for index in range(reader.getFaceCount(mesh_index))],
+            dtype=np.int32
+        )
+        return {'face_offsets': face_offsets, 'face_layout_indices': face_layout_indices}
+
+    if group == 'skin':
+        skin_joint_rows = []
+        skin_weight_rows = []
+        for vertex_index in range(reader.getVertexPositionCount(mesh_index)):
+            skin_joint_rows.append(reader.getSkinWeightsJointIndices(mesh_index, vertex_index))
+            skin_weight_rows.append(reader.getSkinWeightsValues(mesh_index, vertex_index))
+        skin_offsets, skin_joint_indices = get_csr_arrays(skin_joint_rows, dtype=np.int32)
+        _, skin_weights = get_csr_arrays(skin_weight_rows, dtype=np.float32)
+        return {
+            'skin_offsets': skin_offsets,
+            'skin_joint_indices': skin_joint_indices,
+            'skin_weights': skin_weights
+        }
+
+    if group == 'targets':
+        target_count = reader.getBlendShapeTargetCount(mesh_index)
+        target_vertex_rows = []
+        target_delta_rows = []
+        for target_index in range(target_count):
+            target_vertex_rows.append(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index))
+            target_delta_rows.append(np.column_stack((
+                reader.getBlendShapeTargetDeltaXs(mesh_index, target_index),
+                reader.getBlendShapeTargetDeltaYs(mesh_index, target_index),
+                reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+            )).astype(np.float32).reshape(-1, 3))
+        target_offsets, target_vertex_indices = get_csr_arrays(target_vertex_rows, dtype=np.int32)
+        return {
+            'target_channel_indices': np.array(
+                [reader.getBlendShapeChannelIndex(mesh_index, index) for index in range(target_count)],
+                dtype=np.int32
+            ),
+            'target_offsets': target_offsets,
+            'target_vertex_indices': target_vertex_indices,
+            'target_deltas': np.concatenate(target_delta_rows) if target_delta_rows else np.zeros((0, 3), dtype=np.float32)
+        }
+
+    raise ValueError(f'"{group}" is not a mesh geometry field group')
+
+
+def decode_mesh_geometry(reader: 'riglogic.BinaryStreamReader', mesh_index: int) -> dict[str, np.ndarray]:
+    """
+    Decodes all the geometry of a mesh from the DNA reader into arrays.
+    """
+    geometry = {}
+    for group in MESH_GEOMETRY_FIELD_GROUPS:
+        geometry.update(decode_mesh_geometry_group(reader, mesh_index, group))
+    return geometry
+
+
+class MeshGeometry(Mapping):
+    """
+    The geometry arrays of a mesh. A field group is only decoded the first time one of its arrays 
+    is accessed, so placing vertices doesn't decode the skin weights or blend shape targets.
+    """
+    def __init__(self, get_group: Callable[[str], dict[str, np.ndarray]]):
+        self._get_group = get_group
+        self._arrays = {}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        array = self._arrays.get(name)
+        if array is None:
+            group = MESH_GEOMETRY_FIELDS.get(name)
+            if group is None:
+                raise KeyError(name)
+            self._arrays.update(self._get_group(group))
+            array = self._arrays[name]
+        return array
+
+    def __iter__(self):
+        return iter(MESH_GEOMETRY_FIELDS)
+
+    def __len__(self) -> int:
+        return len(MESH_GEOMETRY_FIELDS)
+
+
+def get_mesh_geometry(reader: 'riglogic.BinaryStreamReader', mesh_index: int) -> MeshGeometry:
+    """
+    Gets the geometry of a mesh that is decoded from the reader as it is accessed.
+    """
+    return MeshGeometry(lambda group: decode_mesh_geometry_group(reader, mesh_index, group))
+
+
+class GeometryCache:
+    """
+    An on-disk cache of the decoded mesh geometry of a DNA file. It is keyed by the content hash
+    of the DNA file, so it is invalidated when the file changes. Each field group of a mesh is 
+    decoded the first time it is accessed and saved as memory mapped .npy files, so only the 
+    geometry that was used is decoded and stored.
+    """
+    def __init__(
+            self,
+            dna_file_path: Path,
+            reader: 'riglogic.BinaryStreamReader | None' = None,
+            cache_folder: Path | None = None,
+            max_size: int | None = None
+        ):
+        self.dna_file_path = Path(dna_file_path)
+        self.reader = reader
+        self.cache_folder = Path(cache_folder or GEOMETRY_CACHE_FOLDER)
+        # the max size of the cache folder in megabytes
+        self.max_size = max_size if max_size is not None else GEOMETRY_CACHE_MAX_SIZE
+        self.key = get_dna_content_hash(self.dna_file_path)
+        self._index = None
+        self._meshes = {}
+
+    @property
+    def folder(self) -> Path:
+        return self.cache_folder / self.key
+
+    @property
+    def index_file_path(self) -> Path:
+        return self.folder / 'index.json'
+
+    @property
+    def index(self) -> dict:
+        if self._index is None:
+            with open(self.index_file_path, 'r') as file:
+                self._index = json.load(file)
+            # touch the index so the eviction treats this as recently used
+            os.utime(self.index_file_path)
+        return self._index
+
+    @property
+    def is_valid(self) -> bool:
+        if not self.index_file_path.exists():
+            return False
+        try:
+            return self.index.get('version') == GEOMETRY_CACHE_VERSION
+        except (OSError, ValueError):
+            return False
+
+    def initialize(self):
+        """
+        Creates an empty cache entry for the DNA file. The geometry is added to it as it is decoded.
+        """
+        if self.folder.exists():
+            shutil.rmtree(self.folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        index = {
+            'version': GEOMETRY_CACHE_VERSION,
+            'dna_file_path': str(self.dna_file_path)
+        }
+        temp_index_file_path = self.index_file_path.with_suffix('.json.tmp')
+        with open(temp_index_file_path, 'w') as file:
+            json.dump(index, file)
+        os.replace(temp_index_file_path, self.index_file_path)
+        self._index = index
+        self.evict()
+
+    def build(self, reader: 'riglogic.BinaryStreamReader'):
+        """
+        Decodes and saves all the geometry of every mesh, which is used to pre-warm the cache.
+        """
+        self.reader = reader
+        if not self.is_valid:
+            self.initialize()
+        logger.info(f'Building geometry cache for "{self.dna_file_path}"...')
+        for mesh_index in range(reader.getMeshCount()):
+            for group in MESH_GEOMETRY_FIELD_GROUPS:
+                self.get_group(mesh_index, group)
+
+    def close(self):
+        self._meshes.clear()
+
+    def get_array_file_path(self, mesh_index: int, name: str) -> Path:
+        return self.folder / f'{mesh_index}_{name}.npy'
+
+    def get_group(self, mesh_index: int, group: str) -> dict[str, np.ndarray]:
+        """
+        Gets the arrays of a field group of the mesh. They are memory mapped from the cache if they 
+        were saved before, otherwise they are decoded from the reader and saved.
+        """
+        names = MESH_GEOMETRY_FIELD_GROUPS[group]
+        file_paths = {name: self.get_array_file_path(mesh_index, name) for name in names}
+        if all(file_path.exists() for file_path in file_paths.values()):
+            try:
+                return {name: np.load(file_path, mmap_mode='r') for name, file_path in file_paths.items()}
+            except (OSError, ValueError) as error:
+                logger.warning(f'Failed to read the geometry cache "{self.folder}": {error}')
+
+        if not self.reader:
+            raise KeyError(f'Mesh {mesh_index} "{group}" is not in the geometry cache and there is no reader to decode it')
+        arrays = decode_mesh_geometry_group(self.reader, mesh_index, group)
+        try:
+            for name, array in arrays.items():
+                temp_file_path = file_paths[name].with_suffix('.npy.tmp')
+                with open(temp_file_path, 'wb') as file:
+                    np.save(file, np.ascontiguousarray(array))
+                os.replace(temp_file_path, file_paths[name])
+        except OSError as error:
+            logger.warning(f'Failed to save the geometry cache "{self.folder}": {error}')
+        else:
+            # the entries grow as their geometry is decoded, so the size is checked after each write
+            self.evict()
+        return arrays
+
+    def get_mesh(self, mesh_index: int) -> MeshGeometry:
+        """
+        Gets the geometry of the mesh, which is read from the cache or decoded as it is accessed.
+        """
+        mesh = self._meshes.get(mesh_index)
+        if mesh is None:
+            mesh = MeshGeometry(lambda group: self.get_group(mesh_index, group))
+            self._meshes[mesh_index] = mesh
+        return mesh
+
+    def get_entry_folders(self) -> list[Path]:
+        """
+        Gets the cache entry folders in the cache folder. Only folders that are named by a content 
+        hash and have an index with a cache version are entries, so other files that happen to be 
+        in the cache folder are left alone.
+        """
+        folders = []
+        for index_file_path in self.cache_folder.glob('*/index.json'):
+            folder = index_file_path.parent
+            if not GEOMETRY_CACHE_ENTRY_NAME_PATTERN.fullmatch(folder.name):
+                continue
+            try:
+                with open(index_file_path, 'r') as file:
+                    index = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if isinstance(index, dict) and 'version' in index and 'dna_file_path' in index:
+                folders.append(folder)
+        return folders
+
+    def evict(self, max_size: int | None = None):
+        """
+        Removes the least recently used cache entries until the cache folder is under the max size.
+        """
+        max_bytes = (max_size if max_size is not None else self.max_size) * 1024 * 1024
+        entries = []
+        total_size = 0
+        for folder in self.get_entry_folders():
+            size = sum(file_path.stat().st_size for file_path in folder.iterdir() if file_path.is_file())
+            total_size += size
+            if folder.name != self.key:
+                entries.append(((folder / 'index.json').stat().st_mtime, size, folder))
+
+        for _, size, folder in sorted(entries):
+            if total_size <= max_bytes:
+                break
+            logger.info(f'Evicting geometry cache "{folder}"')
+            shutil.rmtree(folder, ignore_errors=True)
+            total_size -= size
+
+
+def get_geometry_cache(
+        dna_file_path: Path,
+        reader: 'riglogic.BinaryStreamReader | None' = None,
+    ) -> GeometryCache | None:
+    """
+    Gets the geometry cache for the DNA file if the cache is enabled in the addon preferences. If
+    a reader is given, the geometry that is missing from the cache is decoded from it and saved.
+    """
+    cache_folder = None
+    max_size = None
+    try:
+        import bpy
+        preferences = bpy.context.preferences.addons[ToolInfo.NAME].preferences # type: ignore
+        if not preferences.use_geometry_cache:
+            return None
+        cache_folder = bpy.path.abspath(preferences.geometry_cache_folder) or None
+        max_size = preferences.geometry_cache_max_size
+    except (ImportError, KeyError, AttributeError):
+        pass
+
+    dna_file_path = Path(dna_file_path)
+    if not dna_file_path.exists() or dna_file_path.suffix.lower() != '.dna':
+        return None
+
+    cache = GeometryCache(dna_file_path, reader=reader, cache_folder=cache_folder, max_size=max_size)
+    if not cache.is_valid:
+        if not reader:
+            return None
+        try:
+            cache.initialize()
+        except OSError as error:
+            logger.warning(f'Failed to create the geometry cache for "{dna_file_path}": {error}')
+            return None
+    return cache
+
+
+def get_vertex_to_bone_name_mapping(
+        dna_file_path: Path,
+        reader: 'riglogic.BinaryStreamReader | None' = None,
+        cache_folder: Path | None = None
+    ) -> dict[int, str]:
+    """
+    Gets the name of the bone that each head mesh vertex is mapped to. The mapping only depends 
+    on the DNA file, so it is memoized by the DNA content hash and saved to the cache folder. It 
+    is only calculated again when the DNA file changes.
+
+    Args:
+        dna_file_path (Path): The DNA file.
+        reader (riglogic.BinaryStreamReader | None, optional): A reader of the DNA file. Defaults to None.
+        cache_folder (Path | None, optional): The cache folder. Defaults to VERTEX_BONE_CACHE_FOLDER.
+
+    Returns:
+        dict[int, str]: The bone name of each vertex index that is mapped to a bone.
+    """
+    key = get_dna_content_hash(dna_file_path)
+    vertex_to_bone_name = _vertex_to_bone_names.get(key)
+    if vertex_to_bone_name is not None:
+        return vertex_to_bone_name
+
+    file_path = Path(cache_folder or VERTEX_BONE_CACHE_FOLDER) / f'{key}.json'
+    try:
+        with open(file_path, 'r') as file:
+            data = json.load(file)
+        if data.get('version') == VERTEX_BONE_CACHE_VERSION:
+            vertex_to_bone_name = dict(zip(data['vertex_indices'], data['bone_names']))
+            _vertex_to_bone_names[key] = vertex_to_bone_name
+            return vertex_to_bone_name
+    except (OSError, ValueError, KeyError):
+        pass
+
+    from ..bindings import meta_human_dna_core
+    from .misc import get_dna_reader
+    reader = reader or get_dna_reader(file_path=Path(dna_file_path))
+    vertex_to_bone_name = {
+        int(vertex_index): bone_name for vertex_index, bone_name in 
+        meta_human_dna_core.calculate_vertex_to_bone_name_mapping(dna_reader=reader).items()
+    }
+    _vertex_to_bone_names[key] = vertex_to_bone_name
+
+    try:
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file_path = file_path.with_suffix('.json.tmp')
+        with open(temp_file_path, 'w') as file:
+            json.dump({
+                'version': VERTEX_BONE_CACHE_VERSION,
+                'vertex_indices': list(vertex_to_bone_name.keys()),
+                'bone_names': list(vertex_to_bone_name.values())
+            }, file)
+        os.replace(temp_file_path, file_path)
+    except OSError as error:
+        logger.warning(f'Failed to save the vertex to bone mapping for "{dna_file_path}": {error}')
+    return vertex_to_bone_name
+
+
+def save_topology_vertex_groups_binary(topology_groups: dict[str, list[int]], file_path: Path):
+    """
+    Saves the topology groups as a binary file with a table of the group names, the offsets of each 
+    group and one flat array of the vertex indices.
+    """
+    file_path = Path(file_path)
+    offsets, vertex_indices = get_csr_arrays(list(topology_groups.values()), dtype=np.int32)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_path = file_path.with_suffix('.npz.tmp')
+    with open(temp_file_path, 'wb') as file:
+        np.savez(
+            file,
+            version=np.array(TOPOLOGY_GROUP_CACHE_VERSION),
+            names=np.array(list(topology_groups.keys()), dtype=str),
+            offsets=offsets,
+            vertex_indices=vertex_indices
+        )
+    os.replace(temp_file_path, file_path)
+
+
+def load_topology_vertex_groups_binary(file_path: Path) -> dict[str, np.ndarray] | None:
+    """
+    Loads the topology groups from a binary file, or returns None if it is missing or out of date.
+    """
+    try:
+        with np.load(file_path, allow_pickle=False) as data:
+            if int(data['version']) != TOPOLOGY_GROUP_CACHE_VERSION:
+                return None
+            names = data['names'].tolist()
+            offsets = data['offsets']
+            vertex_indices = data['vertex_indices']
+    except (OSError, ValueError, KeyError):
+        return None
+    return {
+        name: vertex_indices[offsets[index]:offsets[index + 1]]
+        for index, name in enumerate(names)
+    }
+
+
+def get_topology_vertex_groups(
+        topology_groups_file_path: Path = TOPOLOGY_VERTEX_GROUPS_FILE_PATH,
+        cache_folder: Path | None = None
+    ) -> dict[str, np.ndarray]:
+    """
+    Gets the vertex indices of each topology group. The JSON file is only parsed once, after that 
+    the groups are read from a binary copy in the cache folder that is keyed by the JSON content hash.
+
+    Args:
+        topology_groups_file_path (Path, optional): The topology groups file. Defaults to TOPOLOGY_VERTEX_GROUPS_FILE_PATH.
+        cache_folder (Path | None, optional): The cache folder. Defaults to TOPOLOGY_GROUP_CACHE_FOLDER.
+
+    Returns:
+        dict[str, np.ndarray]: The vertex indices of each topology group.
+    """
+    key = get_dna_content_hash(topology_groups_file_path)
+    topology_groups = _topology_vertex_groups.get(key)
+    if topology_groups is not None:
+        return topology_groups
+
+    file_path = Path(cache_folder or TOPOLOGY_GROUP_CACHE_FOLDER) / f'{key}.npz'
+    topology_groups = load_topology_vertex_groups_binary(file_path)
+    if topology_groups is None:
+        with open(topology_groups_file_path, 'r') as file:
+            data = json.load(file)
+        try:
+            save_topology_vertex_groups_binary(data, file_path)
+        except OSError as error:
+            logger.warning(f'Failed to save the topology groups cache for "{topology_groups_file_path}": {error}')
+        topology_groups = {
+            name: np.asarray(vertex_indices, dtype=np.int32) 
+            for name, vertex_indices in data.items()
+        }
+
+    _topology_vertex_groups[key] = topology_groups
+    return topology_groups
+
+
+def main(argv: list[str] | None = None):
+    """
+    Pre-warms the geometry cache for all the DNA files in the given files or folders. This needs
+    the addon to be installed, since it is run with Blender's python.
+
+    Example:
+        blender -b --python-expr "from meta_human_dna.dna_io.cache import main; main()" -- path/to/dna/library --max-size 4096
+    """
+    from .misc import get_dna_reader
+
+    argv = sys.argv[1:] if argv is None else argv
+    # when run through blender, only use the arguments after "--"
+    if '--' in argv:
+        argv = argv[argv.index('--') + 1:]
+
+    parser = argparse.ArgumentParser(description='Pre-warms the DNA geometry cache.')
+    parser.add_argument('paths', nargs='+', help='DNA files or folders to search recursively for DNA files')
+    parser.add_argument('--cache-folder', default=None, help='The cache folder. Defaults to the user cache folder')
+    parser.add_argument('--max-size', type=int, default=None, help='The max size of the cache in megabytes')
+    arguments = parser.parse_args(argv)
+
+    file_paths = []
+    for path in map(Path, arguments.paths):
+        if path.is_dir():
+            file_paths.extend(sorted(path.rglob('*.dna')))
+        elif path.suffix.lower() == '.dna':
+            file_paths.append(path)
+
+    for file_path in file_paths:
+        cache = GeometryCache(file_path, cache_folder=arguments.cache_folder, max_size=arguments.max_size)
+        # a valid entry can be missing the geometry that was never accessed, and the groups that 
+        # are already cached are skipped by the build
+        cache.build(get_dna_reader(file_path=file_path))
+        logger.info(f'Cached "{file_path}" -> "{cache.folder}"')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
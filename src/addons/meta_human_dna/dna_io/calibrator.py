@@ -1,48 +1,178 @@
+import math
 import logging
-from mathutils import Vector
+import numpy as np
+from mathutils import Vector, Matrix
 from typing import Callable
 from .importer import DNAImporter
 from .exporter import DNAExporter
-from ..bindings import riglogic
-from ..constants import EXTRA_BONES
+from .cache import get_geometry_cache
+from .. import utilities
+from ..constants import EXTRA_BONES, SCALE_FACTOR, FLOATING_POINT_PRECISION
 
 logger = logging.getLogger(__name__)
 
 class DNACalibrator(DNAExporter, DNAImporter):
-    def calibrate_vertex_positions(self):
+    def get_vertex_position_changes(self) -> list[dict]:
+        """
+        Compares the vertex positions of all the meshes against the DNA in a single array operation.
+        
+        Returns:
+            list[dict]: The mesh index, current and DNA positions, changed mask and deltas of each mesh.
+        """
         mesh_index_lookup = {self._dna_reader.getMeshName(index): index for index in range(self._dna_reader.getMeshCount())}
+        geometry_cache = get_geometry_cache(self._source_dna_file, reader=self._dna_reader)
+        # Rotate the mesh so that it's Y-up and convert from blender meters to centimeters
+        matrix = Matrix.Rotation(math.radians(-90), 3, 'X') * SCALE_FACTOR
 
+        meshes = []
         for lod_index, mesh_objects in self._export_lods.items():
-            logger.info(f'Calibrating LOD {lod_index}...')
             for mesh_object, _ in mesh_objects:
                 real_name = mesh_object.name.replace(f'{self._instance.name}_', '')
-                logger.info(f'Calibrating "{real_name}"...')
-                mesh_index = mesh_index_lookup[mesh_object.name.replace(f'{self._instance.name}_', '')]
-                bmesh_object = self.get_bmesh(mesh_object)
-                vertex_indices, vertex_positions = self.get_mesh_vertex_positions(bmesh_object)
-                bmesh_object.free()
-
-                # Read these from the DNA file and modify these arrays so that they match the vertex indices match
-                x_values = self._dna_reader.getVertexPositionXs(mesh_index)
-                y_values = self._dna_reader.getVertexPositionYs(mesh_index)
-                z_values = self._dna_reader.getVertexPositionZs(mesh_index)
-
-                for vertex_index in vertex_indices:
-                    vertex_position = Vector(vertex_positions[vertex_index])
-                    dna_vertex_position = Vector((x_values[vertex_index], y_values[vertex_index], z_values[vertex_index]))
-                    delta = vertex_position - dna_vertex_position
-                    # This ensures that we only modify the vertex positions that are different to avoid floating value drift
-                    if delta.length > 1e-6:
-                        x_values[vertex_index] = vertex_position.x
-                        y_values[vertex_index] = vertex_position.y
-                        z_values[vertex_index] = vertex_position.z
-
-                self._dna_writer.setVertexPositions(
-                    meshIndex=mesh_index, 
-                    positions=[[x,y,z] for x,y,z in zip(x_values, y_values, z_values)]
-                )
-        
+                mesh_index = mesh_index_lookup[real_name]
+                # meshes that are unchanged since import already match the DNA
+                if self.is_unchanged(mesh_object):
+                    continue
+                positions = utilities.get_mesh_vertex_positions_array(mesh_object.data).astype(np.float64) # type: ignore
+                positions = utilities.transform_vectors(positions, matrix)
+
+                if geometry_cache:
+                    dna_positions = np.asarray(geometry_cache.get_mesh(mesh_index)['positions'], dtype=np.float64)
+                else:
+                    dna_positions = np.column_stack((
+                        self._dna_reader.getVertexPositionXs(mesh_index),
+                        self._dna_reader.getVertexPositionYs(mesh_index),
+                        self._dna_reader.getVertexPositionZs(mesh_index)
+                    )).reshape(-1, 3)
+
+                if len(positions) != len(dna_positions):
+                    logger.warning(
+                        f'"{real_name}" has {len(positions)} vertices but the DNA has {len(dna_positions)}. '
+                        'Ignored from calibration...'
+                    )
+                    continue
+
+                meshes.append({
+                    'lod': lod_index,
+                    'name': real_name,
+                    'mesh_index': mesh_index,
+                    'positions': positions,
+                    'dna_positions': dna_positions
+                })
+
+        if not meshes:
+            return meshes
+
+        # diff every vertex of every mesh at once, then split the results back out per mesh
+        offsets = np.cumsum([len(mesh['positions']) for mesh in meshes])[:-1]
+        deltas = np.linalg.norm(
+            np.concatenate([mesh['positions'] for mesh in meshes]) - 
+            np.concatenate([mesh['dna_positions'] for mesh in meshes]),
+            axis=1
+        )
+        # This ensures that we only modify the vertex positions that are different to avoid floating value drift
+        changed = deltas > FLOATING_POINT_PRECISION
+        for mesh, mesh_deltas, mesh_changed in zip(meshes, np.split(deltas, offsets), np.split(changed, offsets)):
+            mesh['deltas'] = mesh_deltas
+            mesh['changed'] = mesh_changed
+        return meshes
+
+    def calibrate_vertex_positions(self):
+        self.calibration_summary = []
+        for mesh in self.get_vertex_position_changes():
+            changed = mesh['changed']
+            changed_deltas = mesh['deltas'][changed]
+            summary = {
+                'lod': mesh['lod'],
+                'mesh': mesh['name'],
+                'changed_vertex_count': int(changed.sum()),
+                'max_delta': float(changed_deltas.max(initial=0.0)),
+                'rms_delta': float(np.sqrt(np.mean(np.square(changed_deltas)))) if len(changed_deltas) else 0.0
+            }
+            self.calibration_summary.append(summary)
+            # unchanged meshes keep the positions the writer already copied from the source DNA
+            if not summary['changed_vertex_count']:
+                continue
+
+            logger.info(
+                f'Calibrating "{mesh["name"]}": {summary["changed_vertex_count"]} vertices changed, '
+                f'max delta {summary["max_delta"]:.6f}, rms delta {summary["rms_delta"]:.6f}'
+            )
+            # the writer replaces the whole array, so only the changed rows differ from the source DNA
+            positions = mesh['dna_positions'].copy()
+            positions[changed] = mesh['positions'][changed]
+            self._dna_writer.setVertexPositions(
+                meshIndex=mesh['mesh_index'], 
+                positions=positions.tolist()
+            )
+
+        if not any(summary['changed_vertex_count'] for summary in self.calibration_summary):
+            logger.info('Calibrating vertex positions: no changes')
+
+    def calibrate_blend_shapes(self):
+        if self._instance.generate_neutral_shapes:
+            logger.info('Shape keys are neutral, skipping blend shape calibration...')
+            return
+
+        for mesh_objects in self._export_lods.values():
+            for mesh_object, _ in mesh_objects:
+                real_name = mesh_object.name.replace(f'{self._instance.name}_', '')
+                mesh_index = self._source_mesh_indices[real_name]
+                # the deltas are scattered by vertex index, so they only line up with the DNA on the same topology
+                if not self.can_export_blend_shapes(mesh_object, mesh_index):
+                    logger.warning(
+                        f'"{real_name}" has {len(mesh_object.data.vertices)} vertices but the DNA has ' # type: ignore
+                        f'{self._dna_reader.getVertexPositionCount(mesh_index)}. Ignored from blend shape calibration...'
+                    )
+                    continue
+
+                channel_indices, offsets, vertex_indices, deltas = self.get_mesh_blend_shapes(mesh_object, real_name)
+                if not channel_indices:
+                    continue
+
+                geometry = self.get_source_mesh_geometry(mesh_index)
+                target_index_lookup = {
+                    channel_index: target_index 
+                    for target_index, channel_index in enumerate(geometry['target_channel_indices'].tolist())
+                }
+                vertex_count = len(geometry['positions'])
+                dna_offsets = geometry['target_offsets']
+
+                changed_count = 0
+                for index, channel_index in enumerate(channel_indices):
+                    target_index = target_index_lookup.get(channel_index)
+                    if target_index is None:
+                        logger.warning(f'"{real_name}" has no blend shape target for channel {channel_index}. Ignored from calibration...')
+                        continue
+
+                    start, end = offsets[index], offsets[index + 1]
+                    dna_start, dna_end = dna_offsets[target_index], dna_offsets[target_index + 1]
+                    # compare the dense deltas, so deltas dropped by the threshold are not counted as changes
+                    current = np.zeros((vertex_count, 3))
+                    current[vertex_indices[start:end]] = deltas[start:end]
+                    expected = np.zeros((vertex_count, 3))
+                    expected[geometry['target_vertex_indices'][dna_start:dna_end]] = geometry['target_deltas'][dna_start:dna_end]
+                    # Only modify the targets that are different to avoid floating point value drift
+                    if np.abs(current - expected).max(initial=0.0) <= FLOATING_POINT_PRECISION:
+                        continue
+
+                    changed_count += 1
+                    self._dna_writer.setBlendShapeTargetVertexIndices(
+                        meshIndex=mesh_index,
+                        blendShapeTargetIndex=target_index,
+                        vertexIndices=vertex_indices[start:end].tolist()
+                    )
+                    self._dna_writer.setBlendShapeTargetDeltas(
+                        meshIndex=mesh_index,
+                        blendShapeTargetIndex=target_index,
+                        deltas=deltas[start:end].tolist()
+                    )
+                logger.info(f'Calibrating "{real_name}": {changed_count} of {len(channel_indices)} blend shapes changed')
+
     def calibrate_bone_transforms(self):
+        if self.is_unchanged(self._rig_object):
+            logger.info('Bones are unchanged, skipping bone calibration...')
+            return
+
         ignored_bone_names = [i for i, _ in EXTRA_BONES]
 
         logger.info('Calibrating bones...')
@@ -100,7 +230,7 @@ class DNACalibrator(DNAExporter, DNAImporter):
         #     [x, y, z] for x, y, z in zip(dna_x_rotations, dna_y_rotations, dna_z_rotations)
         # ])
 
-    def run(self) -> tuple[bool, str, str, Callable| None]:
+    def _run(self, background: bool = False) -> tuple[bool, str, str, Callable| None]:
         self.initialize_scene_data()
         valid, title, message, fix = self.validate()
         if not valid:
@@ -108,17 +238,14 @@ class DNACalibrator(DNAExporter, DNAImporter):
 
         if self._include_meshes:
             self.calibrate_vertex_positions()
+            if self._include_blend_shapes and self._instance.calibrate_shape_keys:
+                self.calibrate_blend_shapes()
         if self._include_bones:
             self.calibrate_bone_transforms()        
 
-        logger.info(f'Saving DNA to: "{self._target_dna_file}"...')
-        self._dna_writer.write()
+        self.write_dna(background=background)
 
-        if not riglogic.Status.isOk():
-            status = riglogic.Status.get()
-            raise RuntimeError(f"Error saving DNA: {status.message}")
-        logger.info(f'DNA calibrated successfully to: "{self._target_dna_file}"')
-        
+        # the images are saved on the main thread while the DNA is written
         self.save_images()
 
         return True, "Success", "Calibration successful.", None
\ No newline at end of file
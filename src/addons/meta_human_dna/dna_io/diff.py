@@ -0,0 +1,493 @@
+import json
+import logging
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING
+from .misc import get_dna_reader
+from .cache import decode_mesh_geometry
+from ..constants import DNA_DIFF_TOLERANCES, DNA_DIFF_MAX_REPORTED_INDICES
+
+if TYPE_CHECKING:
+    from ..bindings import riglogic
+
+logger = logging.getLogger(__name__)
+
+
+class DNADifference:
+    """
+    A difference in one field of a DNA file. The name is the joint, mesh, joint group or blend
+    shape target that the field belongs to, and the indices are the elements that differ
+    (i.e. vertex indices for mesh data or joint indices for joint data).
+    """
+    def __init__(
+            self,
+            layer: str,
+            field: str,
+            name: str = '',
+            indices: np.ndarray | None = None,
+            max_delta: float = 0.0,
+            message: str = ''
+        ):
+        self.layer = layer
+        self.field = field
+        self.name = name
+        self.indices = np.zeros(0, dtype=np.int64) if indices is None else np.asarray(indices, dtype=np.int64)
+        self.max_delta = max_delta
+        self.message = message
+
+    def __repr__(self) -> str:
+        return f'<DNADifference {self.get_summary()}>'
+
+    def get_summary(self) -> str:
+        location = f'{self.layer}.{self.field}' + (f' "{self.name}"' if self.name else '')
+        if self.message:
+            return f'{location}: {self.message}'
+        return f'{location}: {len(self.indices)} differ, max delta {self.max_delta:.6g}'
+
+    def to_dict(self) -> dict:
+        return {
+            'layer': self.layer,
+            'field': self.field,
+            'name': self.name,
+            'count': len(self.indices),
+            'indices': self.indices[:DNA_DIFF_MAX_REPORTED_INDICES].tolist(),
+            'max_delta': self.max_delta,
+            'message': self.message
+        }
+
+
+class DNADiffReport:
+    """
+    The structured differences between an expected and a current DNA file.
+    """
+    def __init__(self, expected: str = '', current: str = ''):
+        self.expected = expected
+        self.current = current
+        self.differences: list[DNADifference] = []
+        self.changed_joint_names: set[str] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.differences)
+
+    @property
+    def is_equal(self) -> bool:
+        return not self.differences
+
+    def add(self, difference: DNADifference):
+        self.differences.append(difference)
+
+    def get(self, field: str, name: str | None = None) -> list[DNADifference]:
+        return [
+            difference for difference in self.differences
+            if difference.field == field and (name is None or difference.name == name)
+        ]
+
+    def get_changed_indices(self, field: str, name: str) -> set[int]:
+        indices = set()
+        for difference in self.get(field, name):
+            indices.update(difference.indices.tolist())
+        return indices
+
+    def get_summary(self) -> str:
+        if self.is_equal:
+            return 'The DNA files match.'
+        lines = [f'{len(self.differences)} differences:']
+        lines.extend(f'  {difference.get_summary()}' for difference in self.differences)
+        if self.changed_joint_names:
+            lines.append(f'Changed joints: {", ".join(sorted(self.changed_joint_names))}')
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            'expected': self.expected,
+            'current': self.current,
+            'is_equal': self.is_equal,
+            'changed_joint_names': sorted(self.changed_joint_names),
+            'differences': [difference.to_dict() for difference in self.differences]
+        }
+
+    def save(self, file_path: Path) -> Path:
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+        logger.info(f'Saved DNA diff report "{file_path}"')
+        return file_path
+
+
+def get_sparse_deltas(
+        expected_keys: np.ndarray,
+        expected_values: np.ndarray,
+        current_keys: np.ndarray,
+        current_values: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the difference of two sparse arrays. A key that is missing from one of them counts
+    as a value of zero.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The union of the keys and the max absolute delta of each key.
+    """
+    keys = np.union1d(expected_keys, current_keys)
+    shape = (len(keys),) + np.shape(expected_values)[1:]
+    expected = np.zeros(shape, dtype=np.float64)
+    current = np.zeros(shape, dtype=np.float64)
+    expected[np.searchsorted(keys, expected_keys)] = expected_values
+    current[np.searchsorted(keys, current_keys)] = current_values
+    deltas = np.abs(current - expected)
+    if deltas.ndim > 1:
+        deltas = deltas.max(axis=tuple(range(1, deltas.ndim)), initial=0.0)
+    return keys, deltas
+
+
+def get_face_corner_values(
+        values: np.ndarray,
+        layout_indices: np.ndarray,
+        face_layout_indices: np.ndarray
+    ) -> np.ndarray:
+    """
+    Gets the value that each face corner points to through its vertex layout.
+    """
+    if not len(values):
+        return np.zeros((len(face_layout_indices),) + np.shape(values)[1:], dtype=np.float32)
+    return values[layout_indices[face_layout_indices]]
+
+
+class DNADiff:
+    """
+    Compares two DNA files layer by layer. Each field is read into arrays and compared in
+    bulk against its tolerance, rather than value by value. Joints and meshes are matched
+    by name, so the report is still useful when the current file has reordered them.
+    """
+    def __init__(
+            self,
+            expected: 'Path | riglogic.BinaryStreamReader',
+            current: 'Path | riglogic.BinaryStreamReader',
+            tolerances: dict[str, float] | None = None
+        ):
+        self._expected = self._get_reader(expected)
+        self._current = self._get_reader(current)
+        self._tolerances = {**DNA_DIFF_TOLERANCES, **(tolerances or {})}
+        self.report = DNADiffReport(
+            expected=str(expected) if isinstance(expected, (str, Path)) else '',
+            current=str(current) if isinstance(current, (str, Path)) else ''
+        )
+
+    @staticmethod
+    def _get_reader(value: 'Path | str | riglogic.BinaryStreamReader') -> 'riglogic.BinaryStreamReader':
+        if isinstance(value, (str, Path)):
+            return get_dna_reader(file_path=Path(value))
+        return value
+
+    def compare_values(
+            self,
+            layer: str,
+            field: str,
+            expected: np.ndarray,
+            current: np.ndarray,
+            name: str = '',
+            tolerance: float | None = None
+        ) -> np.ndarray:
+        """
+        Compares two arrays element by element. The first axis is the element index, any
+        others (i.e. xyz) are reduced to their max delta.
+
+        Returns:
+            np.ndarray: The indices of the elements that differ.
+        """
+        expected = np.asarray(expected)
+        current = np.asarray(current)
+        if expected.shape != current.shape:
+            self.report.add(DNADifference(
+                layer, field, name,
+                message=f'shape mismatch, expected {expected.shape} but has {current.shape}'
+            ))
+            return np.zeros(0, dtype=np.int64)
+
+        if tolerance is None:
+            tolerance = self._tolerances.get(field, 0.0)
+        if expected.dtype.kind in 'iub' and current.dtype.kind in 'iub':
+            deltas = (expected != current).astype(np.float64)
+        else:
+            deltas = np.abs(current.astype(np.float64) - expected.astype(np.float64))
+        if deltas.ndim > 1:
+            deltas = deltas.max(axis=tuple(range(1, deltas.ndim)), initial=0.0)
+
+        indices = np.flatnonzero(deltas > tolerance)
+        if len(indices):
+            self.report.add(DNADifference(
+                layer, field, name,
+                indices=indices,
+                max_delta=float(deltas[indices].max())
+            ))
+        return indices
+
+    def compare_names(self, layer: str, field: str, expected: list[str], current: list[str]):
+        expected_names = set(expected)
+        current_names = set(current)
+        missing = [name for name in expected if name not in current_names]
+        added = [name for name in current if name not in expected_names]
+        if missing or added:
+            self.report.add(DNADifference(
+                layer, field,
+                message=f'missing {missing[:DNA_DIFF_MAX_REPORTED_INDICES]}, added {added[:DNA_DIFF_MAX_REPORTED_INDICES]}'
+            ))
+        elif expected != current:
+            self.report.add(DNADifference(layer, field, message='the names are in a different order'))
+
+    def compare_definition(self):
+        expected_reader = self._expected
+        current_reader = self._current
+        expected_names = [expected_reader.getJointName(i) for i in range(expected_reader.getJointCount())]
+        current_names = [current_reader.getJointName(i) for i in range(current_reader.getJointCount())]
+        self.compare_names('definition', 'jointNames', expected_names, current_names)
+
+        # the current values are reordered to match the expected joints by name, and the joints
+        # that are missing from the current file are NaN so they are not reported twice
+        current_lookup = {name: index for index, name in enumerate(current_names)}
+        current_indices = np.array([current_lookup.get(name, -1) for name in expected_names], dtype=np.int64)
+        matched = current_indices >= 0
+
+        for field, getter in (
+            ('neutralJointTranslations', 'getNeutralJointTranslation'),
+            ('neutralJointRotations', 'getNeutralJointRotation')
+        ):
+            expected, current = (
+                np.column_stack((
+                    getattr(reader, f'{getter}Xs')(),
+                    getattr(reader, f'{getter}Ys')(),
+                    getattr(reader, f'{getter}Zs')()
+                )).reshape(-1, 3).astype(np.float64)
+                for reader in (expected_reader, current_reader)
+            )
+            current = np.where(matched[:, None], current[np.where(matched, current_indices, 0)], np.nan) \
+                if len(current) else np.full_like(expected, np.nan)
+            changed = self.compare_values('definition', field, expected, current)
+            self.report.changed_joint_names.update(expected_names[i] for i in changed)
+
+        changed = [
+            index for index in np.flatnonzero(matched)
+            if index > 0 and expected_names[expected_reader.getJointParentIndex(index)] !=
+            current_names[current_reader.getJointParentIndex(current_indices[index])]
+        ]
+        if changed:
+            self.report.add(DNADifference(
+                'definition', 'jointHierarchy',
+                indices=np.array(changed),
+                max_delta=1.0
+            ))
+            self.report.changed_joint_names.update(expected_names[i] for i in changed)
+
+        self.compare_names(
+            'definition', 'meshNames',
+            [expected_reader.getMeshName(i) for i in range(expected_reader.getMeshCount())],
+            [current_reader.getMeshName(i) for i in range(current_reader.getMeshCount())]
+        )
+        self.compare_names(
+            'definition', 'blendShapeChannelNames',
+            [expected_reader.getBlendShapeChannelName(i) for i in range(expected_reader.getBlendShapeChannelCount())],
+            [current_reader.getBlendShapeChannelName(i) for i in range(current_reader.getBlendShapeChannelCount())]
+        )
+
+    def compare_behavior(self):
+        expected_reader = self._expected
+        current_reader = self._current
+        self.compare_names(
+            'behavior', 'guiControlNames',
+            [expected_reader.getGUIControlName(i) for i in range(expected_reader.getGUIControlCount())],
+            [current_reader.getGUIControlName(i) for i in range(current_reader.getGUIControlCount())]
+        )
+        self.compare_names(
+            'behavior', 'rawControlNames',
+            [expected_reader.getRawControlName(i) for i in range(expected_reader.getRawControlCount())],
+            [current_reader.getRawControlName(i) for i in range(current_reader.getRawControlCount())]
+        )
+
+        for field in ('JointRowCount', 'JointColumnCount', 'JointGroupCount'):
+            self.compare_values(
+                'behavior', field[0].lower() + field[1:],
+                np.array([getattr(expected_reader, f'get{field}')()]),
+                np.array([getattr(current_reader, f'get{field}')()])
+            )
+
+        group_count = min(expected_reader.getJointGroupCount(), current_reader.getJointGroupCount())
+        for group_index in range(group_count):
+            name = str(group_index)
+            for field in ('JointIndices', 'InputIndices', 'OutputIndices', 'LODs'):
+                self.compare_values(
+                    'behavior', f'jointGroup{field}',
+                    np.array(getattr(expected_reader, f'getJointGroup{field}')(group_index), dtype=np.int64),
+                    np.array(getattr(current_reader, f'getJointGroup{field}')(group_index), dtype=np.int64),
+                    name=name
+                )
+            self.compare_values(
+                'behavior', 'jointGroupValues',
+                np.array(expected_reader.getJointGroupValues(group_index), dtype=np.float64),
+                np.array(current_reader.getJointGroupValues(group_index), dtype=np.float64),
+                name=name
+            )
+
+        for field in ('InputIndices', 'OutputIndices', 'LODs'):
+            self.compare_values(
+                'behavior', f'blendShapeChannel{field}',
+                np.array(getattr(expected_reader, f'getBlendShapeChannel{field}')(), dtype=np.int64),
+                np.array(getattr(current_reader, f'getBlendShapeChannel{field}')(), dtype=np.int64)
+            )
+        for field in ('InputIndices', 'OutputIndices', 'LODs'):
+            self.compare_values(
+                'behavior', f'animatedMap{field}',
+                np.array(getattr(expected_reader, f'getAnimatedMap{field}')(), dtype=np.int64),
+                np.array(getattr(current_reader, f'getAnimatedMap{field}')(), dtype=np.int64)
+            )
+        self.compare_values(
+            'behavior', 'animatedMapValues',
+            np.column_stack([
+                getattr(expected_reader, f'getAnimatedMap{field}Values')()
+                for field in ('From', 'To', 'Slope', 'Cut')
+            ]),
+            np.column_stack([
+                getattr(current_reader, f'getAnimatedMap{field}Values')()
+                for field in ('From', 'To', 'Slope', 'Cut')
+            ])
+        )
+
+    def compare_mesh(self, mesh_name: str, expected_index: int, current_index: int):
+        expected = decode_mesh_geometry(self._expected, expected_index)
+        current = decode_mesh_geometry(self._current, current_index)
+
+        for field, key in (
+            ('positions', 'positions'),
+            ('normals', 'normals'),
+            ('textureCoordinates', 'uvs'),
+            ('layoutPositions', 'layout_positions'),
+            ('layoutNormals', 'layout_normals'),
+            ('layoutTextureCoordinates', 'layout_uvs'),
+            ('faceOffsets', 'face_offsets'),
+            ('faceLayoutIndices', 'face_layout_indices')
+        ):
+            self.compare_values('geometry', field, expected[key], current[key], name=mesh_name)
+
+        # the exporter can reorder and deduplicate the uvs, so the uv of each face corner is compared 
+        # too, since it only depends on the faces
+        self.compare_values(
+            'geometry', 'faceTextureCoordinates',
+            get_face_corner_values(expected['uvs'], expected['layout_uvs'], expected['face_layout_indices']),
+            get_face_corner_values(current['uvs'], current['layout_uvs'], current['face_layout_indices']),
+            name=mesh_name,
+            tolerance=self._tolerances['textureCoordinates']
+        )
+
+        # skin weights are keyed by vertex and joint, so rows with a different order still match
+        joint_count = max(self._expected.getJointCount(), self._current.getJointCount())
+        keys = []
+        for geometry in (expected, current):
+            vertex_indices = np.repeat(
+                np.arange(len(geometry['skin_offsets']) - 1),
+                np.diff(geometry['skin_offsets'])
+            )
+            keys.append(vertex_indices * joint_count + geometry['skin_joint_indices'])
+        skin_keys, deltas = get_sparse_deltas(keys[0], expected['skin_weights'], keys[1], current['skin_weights'])
+        changed = deltas > self._tolerances['skinWeights']
+        if np.any(changed):
+            self.report.add(DNADifference(
+                'geometry', 'skinWeights', mesh_name,
+                indices=np.unique(skin_keys[changed] // joint_count),
+                max_delta=float(deltas[changed].max())
+            ))
+
+        self.compare_blend_shape_targets(mesh_name, expected, current)
+
+    def compare_blend_shape_targets(self, mesh_name: str, expected: dict, current: dict):
+        current_targets = {
+            channel_index: target_index
+            for target_index, channel_index in enumerate(current['target_channel_indices'].tolist())
+        }
+        missing = []
+        for target_index, channel_index in enumerate(expected['target_channel_indices'].tolist()):
+            current_index = current_targets.pop(channel_index, None)
+            if current_index is None:
+                missing.append(channel_index)
+                continue
+
+            expected_start, expected_end = expected['target_offsets'][target_index:target_index + 2]
+            current_start, current_end = current['target_offsets'][current_index:current_index + 2]
+            vertex_indices, deltas = get_sparse_deltas(
+                expected['target_vertex_indices'][expected_start:expected_end],
+                expected['target_deltas'][expected_start:expected_end],
+                current['target_vertex_indices'][current_start:current_end],
+                current['target_deltas'][current_start:current_end]
+            )
+            changed = deltas > self._tolerances['blendShapeTargetDeltas']
+            if np.any(changed):
+                self.report.add(DNADifference(
+                    'geometry', 'blendShapeTargetDeltas',
+                    name=f'{mesh_name}__{self._expected.getBlendShapeChannelName(channel_index)}',
+                    indices=vertex_indices[changed],
+                    max_delta=float(deltas[changed].max())
+                ))
+
+        if missing or current_targets:
+            self.report.add(DNADifference(
+                'geometry', 'blendShapeTargets', mesh_name,
+                message=f'missing channels {missing[:DNA_DIFF_MAX_REPORTED_INDICES]}, '
+                        f'added channels {list(current_targets)[:DNA_DIFF_MAX_REPORTED_INDICES]}'
+            ))
+
+    def compare_geometry(self, mesh_names: list[str] | None = None):
+        current_lookup = {
+            self._current.getMeshName(index): index
+            for index in range(self._current.getMeshCount())
+        }
+        for expected_index in range(self._expected.getMeshCount()):
+            mesh_name = self._expected.getMeshName(expected_index)
+            if mesh_names is not None and mesh_name not in mesh_names:
+                continue
+            current_index = current_lookup.get(mesh_name)
+            if current_index is not None:
+                self.compare_mesh(mesh_name, expected_index, current_index)
+
+    def run(
+            self,
+            layers: tuple[str, ...] = ('definition', 'behavior', 'geometry'),
+            mesh_names: list[str] | None = None
+        ) -> DNADiffReport:
+        """
+        Compares the DNA files.
+
+        Args:
+            layers (tuple[str, ...], optional): The layers to compare. Defaults to all of them.
+            mesh_names (list[str] | None, optional): Only compares the geometry of these meshes. Defaults to None.
+
+        Returns:
+            DNADiffReport: The differences that were found.
+        """
+        if 'definition' in layers:
+            self.compare_definition()
+        if 'behavior' in layers:
+            self.compare_behavior()
+        if 'geometry' in layers:
+            self.compare_geometry(mesh_names=mesh_names)
+        return self.report
+
+
+def compare_dna(
+        expected: 'Path | riglogic.BinaryStreamReader',
+        current: 'Path | riglogic.BinaryStreamReader',
+        tolerances: dict[str, float] | None = None,
+        layers: tuple[str, ...] = ('definition', 'behavior', 'geometry'),
+        mesh_names: list[str] | None = None
+    ) -> DNADiffReport:
+    """
+    Compares two DNA files and returns a report of their differences.
+
+    Args:
+        expected (Path | riglogic.BinaryStreamReader): The expected DNA file or reader.
+        current (Path | riglogic.BinaryStreamReader): The current DNA file or reader.
+        tolerances (dict[str, float] | None, optional): Overrides the tolerance of fields. Defaults to None.
+        layers (tuple[str, ...], optional): The layers to compare. Defaults to all of them.
+        mesh_names (list[str] | None, optional): Only compares the geometry of these meshes. Defaults to None.
+
+    Returns:
+        DNADiffReport: The differences that were found.
+    """
+    return DNADiff(expected, current, tolerances=tolerances).run(layers=layers, mesh_names=mesh_names)
@@ -2,18 +2,23 @@ import os
 import bpy
 import math
 import json
-import bmesh
 import logging
+import numpy as np
 from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from mathutils import Vector, Matrix
+from mathutils import Matrix
 from .. import utilities
 from ..rig_logic import RigLogicInstance
-from .misc import get_dna_writer, get_dna_reader
+from .misc import get_dna_writer, get_dna_reader, get_temp_dna_file_path, is_dna_file_being_written, DNAFileWrite
+from .cache import MeshGeometry, get_dna_content_hash, get_geometry_cache, get_mesh_geometry
 from ..bindings import riglogic
 from ..constants import (
     SCALE_FACTOR, 
     TOPO_GROUP_PREFIX,
+    SKIN_WEIGHT_EPSILON,
+    BLEND_SHAPE_DELTA_EPSILON,
+    FILE_COPY_MAX_WORKERS,
     EXTRA_BONES
 )
 
@@ -28,7 +33,13 @@ class DNAExporter:
             bones: bool = True,
             vertex_colors: bool = True,
             file_name: str | None = None,
-            reader: 'riglogic.BinaryStreamReader | None' = None
+            reader: 'riglogic.BinaryStreamReader | None' = None,
+            max_influences: int | None = None,
+            weight_epsilon: float = SKIN_WEIGHT_EPSILON,
+            lods: list[int] | None = None,
+            fsync: bool = False,
+            blend_shapes: bool = True,
+            delta_epsilon: float = BLEND_SHAPE_DELTA_EPSILON
         ):
         self._instance = instance
         self._linear_modifier = linear_modifier
@@ -37,10 +48,23 @@ class DNAExporter:
         self._include_meshes = meshes
         self._include_bones = bones
         self._include_vertex_colors = vertex_colors
+        # when not set, the max influences of each mesh are taken from the source DNA
+        self._max_influences = max_influences
+        self._weight_epsilon = weight_epsilon
+        # when set, only the meshes in these LODs are exported and the rest are kept from the source DNA
+        self._lods = lods
+        self._fsync = fsync
+        # the blend shapes are exported from the shape keys of the meshes that have them
+        self._include_blend_shapes = blend_shapes
+        self._delta_epsilon = delta_epsilon
 
         self._output_folder = Path(bpy.path.abspath(instance.output_folder_path))
         self._source_dna_file = Path(bpy.path.abspath(instance.dna_file_path))
         self._target_dna_file = Path(bpy.path.abspath(instance.output_folder_path)) / (file_name or f'{instance.name}.dna')
+        # the writer and its temporary file are created when the DNA data is first set, so an 
+        # exporter that is only used to check the scene doesn't leave a temporary file behind
+        self._temp_dna_file: Path | None = None
+        self._writer: 'riglogic.BinaryStreamWriter | None' = None
 
         # Open a read to the source DNA file if an existing reader is not provided
         if not reader:
@@ -48,18 +72,6 @@ class DNAExporter:
         else:
             self._dna_reader = reader
 
-        self._dna_writer = get_dna_writer(
-            file_path=self._target_dna_file,
-            file_format=self._instance.output_format
-        )
-        # Populate the writer with the data from the reader
-        self._dna_writer.setFrom(
-            self._dna_reader,
-            riglogic.DataLayer.All,
-            riglogic.UnknownLayerPolicy.Preserve,
-            None
-        )
-
         # The head mesh is always the first mesh in the DNA file
         self._export_lods = {
             0: [(instance.head_mesh, 0)]
@@ -70,8 +82,185 @@ class DNAExporter:
         self._images = []
         self._bone_index_lookup = {}
         self._vertex_color_data = []
+        # the fingerprints of the scene objects, which are compared to the ones recorded for the source DNA
+        self._fingerprints = {}
+        self._source_dna_hash: str | None = None
+        self._source_geometry_cache = None
+        self._write_task: DNAFileWrite | None = None
+        self._blend_shape_channel_lookup = None
+        self._source_mesh_indices = {
+            self._dna_reader.getMeshName(index): index 
+            for index in range(self._dna_reader.getMeshCount())
+        }
+
+    @property
+    def _dna_writer(self) -> 'riglogic.BinaryStreamWriter':
+        if self._writer is None:
+            # the DNA is written to a temporary file first, which then replaces the target file
+            self._temp_dna_file = get_temp_dna_file_path(self._target_dna_file)
+            self._writer = get_dna_writer(
+                file_path=self._temp_dna_file,
+                file_format=self._instance.output_format
+            )
+            # Populate the writer with the data from the reader
+            self._writer.setFrom(
+                self._dna_reader,
+                riglogic.DataLayer.All,
+                riglogic.UnknownLayerPolicy.Preserve,
+                None
+            )
+        return self._writer
+
+    def discard_temp_dna_file(self):
+        """
+        Removes the temporary file when the export stopped before a write took it over. A write 
+        that is running in the background removes it itself if it fails.
+        """
+        if self._temp_dna_file and not (self._write_task and self._write_task.running):
+            self._temp_dna_file.unlink(missing_ok=True)
+
+    def get_fingerprint(self, scene_object: bpy.types.Object) -> str:
+        fingerprint = self._fingerprints.get(scene_object.name)
+        if fingerprint is None:
+            if scene_object.type == 'ARMATURE':
+                fingerprint = utilities.get_armature_fingerprint(scene_object)
+            else:
+                fingerprint = utilities.get_mesh_fingerprint(scene_object)
+            self._fingerprints[scene_object.name] = fingerprint
+        return fingerprint
+
+    def get_source_dna_hash(self) -> str:
+        """
+        Gets the content hash of the source DNA file, which the fingerprints are recorded against.
+        """
+        if self._source_dna_hash is None:
+            self._source_dna_hash = get_dna_content_hash(self._source_dna_file) if self._source_dna_file.is_file() else ''
+        return self._source_dna_hash
+
+    def is_unchanged(self, scene_object: bpy.types.Object) -> bool:
+        """
+        Whether the object still matches the source DNA. This compares its fingerprint to the one 
+        recorded when it was imported, or when it was last written to the source DNA file. A 
+        fingerprint that was recorded against a different DNA file content doesn't match, since 
+        the file could have been replaced outside of Blender.
+        """
+        recorded_fingerprint = self._instance.get_fingerprint(scene_object.name, dna_hash=self.get_source_dna_hash())
+        return recorded_fingerprint == self.get_fingerprint(scene_object)
+
+    def record_fingerprints(self):
+        # the recorded fingerprints describe the source DNA, so only update them when it was overwritten
+        if self._target_dna_file.resolve() != self._source_dna_file.resolve():
+            return
+        dna_hash = get_dna_content_hash(self._target_dna_file)
+        for name, fingerprint in self._fingerprints.items():
+            self._instance.set_fingerprint(name, fingerprint, dna_hash=dna_hash)
+
+    @property
+    def write_task(self) -> DNAFileWrite | None:
+        return self._write_task
+
+    def write_dna(self, background: bool = False) -> DNAFileWrite:
+        """
+        Writes the DNA data captured in the writer to the target file. When running in the 
+        background, the file is written on a worker thread and finish_write must be called 
+        once the returned task is done.
+        """
+        logger.info(f'Saving DNA to: "{self._target_dna_file}"...')
+        writer = self._dna_writer
+        self._write_task = DNAFileWrite(
+            writer=writer,
+            temp_file_path=self._temp_dna_file, # type: ignore
+            file_path=self._target_dna_file,
+            fsync=self._fsync
+        )
+        if background:
+            self._write_task.start()
+        else:
+            self._write_task.run()
+            self.finish_write()
+        return self._write_task
+
+    def finish_write(self):
+        if not self._write_task or self._write_task.error:
+            return
+        logger.info(f'DNA saved successfully to: "{self._target_dna_file}"')
+        self.record_fingerprints()
+        # reload the rig logic instance if it reads from the file that was just replaced
+        if self._target_dna_file.resolve() == Path(bpy.path.abspath(self._instance.dna_file_path)).resolve():
+            self._instance.data.clear()
+            self._instance.initialize()
+
+    def get_source_mesh_geometry(self, mesh_index: int) -> MeshGeometry:
+        if self._source_geometry_cache is None:
+            self._source_geometry_cache = get_geometry_cache(
+                dna_file_path=self._source_dna_file, 
+                reader=self._dna_reader
+            ) or False
+        if self._source_geometry_cache:
+            return self._source_geometry_cache.get_mesh(mesh_index)
+        return get_mesh_geometry(self._dna_reader, mesh_index)
+
+    def get_source_bone_transforms(self) -> tuple[
+            list[int], 
+            list[str], 
+            list[int], 
+            list[list[float]], 
+            list[list[float]]
+        ]:
+        joint_count = self._dna_reader.getJointCount()
+        translations = zip(
+            self._dna_reader.getNeutralJointTranslationXs(),
+            self._dna_reader.getNeutralJointTranslationYs(),
+            self._dna_reader.getNeutralJointTranslationZs()
+        )
+        rotations = zip(
+            self._dna_reader.getNeutralJointRotationXs(),
+            self._dna_reader.getNeutralJointRotationYs(),
+            self._dna_reader.getNeutralJointRotationZs()
+        )
+        return (
+            list(range(joint_count)),
+            [self._dna_reader.getJointName(index) for index in range(joint_count)],
+            [self._dna_reader.getJointParentIndex(index) for index in range(joint_count)],
+            [list(translation) for translation in translations],
+            [list(rotation) for rotation in rotations]
+        )
+
+    def copy_source_mesh(self, source_mesh_index: int, mesh_index: int, joint_remap: np.ndarray):
+        """
+        Writes the geometry and skin weights of a mesh in the source DNA to the given mesh index. The 
+        joint indices of the skin weights are remapped to the exported bones.
+        """
+        geometry = self.get_source_mesh_geometry(source_mesh_index)
+        self._dna_writer.setVertexLayouts(
+            meshIndex=mesh_index, 
+            layouts=np.column_stack((
+                geometry['layout_positions'],
+                geometry['layout_uvs'],
+                geometry['layout_normals']
+            )).tolist()
+        )
+        self.set_dna_vertex_positions(mesh_index, geometry['positions'].tolist())
+        self.set_dna_faces(mesh_index, geometry['face_offsets'], geometry['face_layout_indices'])
+        self.set_dna_normals(mesh_index, geometry['normals'].tolist())
+        self.set_dna_uvs(mesh_index, geometry['uvs'].tolist())
+
+        skin_offsets = geometry['skin_offsets']
+        vertex_indices = np.repeat(np.arange(len(skin_offsets) - 1), np.diff(skin_offsets))
+        joint_indices = joint_remap[geometry['skin_joint_indices']]
+        # drop the influences of joints that no longer exist
+        keep = joint_indices >= 0
+        offsets = np.zeros_like(skin_offsets)
+        offsets[1:] = np.cumsum(np.bincount(vertex_indices[keep], minlength=len(skin_offsets) - 1))
+        self.set_dna_skin_weights(mesh_index, offsets, joint_indices[keep], geometry['skin_weights'][keep])
 
     def initialize_scene_data(self):
+        # stream in the LODs that were deferred on import, so they are exported too
+        if self._include_meshes and any(self._instance.deferred_lods):
+            face = utilities.get_face(self._instance.name)
+            if face:
+                face.stream_deferred_lods()
+
         mesh_objects = []
         for output_item in self._instance.output_item_list:
             if output_item.include:
@@ -96,7 +285,7 @@ class DNAExporter:
             if index == -1:
                 self._non_lod_mesh_objects.append(mesh_object)
             else:
-                self._export_lods[index].append((mesh_object, mesh_index))
+                self._export_lods.setdefault(index, []).append((mesh_object, mesh_index))
                 self._mesh_indices.append(mesh_index)
                 mesh_index += 1
 
@@ -108,9 +297,17 @@ class DNAExporter:
         self._vertex_color_data = [{
             'indices': [],
             'values': [],
-        }] * len(self._mesh_indices)
+        } for _ in self._mesh_indices]
 
     def validate(self) -> tuple[bool, str, str, Callable | None]:
+        if is_dna_file_being_written(self._target_dna_file):
+            return (
+                False,
+                "DNA File Is Being Written",
+                f'"{self._target_dna_file.name}" is still being written by a previous export. Try again once it finishes.',
+                None
+            )
+
         if not self._rig_object:
             return (
                 False, 
@@ -173,32 +370,77 @@ class DNAExporter:
 
 
     @staticmethod
-    def get_bmesh(mesh_object: bpy.types.Object, rotation: float = -90) -> bmesh.types.BMesh:
-        # create an empty BMesh and fill it in from the mesh data
-        bmesh_object = bmesh.new()
-        bmesh_object.from_mesh(mesh=mesh_object.data) # type: ignore
-
-        # Rotate the mesh so that it's Y-up before reading the vertex data
-        bmesh.ops.rotate(
-            bmesh_object, 
-            cent=Vector((0,0,0)), 
-            matrix=Matrix.Rotation(math.radians(rotation), 4, 'X'), 
-            verts=bmesh_object.verts # type: ignore
+    def get_mesh_data(
+            mesh_object: bpy.types.Object, 
+            rotation: float = -90,
+            split_normals: bool = False
+        ) -> dict[str, np.ndarray]:
+        """
+        Extracts the mesh data as arrays in the DNA coordinate space. A vertex layout is made for each 
+        unique combination of vertex, UV and normal used by the loops. The first layouts line up with 
+        the vertices, so a layout index matches its vertex index, and the extra layouts are the 
+        vertices that are split along UV seams.
+        """
+        mesh = mesh_object.data
+        # Rotate the mesh so that it's Y-up and convert from blender meters to centimeters
+        rotation_matrix = Matrix.Rotation(math.radians(rotation), 3, 'X')
+        positions = utilities.get_mesh_vertex_positions_array(mesh, rotation_matrix * SCALE_FACTOR) # type: ignore
+        vertex_count = len(positions)
+
+        loop_vertex_indices = utilities.get_mesh_loop_vertex_indices(mesh) # type: ignore
+        face_offsets = utilities.get_mesh_face_offsets(mesh) # type: ignore
+        uvs, loop_uv_indices = utilities.get_mesh_uv_arrays(mesh) # type: ignore
+        if split_normals:
+            normals, loop_normal_indices = np.unique(
+                utilities.get_mesh_split_normals_array(mesh, rotation_matrix), # type: ignore
+                axis=0, 
+                return_inverse=True
+            )
+            loop_normal_indices = loop_normal_indices.reshape(-1)
+        else:
+            normals = utilities.get_mesh_vertex_normals_array(mesh, rotation_matrix) # type: ignore
+            loop_normal_indices = loop_vertex_indices
+
+        # vertices without faces still get a layout, so they need a uv and normal to point to
+        if not len(uvs):
+            uvs = np.zeros((1, 2), dtype=np.float32)
+        if not len(normals):
+            normals = np.zeros((1, 3), dtype=np.float32)
+
+        keys = np.column_stack((loop_vertex_indices, loop_uv_indices, loop_normal_indices))
+        unique_keys, first_loops, loop_layout_indices = np.unique(
+            keys, 
+            axis=0, 
+            return_index=True, 
+            return_inverse=True
         )
-        bmesh_object.verts.index_update()
-        bmesh_object.verts.ensure_lookup_table()
-        return bmesh_object
+        # the keys are sorted by vertex, so the first key of each vertex is its primary layout
+        is_primary = np.ones(len(unique_keys), dtype=bool)
+        is_primary[1:] = unique_keys[1:, 0] != unique_keys[:-1, 0]
+        split_count = int(np.count_nonzero(~is_primary))
+        key_to_layout = np.empty(len(unique_keys), dtype=np.int64)
+        key_to_layout[is_primary] = unique_keys[is_primary, 0]
+        key_to_layout[~is_primary] = vertex_count + np.arange(split_count)
+
+        layouts = np.zeros((vertex_count + split_count, 3), dtype=np.int32)
+        layouts[:vertex_count, 0] = np.arange(vertex_count)
+        if not split_normals:
+            layouts[:vertex_count, 2] = np.arange(vertex_count)
+        layouts[key_to_layout] = unique_keys
+        layout_loops = np.zeros(len(layouts), dtype=np.int64)
+        layout_loops[key_to_layout] = first_loops
+
+        return {
+            'positions': positions,
+            'normals': normals,
+            'uvs': uvs,
+            'layouts': layouts,
+            'layout_loops': layout_loops,
+            'face_offsets': face_offsets,
+            'face_layout_indices': key_to_layout[loop_layout_indices.reshape(-1)]
+        }
 
     @staticmethod
-    def get_mesh_faces(bmesh_object: bmesh.types.BMesh) -> list[tuple[int, list[int]]]:
-        bmesh_object.faces.ensure_lookup_table()
-        return [
-            (face.index, [vert.index for vert in face.verts])
-            for face in bmesh_object.faces # type: ignore
-        ]
-    
-    @staticmethod
-    @utilities.preserve_context
     def get_bone_transforms(
             armature_object: bpy.types.Object
         ) -> tuple[
@@ -209,102 +451,53 @@ class DNAExporter:
             list[list[float]],
             list[list[float]]
             ]:
-        indices = []
-        bone_names = []
-        hierarchy = []
-        is_leaf = []
-        translations = []
-        rotations = []
-
-        hierarchy_lookup = {}
-
-        # Change the rotation of the bones since DNA expects Y-up
-        rotation_x = Matrix.Rotation(math.radians(-90), 4, 'X')
-        global_matrix = rotation_x.to_4x4()
-
-        # Switch to edit mode so we can get edit bone data
-        armature_object.hide_set(False)
-        utilities.switch_to_bone_edit_mode(armature_object)
+        # The rest matrices are read from the bones directly, so no mode switch is needed
+        bones = armature_object.data.bones # type: ignore
+        matrices = utilities.get_bone_matrices(armature_object)
+        bone_indices = {bone.name: index for index, bone in enumerate(bones)}
+        parent_indices = np.array([
+            bone_indices[bone.parent.name] if bone.parent else -1 for bone in bones
+        ], dtype=np.int64)
 
         # Remove the extra bones from the list of bones
         ignored_bone_names = [i for i, _ in EXTRA_BONES]
-        edit_bones = [i for i in armature_object.data.edit_bones if i.name not in ignored_bone_names] # type: ignore
-        for index, edit_bone in enumerate(edit_bones): # type: ignore
-            if index == 0:
-                # get translation and rotation of the bone globally
-                translation, rotation, _ = (global_matrix @ edit_bone.matrix).decompose()
-            else:
-                # get translation and rotation of relative to it's parent 
-                local_matrix = edit_bone.parent.matrix.inverted() @ edit_bone.matrix # type: ignore
-                translation, rotation, _ = local_matrix.decompose()
-
-            indices.append(index)
-            bone_names.append(edit_bone.name)
-            is_leaf.append(not edit_bone.children)
-
-            hierarchy_index = index
-            # If the bone has a parent, get the index of the parent bone.
-            # We don't want to include the extra bones as parents.
-            if edit_bone.parent and edit_bone.parent.name not in ignored_bone_names:
-                hierarchy_index = hierarchy_lookup[edit_bone.parent.name]
-            
-            hierarchy.append(hierarchy_index)
-            # Store the index of the bone in the hierarchy lookup so we can find parent indices later
-            hierarchy_lookup[edit_bone.name] = index
-
-            # Convert translation from blender meters to centimeters
-            translations.append([
-                translation.x*SCALE_FACTOR, 
-                translation.y*SCALE_FACTOR,
-                translation.z*SCALE_FACTOR
-            ])
-            # Convert rotation from quaternion to euler
-            euler_rotation = rotation.to_euler('XYZ')
-            # Convert rotation from radians to degrees
-            rotations.append([
-                math.degrees(euler_rotation.x),
-                math.degrees(euler_rotation.y),
-                math.degrees(euler_rotation.z)
-            ])
-
-        return indices, bone_names, hierarchy, is_leaf, translations, rotations
+        exported = np.array([bone.name not in ignored_bone_names for bone in bones], dtype=bool)
+        source_indices = np.flatnonzero(exported)
+        bone_names = [bones[int(index)].name for index in source_indices]
+        is_leaf = (~np.isin(source_indices, parent_indices)).tolist()
+
+        # Get the transforms relative to the parent bone, the first bone is transformed globally.
+        # Change the rotation of the root since DNA expects Y-up
+        local_matrices = matrices[source_indices].copy()
+        bone_parents = parent_indices[source_indices]
+        has_parent = bone_parents >= 0
+        has_parent[0] = False
+        local_matrices[has_parent] = np.linalg.inv(matrices[bone_parents[has_parent]]) @ local_matrices[has_parent]
+        if len(local_matrices):
+            local_matrices[0] = np.array(Matrix.Rotation(math.radians(-90), 4, 'X')) @ local_matrices[0]
+
+        # If the bone has a parent, get the index of the parent bone.
+        # We don't want to include the extra bones as parents.
+        export_indices = np.cumsum(exported) - 1
+        hierarchy = np.arange(len(source_indices))
+        exported_parent = has_parent & exported[np.maximum(bone_parents, 0)]
+        hierarchy[exported_parent] = export_indices[bone_parents[exported_parent]]
+
+        # Remove the scale before getting the rotations
+        rotation_matrices = local_matrices[:, :3, :3]
+        rotation_matrices = rotation_matrices / np.linalg.norm(rotation_matrices, axis=1, keepdims=True)
+        # Convert translation from blender meters to centimeters and rotation from radians to degrees
+        translations = local_matrices[:, :3, 3] * SCALE_FACTOR
+        rotations = np.degrees(utilities.get_rotation_matrices_euler_xyz(rotation_matrices))
 
-    @staticmethod
-    def get_mesh_vertex_positions(
-            bmesh_object: bmesh.types.BMesh, 
-            duplicate_lookup: dict | None = None
-        ) -> tuple[list[int], list[list[float]]]:
-        indices = []
-        positions = []
-        if not duplicate_lookup:
-            duplicate_lookup = {}
-
-        for vert in bmesh_object.verts: # type: ignore
-            positions.append([
-                vert.co.x*SCALE_FACTOR,
-                vert.co.y*SCALE_FACTOR,
-                vert.co.z*SCALE_FACTOR
-            ])
-            # Get the original vertex index if the vertex is a duplicate, otherwise use the current index
-            vertex_index = duplicate_lookup.get(vert.index, vert.index)
-            indices.append(vertex_index)
-        return indices, positions
-
-    @staticmethod
-    def get_mesh_vertex_normals(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
-        indices = []
-        normals = []
-        # TODO: Use split_normals from Mesh instead. Also check if these are stored as triangles?
-        # https://docs.blender.org/api/current/bpy.types.MeshLoopTriangle.html
-
-        for vert in bmesh_object.verts: # type: ignore
-            normals.append([
-                vert.normal.x*SCALE_FACTOR, 
-                vert.normal.y*SCALE_FACTOR, 
-                vert.normal.z*SCALE_FACTOR
-            ])
-            indices.append(vert.index)
-        return indices, normals
+        return (
+            list(range(len(source_indices))), 
+            bone_names, 
+            hierarchy.tolist(), 
+            is_leaf, 
+            translations.tolist(), 
+            rotations.tolist()
+        )
 
     @staticmethod
     def get_mesh_vertex_groups(mesh_object: bpy.types.Object) -> dict[str, list[tuple[int, float]]]:
@@ -329,35 +522,57 @@ class DNAExporter:
 
         return vertex_groups
     
-    @staticmethod
-    def get_mesh_vertex_uvs(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
-        uv_layer = bmesh_object.loops.layers.uv.active
-        if not uv_layer:
-            return [], []
-
-        uv_indices = list(range(len(bmesh_object.verts)))
-        uv_positions = []
+    def get_source_layout_loops(self, source_mesh_index: int, mesh_object: bpy.types.Object) -> np.ndarray | None:
+        """
+        Gets the first loop of each vertex layout of a mesh that is unchanged since import. The importer 
+        creates the faces and their loops in the order of the source DNA faces, so the loops line up with 
+        its face layout indices and the mesh data doesn't have to be read.
+        """
+        face_layout_indices = self.get_source_mesh_geometry(source_mesh_index)['face_layout_indices']
+        if len(face_layout_indices) != len(mesh_object.data.loops): # type: ignore
+            return None
+
+        layout_loops = np.zeros(self._dna_reader.getVertexLayoutCount(source_mesh_index), dtype=np.int64)
+        layout_indices, first_loops = np.unique(face_layout_indices, return_index=True)
+        layout_loops[layout_indices] = first_loops
+        return layout_loops
+
+    def set_dna_vertex_colors(
+            self, 
+            mesh_index: int, 
+            mesh_object: bpy.types.Object, 
+            mesh_data: dict | None = None,
+            source_mesh_index: int | None = None
+        ):
+        """
+        Sets the vertex color of each vertex layout. The layouts are taken from the mesh data of a changed 
+        mesh, or from the source DNA when only the source mesh index of an unchanged mesh is given.
+        """
+        color_attribute = mesh_object.data.color_attributes.active_color # type: ignore
+        if not color_attribute:
+            return
         
-        for face in bmesh_object.faces:
-            for loop in face.loops:
-                uv_indices[loop.vert.index] = loop.index
-                uv_positions.append(list(loop[uv_layer].uv[:]))
+        # byte colors are read as their stored sRGB values, matching what the importer writes back
+        attribute_name = 'color_srgb' if color_attribute.data_type == 'BYTE_COLOR' else 'color'
+        values = np.empty(len(color_attribute.data) * 4, dtype=np.float32)
+        color_attribute.data.foreach_get(attribute_name, values)
+        if mesh_data is None and source_mesh_index is not None:
+            if color_attribute.domain == 'CORNER':
+                indices = self.get_source_layout_loops(source_mesh_index, mesh_object)
+            else:
+                indices = self.get_source_mesh_geometry(source_mesh_index)['layout_positions']
+            if indices is None:
+                mesh_data = self.get_mesh_data(mesh_object)
+
+        if mesh_data is not None:
+            if color_attribute.domain == 'CORNER':
+                indices = mesh_data['layout_loops']
+            else:
+                indices = mesh_data['layouts'][:, 0]
+
+        self._vertex_color_data[mesh_index]['indices'] = indices.tolist()
+        self._vertex_color_data[mesh_index]['values'] = values.reshape(-1, 4).tolist()
 
-        return uv_indices, uv_positions
-    
-    def set_dna_vertex_colors(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        vertex_color_indices = list(range(len(bmesh_object.verts)))
-        vertex_color_values = []
-        color_layer = bmesh_object.loops.layers.color.active
-        if color_layer:
-            for face in bmesh_object.faces:
-                for loop in face.loops:
-                    vertex_color_indices[loop.vert.index] = loop.index
-                    vertex_color_values.append(list(loop[color_layer][:]))
-
-            self._vertex_color_data[mesh_index]['indices'] = vertex_color_indices
-            self._vertex_color_data[mesh_index]['values'] = vertex_color_values
-    
     def set_dna_vertex_positions(
             self,
             mesh_index: int, 
@@ -368,12 +583,16 @@ class DNAExporter:
             positions=positions
         )
     
-    def set_dna_faces(self, mesh_index: int, face_layouts: list[tuple[int, list[int]]]):
-        for face_index, face_vertex_indices in face_layouts:
-            self._dna_writer.setFaceVertexLayoutIndices(
+    def set_dna_faces(self, mesh_index: int, face_offsets: np.ndarray, face_layout_indices: np.ndarray):
+        # the writer has no bulk face api, so convert once and write each face from its offset slice
+        offsets = face_offsets.tolist()
+        layout_indices = face_layout_indices.tolist()
+        set_face_layout_indices = self._dna_writer.setFaceVertexLayoutIndices
+        for face_index, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+            set_face_layout_indices(
                 meshIndex=mesh_index, 
                 faceIndex=face_index, 
-                layoutIndices=face_vertex_indices
+                layoutIndices=layout_indices[start:end]
             )
     
     def set_dna_normals(self, mesh_index: int, normals: list[list[float]]):
@@ -388,36 +607,243 @@ class DNAExporter:
             textureCoordinates=uvs
         )
 
+    @staticmethod
+    def get_mesh_skin_weights(
+            mesh_object: bpy.types.Object,
+            bone_index_lookup: dict[str, int],
+            max_influences: int | None = None,
+            epsilon: float = SKIN_WEIGHT_EPSILON,
+            normalize: bool = True
+        ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gathers the skin weights of the whole mesh in one pass. Vertex groups that are not bones 
+        are ignored, weights at or below the epsilon are dropped, and only the strongest influences 
+        up to the max influences are kept on each vertex.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: The (V + 1) offsets of each vertex into the 
+            joint indices and weights arrays, which are sorted by weight on each vertex.
+        """
+        # map the vertex group indices to joint indices, -1 for groups that are not bones
+        group_joint_indices = np.full(len(mesh_object.vertex_groups) + 1, -1, dtype=np.int64)
+        for vertex_group in mesh_object.vertex_groups:
+            joint_index = bone_index_lookup.get(vertex_group.name)
+            if joint_index is not None:
+                group_joint_indices[vertex_group.index] = joint_index
+
+        counts, group_indices, weights = utilities.get_vertex_group_weight_arrays(mesh_object)
+        vertex_count = len(counts)
+        vertex_indices = np.repeat(np.arange(vertex_count), counts)
+        joint_indices = group_joint_indices[group_indices]
+
+        keep = (joint_indices >= 0) & (weights > epsilon)
+        vertex_indices = vertex_indices[keep]
+        joint_indices = joint_indices[keep]
+        weights = weights[keep]
+
+        # sort the influences of each vertex from strongest to weakest
+        order = np.lexsort((-weights, vertex_indices))
+        vertex_indices = vertex_indices[order]
+        joint_indices = joint_indices[order]
+        weights = weights[order]
+
+        offsets = np.zeros(vertex_count + 1, dtype=np.int64)
+        if max_influences is not None:
+            offsets[1:] = np.cumsum(np.bincount(vertex_indices, minlength=vertex_count))
+            rank = np.arange(len(vertex_indices)) - offsets[vertex_indices]
+            keep = rank < max_influences
+            vertex_indices = vertex_indices[keep]
+            joint_indices = joint_indices[keep]
+            weights = weights[keep]
+
+        if normalize and len(weights):
+            totals = np.bincount(vertex_indices, weights=weights, minlength=vertex_count)
+            weights = weights / totals[vertex_indices]
+
+        offsets[1:] = np.cumsum(np.bincount(vertex_indices, minlength=vertex_count))
+        return offsets, joint_indices.astype(np.int32), weights.astype(np.float32)
+
     def set_dna_vertex_groups(self, mesh_index: int, mesh_object: bpy.types.Object):
         self._dna_writer.clearSkinWeights(meshIndex=mesh_index)
-        # Create a lookup table for the vertex group names by their index
-        vertex_group_lookup = {vertex_group.index: vertex_group.name for vertex_group in mesh_object.vertex_groups}
 
-        # Loop through the vertices and get the vertex group names and the vertex and weights
-        for vertex in mesh_object.data.vertices: # type: ignore
-            vertex_group_names = [vertex_group_lookup.get(group.group, '') for group in vertex.groups]
-            bone_indices = []
-            weights = []
+        max_influences = self._max_influences
+        if max_influences is None and mesh_index < self._dna_reader.getMeshCount():
+            max_influences = self._dna_reader.getMaximumInfluencePerVertex(mesh_index) or None
 
-            for vertex_group_name in vertex_group_names:
-                bone_index = self._bone_index_lookup.get(vertex_group_name)
-                vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-                if bone_index and vertex_group:    
-                    weight = vertex_group.weight(vertex.index)
-                    if weight > 0:
-                        bone_indices.append(bone_index)
-                        weights.append(weight)
+        offsets, joint_indices, weights = self.get_mesh_skin_weights(
+            mesh_object=mesh_object,
+            bone_index_lookup=self._bone_index_lookup,
+            max_influences=max_influences,
+            epsilon=self._weight_epsilon
+        )
+        self.set_dna_skin_weights(mesh_index, offsets, joint_indices, weights)
 
+    def set_dna_skin_weights(
+            self, 
+            mesh_index: int, 
+            offsets: np.ndarray, 
+            joint_indices: np.ndarray, 
+            weights: np.ndarray
+        ):
+        self._dna_writer.setMaximumInfluencePerVertex(
+            meshIndex=mesh_index, 
+            maxInfluenceCount=int(np.diff(offsets).max(initial=0))
+        )
+
+        # the writer only takes the skin weights one vertex at a time
+        offsets = offsets.tolist()
+        joint_indices = joint_indices.tolist()
+        weights = weights.tolist()
+        for vertex_index in range(len(offsets) - 1):
+            start, end = offsets[vertex_index], offsets[vertex_index + 1]
             self._dna_writer.setSkinWeightsJointIndices(
                 meshIndex=mesh_index, 
-                vertexIndex=vertex.index, 
-                jointIndices=bone_indices
+                vertexIndex=vertex_index, 
+                jointIndices=joint_indices[start:end]
             )
             self._dna_writer.setSkinWeightsValues(
                 meshIndex=mesh_index, 
-                vertexIndex=vertex.index,
-                weights=weights
-            )        
+                vertexIndex=vertex_index,
+                weights=weights[start:end]
+            )
+
+    def get_mesh_blend_shapes(
+            self, 
+            mesh_object: bpy.types.Object, 
+            mesh_name: str
+        ) -> tuple[list[int], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets the blend shape targets of the mesh from its shape keys. Shape keys are matched to the DNA 
+        blend shape channels by name, the same way they are named on import.
+
+        Returns:
+            tuple[list[int], np.ndarray, np.ndarray, np.ndarray]: The channel index of each target, the 
+            offsets of each target into the vertex indices, the vertex indices and the deltas.
+        """
+        if self._blend_shape_channel_lookup is None:
+            self._blend_shape_channel_lookup = {
+                self._dna_reader.getBlendShapeChannelName(index): index
+                for index in range(self._dna_reader.getBlendShapeChannelCount())
+            }
+
+        channel_indices = []
+        key_block_names = []
+        shape_keys = mesh_object.data.shape_keys # type: ignore
+        if shape_keys:
+            prefix = f'{mesh_name}__'
+            for key_block in shape_keys.key_blocks:
+                if key_block == shape_keys.reference_key or not key_block.name.startswith(prefix):
+                    continue
+                channel_index = self._blend_shape_channel_lookup.get(key_block.name[len(prefix):])
+                if channel_index is None:
+                    logger.warning(f'Shape key "{key_block.name}" has no matching blend shape channel in the DNA. Skipping export.')
+                    continue
+                channel_indices.append(channel_index)
+                key_block_names.append(key_block.name)
+
+        if not key_block_names:
+            return [], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty((0, 3), dtype=np.float32)
+
+        # the inverse of the transform create_shape_key imports the deltas with
+        matrix = Matrix.Rotation(math.radians(-90), 3, 'X').inverted() * (1 / self._linear_modifier)
+        offsets, vertex_indices, deltas = utilities.get_shape_key_deltas(
+            mesh_object=mesh_object,
+            key_block_names=key_block_names,
+            matrix=matrix,
+            threshold=self._delta_epsilon
+        )
+        return channel_indices, offsets, vertex_indices, deltas
+
+    def can_export_blend_shapes(self, mesh_object: bpy.types.Object, source_mesh_index: int | None) -> bool:
+        """
+        Whether the shape keys of the mesh can be written as blend shape targets. Neutral shape keys 
+        have no deltas, and shape keys on a mesh with a different vertex count than the source DNA 
+        can't be matched to its vertices.
+        """
+        if not self._include_blend_shapes or self._instance.generate_neutral_shapes:
+            return False
+        if source_mesh_index is None:
+            return False
+        return self._dna_reader.getVertexPositionCount(source_mesh_index) == len(mesh_object.data.vertices) # type: ignore
+
+    def set_dna_blend_shapes(
+            self, 
+            mesh_index: int, 
+            mesh_object: bpy.types.Object, 
+            mesh_name: str,
+            cleared: bool = False
+        ) -> bool:
+        """
+        Writes the blend shape targets of the mesh. The targets of the source DNA are kept, and the 
+        ones that have a matching shape key are replaced by its deltas.
+
+        Args:
+            mesh_index (int): The index of the mesh in the writer.
+            mesh_object (bpy.types.Object): The mesh object.
+            mesh_name (str): The name of the mesh in the DNA.
+            cleared (bool, optional): Whether the targets of the mesh were already cleared from the 
+                writer, so the source targets need to be written again. Defaults to False.
+
+        Returns:
+            bool: Whether any targets were written.
+        """
+        source_mesh_index = self._source_mesh_indices.get(mesh_name)
+        source_vertex_count = None
+        if source_mesh_index is not None:
+            source_vertex_count = self._dna_reader.getVertexPositionCount(source_mesh_index)
+        if source_vertex_count != len(mesh_object.data.vertices): # type: ignore
+            # the source targets point at vertices that no longer match the mesh
+            if not cleared:
+                self._dna_writer.clearBlendShapeTargets(meshIndex=mesh_index)
+            if source_mesh_index is not None and self._dna_reader.getBlendShapeTargetCount(source_mesh_index):
+                logger.warning(
+                    f'"{mesh_object.name}" has {len(mesh_object.data.vertices)} vertices but the DNA has ' # type: ignore
+                    f'{source_vertex_count}. Its blend shapes were not exported.'
+                )
+            return False
+
+        channel_indices, offsets, vertex_indices, deltas = [], np.zeros(1, dtype=np.int64), None, None
+        if self.can_export_blend_shapes(mesh_object, source_mesh_index):
+            channel_indices, offsets, vertex_indices, deltas = self.get_mesh_blend_shapes(mesh_object, mesh_name)
+        # the writer already has the source targets, so there is nothing to replace them with
+        if not channel_indices and not cleared:
+            return False
+
+        # start from the source targets, so targets without a shape key are kept
+        geometry = self.get_source_mesh_geometry(source_mesh_index) # type: ignore
+        source_offsets = geometry['target_offsets'].tolist()
+        targets = {}
+        for target_index, channel_index in enumerate(geometry['target_channel_indices'].tolist()):
+            start, end = source_offsets[target_index], source_offsets[target_index + 1]
+            targets[channel_index] = (
+                geometry['target_vertex_indices'][start:end], 
+                geometry['target_deltas'][start:end]
+            )
+        offsets = offsets.tolist()
+        for index, channel_index in enumerate(channel_indices):
+            start, end = offsets[index], offsets[index + 1]
+            targets[channel_index] = (vertex_indices[start:end], deltas[start:end]) # type: ignore
+
+        if channel_indices:
+            logger.info(f'Exporting {len(channel_indices)} blend shapes from "{mesh_object.name}"...')
+        self._dna_writer.clearBlendShapeTargets(meshIndex=mesh_index)
+        for target_index, (channel_index, (target_vertex_indices, target_deltas)) in enumerate(targets.items()):
+            self._dna_writer.setBlendShapeChannelIndex(
+                meshIndex=mesh_index,
+                blendShapeTargetIndex=target_index,
+                blendShapeChannelIndex=channel_index
+            )
+            self._dna_writer.setBlendShapeTargetVertexIndices(
+                meshIndex=mesh_index,
+                blendShapeTargetIndex=target_index,
+                vertexIndices=target_vertex_indices.tolist()
+            )
+            self._dna_writer.setBlendShapeTargetDeltas(
+                meshIndex=mesh_index,
+                blendShapeTargetIndex=target_index,
+                deltas=target_deltas.tolist()
+            )
+        return bool(targets)
 
     def set_dna_bones(
             self, 
@@ -441,7 +867,15 @@ class DNAExporter:
         # TODO: Implement bone rotation export with correct bone space rotation. For now, just set using the original values
         self._dna_writer.setNeutralJointRotations([[x, y, z] for x, y, z in zip(dna_x_rotations, dna_y_rotations, dna_z_rotations)])
     
-    def save_images(self):
+    def save_images(self) -> utilities.FileSyncReport:
+        """
+        Saves the images to the maps folder. Images that are unmodified in Blender are copied from 
+        their source files in parallel and skipped when the destination is already unchanged. Only
+        images that were edited, or need converting to another format, are re-encoded by Blender.
+        """
+        report = utilities.FileSyncReport()
+        file_paths = []
+        packed_files = []
         for image, file_name in self._images:
             new_image_path = self._target_dna_file.parent / 'maps' / file_name
             os.makedirs(new_image_path.parent, exist_ok=True)
@@ -449,12 +883,38 @@ class DNAExporter:
                 logger.warning(f"Image {image.name} is not packed or saved. Skipping export.")
                 continue
 
+            if not image.is_dirty:
+                source_path = Path(bpy.path.abspath(image.filepath)) if image.filepath else None
+                if image.packed_file:
+                    if source_path and source_path.suffix.lower() == new_image_path.suffix.lower():
+                        packed_files.append((image.packed_file.data, new_image_path))
+                        continue
+                elif source_path and source_path.exists() and source_path.suffix.lower() == new_image_path.suffix.lower():
+                    file_paths.append((source_path, new_image_path))
+                    continue
+
             try:
                 image.save(filepath=str(new_image_path))
             except Exception:
                 image.save_render(filepath=str(new_image_path))
+            report.add('written', new_image_path.stat().st_size)
             logger.info(f"Image {image.name} exported successfully to: {new_image_path}")
 
+        # the unmodified images are written in parallel
+        with ThreadPoolExecutor(max_workers=FILE_COPY_MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(utilities.write_file, data, file_path, report) 
+                for data, file_path in packed_files
+            ] + [
+                executor.submit(utilities.sync_file, source_path, file_path, False, report)
+                for source_path, file_path in file_paths
+            ]
+            for future in futures:
+                future.result()
+
+        logger.info(f'Images exported to "{self._target_dna_file.parent / "maps"}": {report.get_summary()}')
+        return report
+
     def save_vertex_colors(self):
         if self._include_vertex_colors:
             vertex_colors_file = self._target_dna_file.parent / f'{self._prefix}_vertex_colors.json'
@@ -462,11 +922,117 @@ class DNAExporter:
                 json.dump(self._vertex_color_data, f)
                 logger.info(f'Vertex colors exported successfully to: "{vertex_colors_file}"')
 
-    def run(self) -> tuple[bool, str, str, Callable| None]:
-        self.initialize_scene_data()
-        valid, title, message, fix = self.validate()
-        if not valid:
-            return False, title, message, fix
+    def can_update_in_place(self, bone_names: list[str]) -> bool:
+        """
+        Whether the writer can keep the data copied from the source DNA and only update what changed. This 
+        is possible when the joints and the meshes in each exported LOD are the same as in the source DNA.
+        """
+        source_bone_names = [
+            self._dna_reader.getJointName(index) for index in range(self._dna_reader.getJointCount())
+        ]
+        if bone_names != source_bone_names:
+            return False
+        if not self._include_meshes:
+            return True
+
+        for lod_index, mesh_objects in self._export_lods.items():
+            if lod_index >= self._dna_reader.getLODCount():
+                return False
+            source_mesh_names = {
+                self._dna_reader.getMeshName(index) for index in self._dna_reader.getMeshIndicesForLOD(lod_index)
+            }
+            mesh_names = {
+                mesh_object.name.replace(f'{self._prefix}_', '') for mesh_object, _ in mesh_objects
+            }
+            if mesh_names != source_mesh_names:
+                return False
+        return True
+
+    def set_dna_mesh(self, mesh_index: int, mesh_object: bpy.types.Object):
+        # The layouts are split along UV seams so that we have all the UV indices needed for each vertex index
+        mesh_data = self.get_mesh_data(mesh_object)
+        
+        # Set the vertex color data so it can be saved to JSON later
+        if self._include_vertex_colors:
+            self.set_dna_vertex_colors(mesh_index, mesh_object, mesh_data)
+
+        # Set the vertex layout so DNA knows how to read the vertex, 
+        # normal, and uv data from their respective arrays
+        self._dna_writer.setVertexLayouts(
+            meshIndex=mesh_index, 
+            layouts=mesh_data['layouts'].tolist()
+        )
+
+        self.set_dna_vertex_positions(mesh_index, mesh_data['positions'].tolist())
+        self.set_dna_faces(mesh_index, mesh_data['face_offsets'], mesh_data['face_layout_indices'])
+        self.set_dna_normals(mesh_index, mesh_data['normals'].tolist())
+        self.set_dna_uvs(mesh_index, mesh_data['uvs'].tolist())
+        self.set_dna_vertex_groups(mesh_index, mesh_object)
+
+    def update_dna_data(
+            self,
+            bone_indices: list[int],
+            bone_names: list[str],
+            hierarchy: list[int],
+            translations: list[list[float]],
+            rotations: list[list[float]]
+        ):
+        """
+        Updates only the bones and meshes that changed. Everything else, including the blend 
+        shapes of unchanged meshes, stays as it was copied from the source DNA.
+        """
+        # the skin weights of changed meshes need the joint indices, even when the bones are not written
+        self._bone_index_lookup = dict(zip(bone_names, bone_indices))
+        if not self.is_unchanged(self._rig_object):
+            self.set_dna_bones(
+                indices=bone_indices,
+                bone_names=bone_names,
+                hierarchy=hierarchy,
+                translations=translations,
+                rotations=rotations
+            )
+        if not self._include_meshes:
+            return
+
+        self._vertex_color_data = [{
+            'indices': [],
+            'values': [],
+        } for _ in range(self._dna_reader.getMeshCount())]
+
+        for lod_index, mesh_objects in self._export_lods.items():
+            # the meshes in the other LODs are kept as they are in the source DNA
+            if self._lods is not None and lod_index not in self._lods:
+                continue
+
+            for mesh_object, _ in mesh_objects:
+                real_name = mesh_object.name.replace(f'{self._prefix}_', '')
+                mesh_index = self._source_mesh_indices[real_name]
+                if self.is_unchanged(mesh_object):
+                    if self._include_vertex_colors:
+                        self.set_dna_vertex_colors(mesh_index, mesh_object, source_mesh_index=mesh_index)
+                    # the blend shapes are only replaced when the mesh has shape keys
+                    self.set_dna_blend_shapes(mesh_index, mesh_object, real_name)
+                    continue
+
+                logger.info(f'Exporting mesh: "{mesh_object.name}" to DNA as "{real_name}"...')
+                self._dna_writer.clearFaceVertexLayoutIndices(meshIndex=mesh_index)
+                self._dna_writer.clearSkinWeights(meshIndex=mesh_index)
+                self.set_dna_mesh(mesh_index, mesh_object)
+                self.set_dna_blend_shapes(mesh_index, mesh_object, real_name)
+
+    def rebuild_dna_data(
+            self,
+            bone_indices: list[int],
+            bone_names: list[str],
+            hierarchy: list[int],
+            translations: list[list[float]],
+            rotations: list[list[float]]
+        ):
+        """
+        Clears the joints and meshes and writes them again from the scene.
+        """
+        if self._lods is not None:
+            logger.warning('The joints or meshes differ from the source DNA, so all LODs will be exported.')
 
         # Clear the mesh data
         self._dna_writer.clearMeshNames()
@@ -484,10 +1050,6 @@ class DNAExporter:
         # Default dna has 8 lods
         # self._dna_writer.setLODCount(len(self._export_lods.keys()))
 
-        bone_indices, bone_names, hierarchy, is_leaf, translations, rotations = self.get_bone_transforms(
-            armature_object=self._rig_object
-        )
-
         # Set the bone data
         self.set_dna_bones(
             indices=bone_indices,
@@ -496,6 +1058,10 @@ class DNAExporter:
             translations=translations,
             rotations=rotations
         )
+        joint_remap = np.array([
+            self._bone_index_lookup.get(self._dna_reader.getJointName(index), -1)
+            for index in range(self._dna_reader.getJointCount())
+        ], dtype=np.int64)
 
         for lod_index, mesh_objects in self._export_lods.items():
             # Set the joint indices
@@ -529,45 +1095,53 @@ class DNAExporter:
 
                 # Set the mesh name
                 self._dna_writer.setMeshName(index=mesh_index, name=real_name)
-                bmesh_object = self.get_bmesh(mesh_object)
-                # Split the mesh along UV islands so that we have all the UV loop indices needed for each vertex index
-                split_to_original_vert_lookup = utilities.split_mesh_along_uv_islands(bmesh_object=bmesh_object)
 
-                vertex_indices, vertex_positions = self.get_mesh_vertex_positions(
-                    bmesh_object=bmesh_object,
-                    duplicate_lookup=split_to_original_vert_lookup
-                )
-                normal_indices, normals = self.get_mesh_vertex_normals(bmesh_object=bmesh_object)
-                uv_indices, uvs = self.get_mesh_vertex_uvs(bmesh_object=bmesh_object)
-                faces = self.get_mesh_faces(bmesh_object=bmesh_object)
-                
-                # Set the vertex color data so it can be saved to JSON later
-                if self._include_vertex_colors:
-                    self.set_dna_vertex_colors(mesh_index=mesh_index, bmesh_object=bmesh_object)
-
-                # Set the vertex layout so DNA knows how to read the vertex, 
-                # normal, and uv data from their respective arrays
-                self._dna_writer.setVertexLayouts(
-                    meshIndex=mesh_index, 
-                    layouts=[list(item) for item in zip(vertex_indices, uv_indices, normal_indices)]
-                )
+                # meshes that are unchanged since import are copied from the source DNA
+                source_mesh_index = self._source_mesh_indices.get(real_name)
+                if source_mesh_index is not None and self.is_unchanged(mesh_object):
+                    logger.info(f'Mesh "{mesh_object.name}" is unchanged, copying it from the source DNA...')
+                    self.copy_source_mesh(source_mesh_index, mesh_index, joint_remap)
+                    if self._include_vertex_colors:
+                        self.set_dna_vertex_colors(mesh_index, mesh_object, source_mesh_index=source_mesh_index)
+                    self.set_dna_blend_shapes(mesh_index, mesh_object, real_name, cleared=True)
+                    continue
+
+                self.set_dna_mesh(mesh_index, mesh_object)
+                self.set_dna_blend_shapes(mesh_index, mesh_object, real_name, cleared=True)
 
-                self.set_dna_vertex_positions(mesh_index, vertex_positions)
-                self.set_dna_faces(mesh_index, faces)
-                self.set_dna_normals(mesh_index, normals)
-                self.set_dna_uvs(mesh_index, uvs)
-                self.set_dna_vertex_groups(mesh_index, mesh_object)
+    def run(self, background: bool = False) -> tuple[bool, str, str, Callable| None]:
+        try:
+            return self._run(background=background)
+        except BaseException:
+            self.discard_temp_dna_file()
+            raise
 
-                # Now free the BMesh from memory without applying the changes back to the mesh
-                bmesh_object.free()
+    def _run(self, background: bool = False) -> tuple[bool, str, str, Callable| None]:
+        self.initialize_scene_data()
+        valid, title, message, fix = self.validate()
+        if not valid:
+            return False, title, message, fix
+
+        # bones that are unchanged since import are copied from the source DNA
+        if self.is_unchanged(self._rig_object):
+            logger.info('Bones are unchanged, copying them from the source DNA...')
+            bone_indices, bone_names, hierarchy, translations, rotations = self.get_source_bone_transforms()
+        else:
+            bone_indices, bone_names, hierarchy, _, translations, rotations = self.get_bone_transforms(
+                armature_object=self._rig_object
+            )
+
+        bone_data = (bone_indices, bone_names, hierarchy, translations, rotations)
+        if self.can_update_in_place(bone_names):
+            logger.info('Updating the changed joints and meshes in the source DNA...')
+            self.update_dna_data(*bone_data)
+        else:
+            self.rebuild_dna_data(*bone_data)
         
-        self._dna_writer.write()
-        if not riglogic.Status.isOk():
-            status = riglogic.Status.get()
-            raise RuntimeError(f"Error saving DNA: {status.message}")
-        logger.info(f'DNA exported successfully to: "{self._target_dna_file}"')
+        self.write_dna(background=background)
 
+        # the images are saved on the main thread while the DNA is written
         self.save_images()
         self.save_vertex_colors()
 
-        return True, "Success", "Export successful.", None
\ No newline at end of file
+        return True, "Success", "Export successful.", None
@@ -3,9 +3,11 @@ import math
 import bmesh
 import json
 import logging
+import numpy as np
 from pathlib import Path
-from mathutils import Vector, Matrix, Euler
+from mathutils import Vector, Matrix
 from .misc import get_dna_reader
+from .cache import GeometryCache, MeshGeometry, get_dna_content_hash, get_geometry_cache, get_mesh_geometry
 from ..properties import MetahumanDnaImportProperties
 from .. import utilities
 from ..rig_logic import RigLogicInstance
@@ -31,36 +33,46 @@ class DNAImporter:
         import_properties: MetahumanDnaImportProperties,
         linear_modifier: float,
         create_extra_bones: bool = True,
-        reader: 'riglogic.BinaryStreamReader | None' = None
+        reader: 'riglogic.BinaryStreamReader | None' = None,
+        profiler: 'utilities.PhaseProfiler | None' = None
     ):
         self.rig_object = None
+        self.profiler = profiler or utilities.PhaseProfiler(name=instance.name)
 
         self._instance = instance
         self._import_properties = import_properties
         self._linear_modifier = linear_modifier
 
         self._source_dna_file = Path(bpy.path.abspath(instance.dna_file_path))
+        self._source_dna_hash: str | None = None
         # Determine the file format of the DNA file
         file_format = 'binary' if self._source_dna_file.suffix.lower() == ".dna" else 'json'
         
         # Open a read to a DNA file if an existing reader is not provided
         if not reader:
-            self._dna_reader = get_dna_reader(
-                file_path=self._source_dna_file, 
-                file_format=file_format
-            )
+            with self.profiler.span('dna_read'):
+                self._dna_reader = get_dna_reader(
+                    file_path=self._source_dna_file, 
+                    file_format=file_format
+                )
         else:
             self._dna_reader = reader
 
         self._create_extra_bones = create_extra_bones
         self._prefix = self._instance.name
         self._import_lods = {}
+        self._deferred_lods = []
         self._index_to_vert = {}
         self._index_to_face = {}
         self._vert_index_to_dna_index = {}
         self._face_index_to_dna_index = {}
         self._vertex_color_data = []
         self._default_vertex_color_layout = False
+        # neutral joint data is cached for the lifetime of the reader
+        self._joint_data = {}
+        # decoded mesh geometry is read from the on-disk cache when it is enabled
+        self._geometry_cache = None
+        self._mesh_geometry = {}
 
     def _get_lod_settings(self):
         return [
@@ -88,23 +100,30 @@ class DNAImporter:
         else:
             materials.append(material)
 
+    def get_lod_mesh_data(self, lod_index: int) -> dict[str, dict]:
+        lod_data = {}
+        for mesh_index in self._dna_reader.getMeshIndicesForLOD(lod_index):
+            vertex_indices = self._dna_reader.getVertexLayoutPositionIndices(
+                mesh_index
+            )
+            mesh_name = self._dna_reader.getMeshName(mesh_index)
+            lod_data[mesh_name] = {
+                "mesh_index": mesh_index,
+                "vertex_indices": vertex_indices,
+                "vertex_count": len(vertex_indices),
+                "shape_key_count": self._dna_reader.getBlendShapeTargetCount(
+                    mesh_index
+                )
+            }
+        return lod_data
+
     def initialize_dna_data(self):
+        defer_lods = getattr(self._import_properties, 'defer_unselected_lods', False)
         for lod_index, should_import in self._get_lod_settings():
             if should_import:
-                self._import_lods[lod_index] = {}
-                for mesh_index in self._dna_reader.getMeshIndicesForLOD(lod_index):
-                    vertex_indices = self._dna_reader.getVertexLayoutPositionIndices(
-                        mesh_index
-                    )
-                    mesh_name = self._dna_reader.getMeshName(mesh_index)
-                    self._import_lods[lod_index][mesh_name] = {
-                        "mesh_index": mesh_index,
-                        "vertex_indices": vertex_indices,
-                        "vertex_count": len(vertex_indices),
-                        "shape_key_count": self._dna_reader.getBlendShapeTargetCount(
-                            mesh_index
-                        )
-                    }
+                self._import_lods[lod_index] = self.get_lod_mesh_data(lod_index)
+            elif defer_lods and lod_index < self._dna_reader.getLODCount():
+                self._deferred_lods.append(lod_index)
 
     def get_dna_faces(self, mesh_index: int) -> list[list[int]]:
         return [
@@ -224,72 +243,117 @@ class DNAImporter:
 
         return shape_key
     
-    def set_custom_bone_shape(self, pose_bone: bpy.types.PoseBone):
+    def set_custom_bone_shape(
+            self, 
+            pose_bone: bpy.types.PoseBone, 
+            bone_shape: bpy.types.Object | None = None
+        ):
         if pose_bone.rotation_mode != 'XYZ':
             pose_bone.rotation_mode = 'XYZ'
-        pose_bone.custom_shape = utilities.get_bone_shape()
+        pose_bone.custom_shape = bone_shape or utilities.get_bone_shape()
         pose_bone.custom_shape_scale_xyz = CUSTOM_BONE_SHAPE_SCALE
 
-    def set_vertex_groups(self, mesh_index: int, mesh_object: bpy.types.Object):
-        for vertex in mesh_object.data.vertices: # type: ignore
-            vertex_bone_indices = self._dna_reader.getSkinWeightsJointIndices(mesh_index, vertex.index)
-            vertex_weights = self._dna_reader.getSkinWeightsValues(mesh_index, vertex.index)
+    @property
+    def geometry_cache(self) -> GeometryCache | None:
+        if self._geometry_cache is None:
+            with self.profiler.span('geometry_cache'):
+                # the geometry is decoded from the reader and added to the cache as it is used
+                self._geometry_cache = get_geometry_cache(
+                    dna_file_path=self._source_dna_file,
+                    reader=self._dna_reader
+                ) or False
+        return self._geometry_cache or None
+
+    def get_source_dna_hash(self) -> str:
+        """
+        Gets the content hash of the source DNA file, which the fingerprints are recorded against.
+        """
+        if self._source_dna_hash is None:
+            self._source_dna_hash = get_dna_content_hash(self._source_dna_file) if self._source_dna_file.is_file() else ''
+        return self._source_dna_hash
+
+    def get_mesh_geometry(self, mesh_index: int) -> MeshGeometry:
+        """
+        Gets the geometry arrays of a mesh. These are in DNA units and are read from the geometry 
+        cache if it is enabled, otherwise they are decoded from the reader as they are accessed.
+        """
+        geometry = self._mesh_geometry.get(mesh_index)
+        if geometry is None:
+            if self.geometry_cache:
+                geometry = self.geometry_cache.get_mesh(mesh_index)
+            else:
+                geometry = get_mesh_geometry(self._dna_reader, mesh_index)
+            self._mesh_geometry[mesh_index] = geometry
+        return geometry
 
-            for bone_index, weight in zip(vertex_bone_indices, vertex_weights):
-                vertex_group_name = self._dna_reader.getJointName(bone_index)
-                vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-                if not vertex_group:
-                    vertex_group = mesh_object.vertex_groups.new(name=vertex_group_name)
+    def set_vertex_groups(self, mesh_index: int, mesh_object: bpy.types.Object):
+        geometry = self.get_mesh_geometry(mesh_index)
+        vertex_count = len(mesh_object.data.vertices) # type: ignore
+        skin_offsets = geometry['skin_offsets'][:vertex_count + 1]
+        end = int(skin_offsets[-1])
+        vertex_indices = np.repeat(np.arange(len(skin_offsets) - 1), np.diff(skin_offsets))
+        joint_indices = geometry['skin_joint_indices'][:end]
+        weights = geometry['skin_weights'][:end]
+
+        # group the influences by joint, so each vertex group is filled with a few bulk adds
+        order = np.argsort(joint_indices, kind='stable')
+        group_joint_indices, starts = np.unique(joint_indices[order], return_index=True)
+        # create the vertex groups in the order their joints are first referenced
+        for group_index in np.argsort(order[starts], kind='stable').tolist():
+            start = starts[group_index]
+            stop = starts[group_index + 1] if group_index + 1 < len(starts) else len(order)
+            influences = order[start:stop]
+
+            vertex_group_name = self.joint_names[group_joint_indices[group_index]]
+            vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
+            if not vertex_group:
+                vertex_group = mesh_object.vertex_groups.new(name=vertex_group_name)
+
+            unique_weights, inverse = np.unique(weights[influences], return_inverse=True)
+            group_vertex_indices = vertex_indices[influences]
+            for weight_index, weight in enumerate(unique_weights.tolist()):
                 vertex_group.add(
-                    index=[vertex.index], 
+                    index=group_vertex_indices[inverse == weight_index].tolist(), 
                     weight=weight, 
                     type='REPLACE'
                 )
 
+        # the weights are written without a dependency graph update, so the cached index is dropped here
+        utilities.clear_vertex_group_indices(mesh_object.name)
+
     def set_mesh_normals(self, mesh_index: int, mesh: bpy.types.Mesh):
-        x_values = self._dna_reader.getVertexNormalXs(mesh_index)
-        y_values = self._dna_reader.getVertexNormalYs(mesh_index)
-        z_values = self._dna_reader.getVertexNormalZs(mesh_index)
-        normal_indices = self._dna_reader.getVertexLayoutNormalIndices(mesh_index)        
-        mesh.normals_split_custom_set_from_vertices([
-            Vector((
-                x_values[normal_indices[index]]*self._linear_modifier, 
-                y_values[normal_indices[index]]*self._linear_modifier, 
-                z_values[normal_indices[index]]*self._linear_modifier
-            )).normalized() for index in self._index_to_vert.keys()])  # type: ignore
+        geometry = self.get_mesh_geometry(mesh_index)
+        normals = geometry['normals'][geometry['layout_normals'][list(self._index_to_vert.keys())]]
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        mesh.normals_split_custom_set_from_vertices(normals.tolist())  # type: ignore
 
 
     def set_mesh_vertex_positions(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        x_values = self._dna_reader.getVertexPositionXs(mesh_index)
-        y_values = self._dna_reader.getVertexPositionYs(mesh_index)
-        z_values = self._dna_reader.getVertexPositionZs(mesh_index)
+        geometry = self.get_mesh_geometry(mesh_index)
+        positions = (geometry['positions'] * self._linear_modifier).tolist()
 
         self._index_to_vert.clear()
-        for dna_index in self._dna_reader.getVertexLayoutPositionIndices(mesh_index):
-            if not self._index_to_vert.get(dna_index):
-                vert = bmesh_object.verts.new([
-                    x_values[dna_index]*self._linear_modifier, 
-                    y_values[dna_index]*self._linear_modifier, 
-                    z_values[dna_index]*self._linear_modifier
-                ])
-                self._index_to_vert[dna_index] = vert
+        # the unique indices are sorted, so the vertices are created in the same order as the DNA file
+        for dna_index in np.unique(geometry['layout_positions']).tolist():
+            self._index_to_vert[dna_index] = bmesh_object.verts.new(positions[dna_index])
 
         bmesh_object.verts.index_update()
         # flip the dictionary so that we can get the dna index from the vertex index
         self._vert_index_to_dna_index = {vert.index: index for index, vert in self._index_to_vert.items()}
-        # sort the vertices so that they are in the same order as the DNA file
-        bmesh_object.verts.sort(key=lambda v: self._vert_index_to_dna_index[v.index])
         bmesh_object.verts.ensure_lookup_table()
 
 
     def set_mesh_face_layout(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        vertex_indices = self._dna_reader.getVertexLayoutPositionIndices(mesh_index)
+        geometry = self.get_mesh_geometry(mesh_index)
+        face_offsets = geometry['face_offsets'].tolist()
+        face_vertex_indices = geometry['layout_positions'][geometry['face_layout_indices']].tolist()
+        verts = bmesh_object.verts
         self._index_to_face.clear()
-        for index in range(self._dna_reader.getFaceCount(mesh_index)):
+        for index in range(len(face_offsets) - 1):
             try:
                 face = bmesh_object.faces.new([
-                    bmesh_object.verts[vertex_indices[i]]
-                    for i in self._dna_reader.getFaceVertexLayoutIndices(mesh_index, index)
+                    verts[i] for i in face_vertex_indices[face_offsets[index]:face_offsets[index + 1]]
                 ])
                 self._index_to_face[index] = face
             except (RuntimeError, Exception):
@@ -316,19 +380,19 @@ class DNAImporter:
         mesh.uv_layers.active = uv_layer
 
     def set_mesh_uvs(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
-        u_values = self._dna_reader.getVertexTextureCoordinateUs(mesh_index)
-        v_values = self._dna_reader.getVertexTextureCoordinateVs(mesh_index)
-        uv_indices = self._dna_reader.getVertexLayoutTextureCoordinateIndices(mesh_index)
+        geometry = self.get_mesh_geometry(mesh_index)
+        face_offsets = geometry['face_offsets'].tolist()
+        face_layout_indices = geometry['face_layout_indices'].tolist()
+        # the uv of each vertex layout index
+        layout_uvs = geometry['uvs'][geometry['layout_uvs']].tolist()
         uv_layer = bmesh_object.loops.layers.uv.active
 
         for face in bmesh_object.faces:
             face_vert_indices = [v.index for v in face.verts]
-            dna_face_vert_indices = self._dna_reader.getFaceVertexLayoutIndices(mesh_index, face.index)
+            dna_face_vert_indices = face_layout_indices[face_offsets[face.index]:face_offsets[face.index + 1]]
             lookup = dict(zip(face_vert_indices, dna_face_vert_indices))
             for loop in face.loops:
-                uv_index = uv_indices[lookup[loop.vert.index]]
-                loop[uv_layer].uv.x = u_values[uv_index]
-                loop[uv_layer].uv.y = v_values[uv_index]
+                loop[uv_layer].uv = layout_uvs[lookup[loop.vert.index]]
         
     def set_vertex_colors(self, mesh_index: int, bmesh_object: bmesh.types.BMesh):
         vertex_color_indices, vertex_color_values = self.get_dna_vertex_colors(mesh_index)
@@ -385,16 +449,21 @@ class DNAImporter:
         # fill it in from a Mesh
         bmesh_object.from_mesh(mesh=mesh)
 
-        self.set_mesh_vertex_positions(mesh_index, bmesh_object)
-        self.set_mesh_face_layout(mesh_index, bmesh_object)
-        self.set_smooth(bmesh_object)
+        tags = {'lod': lod_index, 'mesh': mesh_name}
+        with self.profiler.span('positions', **tags):
+            self.set_mesh_vertex_positions(mesh_index, bmesh_object)
+        with self.profiler.span('faces', **tags):
+            self.set_mesh_face_layout(mesh_index, bmesh_object)
+            self.set_smooth(bmesh_object)
 
         # Add vertex colors
         if self._import_properties.import_vertex_colors:
-            self.set_vertex_colors(mesh_index, bmesh_object)
+            with self.profiler.span('vertex_colors', **tags):
+                self.set_vertex_colors(mesh_index, bmesh_object)
         
         # Add UVs
-        self.set_mesh_uvs(mesh_index, bmesh_object)
+        with self.profiler.span('uvs', **tags):
+            self.set_mesh_uvs(mesh_index, bmesh_object)
 
         # send the data back to the mesh and free the BMesh from memory
         bmesh_object.to_mesh(mesh)
@@ -403,13 +472,15 @@ class DNAImporter:
         # Add custom split normals
         # Todo: Implement the custom split normals import. Currently, not correctly implemented
         if self._import_properties.import_normals:
-            self.set_mesh_normals(mesh_index, mesh)
+            with self.profiler.span('normals', **tags):
+                self.set_mesh_normals(mesh_index, mesh)
 
         if self._import_properties.import_vertex_groups:
-            # Create the vertex groups
-            self.set_vertex_groups(mesh_index, mesh_object=mesh_object)
-            # Attach the mesh to the armature
-            self.set_armature_modifier(mesh_object)
+            with self.profiler.span('vertex_groups', **tags):
+                # Create the vertex groups
+                self.set_vertex_groups(mesh_index, mesh_object=mesh_object)
+                # Attach the mesh to the armature
+                self.set_armature_modifier(mesh_object)
 
         # Rotate the mesh and apply to Z-up
         mesh_object.rotation_euler.x = math.radians(90)
@@ -438,45 +509,123 @@ class DNAImporter:
         self.rig_object = rig_object
         return rig_object
     
+    @property
+    def joint_names(self) -> list[str]:
+        names = self._joint_data.get('names')
+        if names is None:
+            names = [
+                self._dna_reader.getJointName(index)
+                for index in range(self._dna_reader.getJointCount())
+            ]
+            self._joint_data['names'] = names
+        return names
+
+    @property
+    def joint_index_lookup(self) -> dict[str, int]:
+        lookup = self._joint_data.get('index_lookup')
+        if lookup is None:
+            lookup = {name: index for index, name in enumerate(self.joint_names)}
+            self._joint_data['index_lookup'] = lookup
+        return lookup
+
+    def get_neutral_joint_data(self) -> dict:
+        """
+        Gets the joint hierarchy and neutral joint transforms as arrays. Translations are 
+        scaled by the linear modifier and rotations are in radians. These are read from 
+        the DNA once and cached.
+        """
+        if 'local_matrices' not in self._joint_data:
+            joint_count = self._dna_reader.getJointCount()
+            parent_indices = np.array(
+                [self._dna_reader.getJointParentIndex(index) for index in range(joint_count)], 
+                dtype=np.int64
+            )
+            translations = np.column_stack((
+                self._dna_reader.getNeutralJointTranslationXs(),
+                self._dna_reader.getNeutralJointTranslationYs(),
+                self._dna_reader.getNeutralJointTranslationZs()
+            )).astype(np.float64) * self._linear_modifier
+            rotations = np.radians(np.column_stack((
+                self._dna_reader.getNeutralJointRotationXs(),
+                self._dna_reader.getNeutralJointRotationYs(),
+                self._dna_reader.getNeutralJointRotationZs()
+            )).astype(np.float64))
+
+            self._joint_data.update({
+                'parent_indices': parent_indices,
+                'translations': translations,
+                'rotations': rotations,
+                'depths': utilities.get_joint_depths(parent_indices),
+                'local_matrices': utilities.get_joint_local_matrices(translations, rotations)
+            })
+        return self._joint_data
+
+    def get_joint_world_matrices(self, root_matrix: Matrix | None = None) -> np.ndarray:
+        """
+        Calculates the world space matrices of all the joints in the DNA file in 
+        a single vectorized pass over the joint hierarchy.
+        """
+        joint_data = self.get_neutral_joint_data()
+        return utilities.get_joint_world_matrices(
+            parent_indices=joint_data['parent_indices'],
+            translations=joint_data['translations'],
+            rotations=joint_data['rotations'],
+            root_matrix=root_matrix,
+            depths=joint_data['depths']
+        )
+
+    def get_bone_matrices(
+            self, 
+            bone_names: list[str],
+            parent_matrices: dict[str, Matrix] | None = None
+        ) -> dict[str, Matrix]:
+        """
+        Gets the DNA rest matrices of the given bones in a single pass. The first bone is in 
+        object space and the others are relative to their parent. If the parent is also in 
+        bone_names, its reverted matrix is used, otherwise its matrix is taken from 
+        parent_matrices, falling back to the parent edit bone on the rig object.
+        """
+        joint_data = self.get_neutral_joint_data()
+        parent_indices = joint_data['parent_indices']
+        depths = joint_data['depths']
+        local_matrices = joint_data['local_matrices']
+        parent_matrices = parent_matrices or {}
+
+        indices = np.array(
+            [self.joint_index_lookup[name] for name in bone_names if name in self.joint_index_lookup], 
+            dtype=np.int64
+        )
+        if not len(indices):
+            return {}
+
+        rotation_matrix = np.array(Matrix.Rotation(math.radians(90), 4, 'X'))
+        world_matrices = {}
+        # resolve one hierarchy level at a time so that selected parents are always resolved first
+        for level in np.unique(depths[indices]):
+            level_indices = indices[depths[indices] == level]
+            if level == 0:
+                world_matrices.update(zip(level_indices.tolist(), rotation_matrix @ local_matrices[level_indices]))
+                continue
+
+            parents = []
+            for parent_index in parent_indices[level_indices].tolist():
+                parent_matrix = world_matrices.get(parent_index)
+                if parent_matrix is None:
+                    parent_bone_name = self.joint_names[parent_index]
+                    parent_matrix = parent_matrices.get(parent_bone_name)
+                    if parent_matrix is None:
+                        parent_matrix = self.rig_object.data.edit_bones[parent_bone_name].matrix # type: ignore
+                parents.append(np.array(parent_matrix, dtype=np.float64))
+
+            world_matrices.update(zip(level_indices.tolist(), np.array(parents) @ local_matrices[level_indices]))
+
+        return {
+            self.joint_names[index]: Matrix(matrix.tolist())
+            for index, matrix in world_matrices.items()
+        }
+
     def get_bone_matrix(self, bone_name: str) -> Matrix | None:
-        x_locations = self._dna_reader.getNeutralJointTranslationXs()
-        y_locations = self._dna_reader.getNeutralJointTranslationYs()
-        z_locations = self._dna_reader.getNeutralJointTranslationZs()
-        x_rotations = self._dna_reader.getNeutralJointRotationXs()
-        y_rotations = self._dna_reader.getNeutralJointRotationYs()
-        z_rotations = self._dna_reader.getNeutralJointRotationZs()
-
-
-        for index in range(self._dna_reader.getJointCount()):
-            if bone_name == self._dna_reader.getJointName(index):
-                location = Vector((
-                x_locations[index]*self._linear_modifier, 
-                y_locations[index]*self._linear_modifier,
-                z_locations[index]*self._linear_modifier, 
-                ))
-                euler_rotation = Euler((
-                    math.radians(x_rotations[index]),
-                    math.radians(y_rotations[index]),
-                    math.radians(z_rotations[index]),
-                ), "XYZ")
-
-                # The first bone is in object space
-                if index == 0:
-                    rotation_matrix = Matrix.Rotation(math.radians(90), 4, 'X').to_4x4()
-                    global_matrix = (rotation_matrix @ Matrix.Translation(location)) @ euler_rotation.to_matrix().to_4x4()
-
-                # Otherwise they are in parent space
-                else:
-                    parent_index = self._dna_reader.getJointParentIndex(index)
-                    parent_bone_name = self._dna_reader.getJointName(parent_index)
-                    parent_bone = self.rig_object.data.edit_bones[parent_bone_name] # type: ignore
-                    # Calculate the global transformation matrix of the bone
-                    local_matrix = (
-                        Matrix.Translation(location) @ euler_rotation.to_matrix().to_4x4()
-                    )
-                    global_matrix = parent_bone.matrix @ local_matrix
-                
-                return global_matrix
+        return self.get_bone_matrices([bone_name]).get(bone_name)
             
     def get_height_scale_factor(self) -> float:
         y_locations = self._dna_reader.getNeutralJointTranslationYs()
@@ -512,66 +661,42 @@ class DNAImporter:
         if not self.rig_object:
             return
 
-        x_locations = self._dna_reader.getNeutralJointTranslationXs()
-        y_locations = self._dna_reader.getNeutralJointTranslationYs()
-        z_locations = self._dna_reader.getNeutralJointTranslationZs()
-        x_rotations = self._dna_reader.getNeutralJointRotationXs()
-        y_rotations = self._dna_reader.getNeutralJointRotationYs()
-        z_rotations = self._dna_reader.getNeutralJointRotationZs()
+        bone_names = self.joint_names
+        parent_indices = self.get_neutral_joint_data()['parent_indices'].tolist()
+        world_matrices = self.get_joint_world_matrices()
 
         # Switch to edit mode
         utilities.switch_to_bone_edit_mode(self.rig_object)
+        edit_bones = self.rig_object.data.edit_bones # type: ignore
 
         # remove all existing edit bones
-        for edit_bone in self.rig_object.data.edit_bones: # type: ignore
-            self.rig_object.data.edit_bones.remove(edit_bone) # type: ignore
+        for edit_bone in edit_bones:
+            edit_bones.remove(edit_bone)
             
         # Create the extra bones below the last bone in the DNA file
         extra_edit_bone = self.create_extra_bones()
 
-        for index in range(self._dna_reader.getJointCount()):
-            bone_name = self._dna_reader.getJointName(index)
-            location = Vector((
-                x_locations[index]*self._linear_modifier,
-                y_locations[index]*self._linear_modifier,
-                z_locations[index]*self._linear_modifier, 
-            ))
-            euler_rotation = Euler((
-                math.radians(x_rotations[index]),
-                math.radians(y_rotations[index]),
-                math.radians(z_rotations[index]),
-            ), "XYZ")
-
-            # Create the new edit bone
-            edit_bone = self.rig_object.data.edit_bones.new(name=bone_name) # type: ignore
-
-            # The first bone is in object space
-            if index == 0:
-                edit_bone.length = self._linear_modifier
-                edit_bone.matrix = (
-                    Matrix.Translation(location) @ euler_rotation.to_matrix().to_4x4()
-                )
-                # The last extra bone should be the parent of first bone in the DNA file
+        # Create all the bones in the DNA order first, then parent them, since the 
+        # world matrices are already resolved and don't depend on the parent edit bones
+        new_edit_bones = []
+        for bone_name, world_matrix in zip(bone_names, world_matrices):
+            edit_bone = edit_bones.new(name=bone_name)
+            edit_bone.length = self._linear_modifier
+            edit_bone.matrix = Matrix(world_matrix.tolist())
+            new_edit_bones.append(edit_bone)
+
+        for index, (edit_bone, parent_index) in enumerate(zip(new_edit_bones, parent_indices)):
+            # The first bone is in object space and the last extra bone should be its parent
+            if index == 0 or parent_index == index or parent_index < 0:
                 edit_bone.parent = extra_edit_bone
-
-            # Otherwise they are in parent space
             else:
-                parent_index = self._dna_reader.getJointParentIndex(index)
-                parent_bone_name = self._dna_reader.getJointName(parent_index)
-                parent_bone = self.rig_object.data.edit_bones[parent_bone_name] # type: ignore
-                edit_bone.parent = parent_bone
-                edit_bone.length = self._linear_modifier
-                # Calculate the global transformation matrix of the bone
-                local_matrix = (
-                    Matrix.Translation(location) @ euler_rotation.to_matrix().to_4x4()
-                )
-                global_matrix = parent_bone.matrix @ local_matrix
-                edit_bone.matrix = global_matrix
+                edit_bone.parent = new_edit_bones[parent_index]
 
-        # Set the custom bone shapes
+        # Set the custom bone shapes, resolving the shape object only once
         utilities.switch_to_object_mode()
+        bone_shape = utilities.get_bone_shape()
         for pose_bone in self.rig_object.pose.bones:
-            self.set_custom_bone_shape(pose_bone)
+            self.set_custom_bone_shape(pose_bone, bone_shape)
         self.rig_object.data.relation_line_position = 'HEAD' # type: ignore
 
         # Rotate the armature and apply to Z-up
@@ -585,38 +710,95 @@ class DNAImporter:
         
         armature_modifier.object = self.rig_object # type: ignore
 
-    def run(self) -> tuple[bool, str]:
+    def create_lod_meshes(self, lod_index: int) -> tuple[list[bpy.types.Object], list[str]]:
         errors = []
-        self.initialize_dna_data()
-        
-        if self._import_properties.import_bones:
-            self.create_rig_object()
-            self.import_bones()
-
-        for lod_index, meshes in self._import_lods.items():
-            lod_meshes = []
-            for mesh_name, data in meshes.items():
-                # Create the mesh object
-                try:
-                    if self._import_properties.import_mesh:
+        lod_meshes = []
+        for mesh_name, data in self._import_lods[lod_index].items():
+            # Create the mesh object
+            try:
+                if self._import_properties.import_mesh:
+                    with self.profiler.span(
+                        'mesh', 
+                        lod=lod_index, 
+                        mesh=mesh_name, 
+                        vertex_count=data['vertex_count']
+                    ):
                         mesh_object = self.create_mesh_object(
                             lod_index=lod_index,
                             mesh_name=mesh_name
                         )
-                        mesh_object.parent = self.rig_object
-                        lod_meshes.append(mesh_object)
-                except (RuntimeError, Exception) as error:
-                    message = f'Mesh "{mesh_name}" Error: {error}'
-                    errors.append(message)
-                    logger.error(message)
-            
-            # Make a collection per LOD
+                    mesh_object.parent = self.rig_object
+                    # record that the mesh matches the DNA, so unchanged meshes can be skipped on export
+                    self._instance.set_fingerprint(
+                        mesh_object.name, 
+                        utilities.get_mesh_fingerprint(mesh_object),
+                        dna_hash=self.get_source_dna_hash()
+                    )
+                    lod_meshes.append(mesh_object)
+            except (RuntimeError, Exception) as error:
+                message = f'Mesh "{mesh_name}" Error: {error}'
+                errors.append(message)
+                logger.error(message)
+        
+        # Make a collection per LOD
+        utilities.move_to_collection(
+            scene_objects=lod_meshes,
+            collection_name=f"{self._prefix}_lod{lod_index}",
+            exclusively=True
+        )
+        return lod_meshes, errors
+
+    def defer_lods(self):
+        """
+        Registers the LODs that were not imported as placeholders on the rig logic instance, so 
+        they can be streamed in from the DNA file later.
+        """
+        for lod_index in range(NUMBER_OF_FACE_LODS):
+            self._instance.deferred_lods[lod_index] = lod_index in self._deferred_lods
+
+        for lod_index in self._deferred_lods:
+            # an empty collection is the placeholder in the outliner
             utilities.move_to_collection(
-                scene_objects=lod_meshes,
+                scene_objects=[],
                 collection_name=f"{self._prefix}_lod{lod_index}",
                 exclusively=True
             )
 
+    def stream_lod(self, lod_index: int) -> tuple[list[bpy.types.Object], list[str]]:
+        """
+        Builds the meshes of a deferred LOD from the DNA file and parents them to the existing rig.
+        """
+        if not self.rig_object:
+            self.rig_object = self._instance.head_rig
+
+        with self.profiler.span('stream_lod', lod=lod_index):
+            self._import_lods[lod_index] = self.get_lod_mesh_data(lod_index)
+            lod_meshes, errors = self.create_lod_meshes(lod_index)
+
+        self._instance.deferred_lods[lod_index] = False
+        return lod_meshes, errors
+
+    def run(self) -> tuple[bool, str]:
+        errors = []
+        self.initialize_dna_data()
+        
+        if self._import_properties.import_bones:
+            with self.profiler.span('bones'):
+                self.create_rig_object()
+                self.import_bones()
+                if self.rig_object:
+                    self._instance.set_fingerprint(
+                        self.rig_object.name, 
+                        utilities.get_armature_fingerprint(self.rig_object),
+                        dna_hash=self.get_source_dna_hash()
+                    )
+
+        for lod_index in self._import_lods.keys():
+            _, lod_errors = self.create_lod_meshes(lod_index)
+            errors.extend(lod_errors)
+
+        self.defer_lods()
+
         if errors:
             return False, "\n".join(errors)
         
@@ -2,18 +2,24 @@ import os
 import bpy
 import math
 import logging
+import tempfile
+import threading
+import numpy as np
 from pathlib import Path
-from mathutils import Vector, Matrix
+from mathutils import Matrix
 from typing import Literal, TYPE_CHECKING
 from ..constants import SHAPE_KEY_GROUP_PREFIX
 from ..utilities import (
     exclude_rig_logic_evaluation, 
     switch_to_object_mode,
-    update_mesh
+    update_mesh,
+    get_mesh_vertex_positions_array,
+    clear_vertex_group_indices
 )
 
 if TYPE_CHECKING:
     from ..bindings import riglogic
+    from .cache import GeometryCache
 
 logger = logging.getLogger(__name__)
 
@@ -100,6 +106,131 @@ def get_dna_writer(
     
     return writer
 
+def get_temp_dna_file_path(file_path: Path) -> Path:
+    """
+    Creates a uniquely named temporary file that a DNA file is written to before it replaces the 
+    target file, so concurrent writes to the same target never share a temporary file.
+    """
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    handle, temp_file_path = tempfile.mkstemp(dir=file_path.parent, prefix=f'.{file_path.name}.', suffix='.tmp')
+    os.close(handle)
+    return Path(temp_file_path)
+
+
+# the DNA file writes that are running by their resolved target file path
+_active_writes: dict[Path, 'DNAFileWrite'] = {}
+_active_writes_lock = threading.Lock()
+
+
+def is_dna_file_being_written(file_path: Path) -> bool:
+    with _active_writes_lock:
+        write = _active_writes.get(Path(file_path).resolve())
+        return write is not None and not write.done
+
+
+class DNAFileWrite:
+    """
+    Serializes the data in a DNA writer to a temporary file, then atomically replaces the target 
+    file with it, so a failed write never leaves a partial DNA file behind. Since the writer only 
+    holds plain data by this point, this can run on a worker thread.
+    """
+    def __init__(
+            self,
+            writer: 'riglogic.BinaryStreamWriter',
+            temp_file_path: Path,
+            file_path: Path,
+            fsync: bool = False
+        ):
+        self.writer = writer
+        self.temp_file_path = Path(temp_file_path)
+        self.file_path = Path(file_path)
+        self.fsync = fsync
+        self.progress = 0.0
+        self.description = ''
+        self.error: Exception | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.progress >= 1.0 or self.error is not None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _set_progress(self, progress: float, description: str):
+        self.progress = progress
+        self.description = description
+
+    def _acquire(self):
+        key = self.file_path.resolve()
+        with _active_writes_lock:
+            write = _active_writes.get(key)
+            if write is not None and write is not self and not write.done:
+                raise RuntimeError(f'"{self.file_path}" is already being written')
+            _active_writes[key] = self
+
+    def _release(self):
+        key = self.file_path.resolve()
+        with _active_writes_lock:
+            if _active_writes.get(key) is self:
+                del _active_writes[key]
+
+    def run(self):
+        from ..bindings import riglogic # noqa: F811 
+        self._acquire()
+        try:
+            self._set_progress(0.0, f'Writing "{self.file_path.name}"...')
+            self.writer.write()
+            if not riglogic.Status.isOk():
+                status = riglogic.Status.get()
+                raise RuntimeError(f"Error saving DNA: {status.message}")
+
+            if self.fsync:
+                self._set_progress(0.8, f'Flushing "{self.file_path.name}" to disk...')
+                with open(self.temp_file_path, 'rb+') as file:
+                    os.fsync(file.fileno())
+
+            self._set_progress(0.9, f'Replacing "{self.file_path.name}"...')
+            os.replace(self.temp_file_path, self.file_path)
+            # the rename is only durable once the folder entry is flushed too
+            if self.fsync and hasattr(os, 'O_DIRECTORY'):
+                folder = os.open(self.file_path.parent, os.O_RDONLY | os.O_DIRECTORY)
+                try:
+                    os.fsync(folder)
+                finally:
+                    os.close(folder)
+            self._set_progress(1.0, f'Saved "{self.file_path.name}"')
+        except Exception as error:
+            self.error = error
+            self.temp_file_path.unlink(missing_ok=True)
+            raise
+        finally:
+            self._release()
+
+    def _run_in_thread(self):
+        try:
+            self.run()
+        except Exception as error:
+            logger.error(f'Failed to write DNA file "{self.file_path}": {error}')
+
+    def start(self):
+        # a second write to the same target is rejected before the thread is started
+        self._acquire()
+        self._thread = threading.Thread(
+            target=self._run_in_thread, 
+            name=f'Write {self.file_path.name}',
+            daemon=True
+        )
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self._thread:
+            self._thread.join(timeout)
+        return self.done
+
+
 @exclude_rig_logic_evaluation
 def create_shape_key(
         index: int,
@@ -110,7 +241,8 @@ def create_shape_key(
         prefix: str = '',
         is_neutral: bool = False,
         linear_modifier: float = 1.0,
-        delta_threshold: float = 0.0001
+        delta_threshold: float = 0.0001,
+        geometry_cache: 'GeometryCache | None' = None
     ) -> bpy.types.ShapeKey:
     if not mesh_object:
         logger.error(f"Mesh object not found for shape key {name}.")
@@ -134,27 +266,45 @@ def create_shape_key(
         # DNA is Y-up, Blender is Z-up, so we need to rotate the deltas
         rotation_matrix = Matrix.Rotation(math.radians(-90), 4, 'X')
 
-        delta_x_values = reader.getBlendShapeTargetDeltaXs(mesh_index, index)
-        delta_y_values = reader.getBlendShapeTargetDeltaYs(mesh_index, index)
-        delta_z_values = reader.getBlendShapeTargetDeltaZs(mesh_index, index)
-        vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, index)
+        if geometry_cache:
+            geometry = geometry_cache.get_mesh(mesh_index)
+            start, end = geometry['target_offsets'][index:index + 2].tolist()
+            vertex_indices = geometry['target_vertex_indices'][start:end].tolist()
+            delta_x_values, delta_y_values, delta_z_values = geometry['target_deltas'][start:end].T.tolist()
+        else:
+            delta_x_values = reader.getBlendShapeTargetDeltaXs(mesh_index, index)
+            delta_y_values = reader.getBlendShapeTargetDeltaYs(mesh_index, index)
+            delta_z_values = reader.getBlendShapeTargetDeltaZs(mesh_index, index)
+            vertex_indices = reader.getBlendShapeTargetVertexIndices(mesh_index, index)
 
-        # Not all vertices in the shape key are, so we need to filter out the ones that are
-        # past the threshold
-        offset_vertex_indices = []
+        vertex_indices = np.asarray(vertex_indices, dtype=np.int64)
+        deltas = np.column_stack((
+            delta_x_values, 
+            delta_y_values, 
+            delta_z_values
+        )).astype(np.float32).reshape(-1, 3) * linear_modifier
+
+        missing = vertex_indices >= len(shape_key_block.data)
+        if missing.any():
+            logger.warning(
+                f'{int(missing.sum())} vertex indices are missing for shape key "{name}". '
+                f'Were these deleted on the base mesh "{mesh_object.name}"?'
+            )
+            vertex_indices = vertex_indices[~missing]
+            deltas = deltas[~missing]
 
         # the new vertex layout is the original vertex layout with the deltas from the dna applied
-        for vertex_index, delta_x, delta_y, delta_z in zip(vertex_indices, delta_x_values, delta_y_values, delta_z_values):
-            try:
-                delta = Vector((delta_x, delta_y, delta_z)) * linear_modifier
-                rotated_delta = rotation_matrix @ delta
-                
-                # set the positions of the points
-                shape_key_block.data[vertex_index].co = mesh_object.data.vertices[vertex_index].co + rotated_delta # type: ignore
-                if delta.length > delta_threshold:
-                    offset_vertex_indices.append(vertex_index)
-            except IndexError:
-                logger.warning(f'Vertex index {vertex_index} is missing for shape key "{name}". Was this deleted on the base mesh "{mesh_object.name}"?')
+        positions = np.empty(len(shape_key_block.data) * 3, dtype=np.float32)
+        shape_key_block.data.foreach_get('co', positions)
+        positions = positions.reshape(-1, 3)
+        mesh_positions = get_mesh_vertex_positions_array(mesh_object.data) # type: ignore
+        rotated_deltas = deltas @ np.array(rotation_matrix.to_3x3(), dtype=np.float32).T
+        positions[vertex_indices] = mesh_positions[vertex_indices] + rotated_deltas
+        shape_key_block.data.foreach_set('co', positions.ravel())
+
+        # Not all vertices in the shape key are, so we need to filter out the ones that are
+        # past the threshold
+        offset_vertex_indices = vertex_indices[np.linalg.norm(deltas, axis=1) > delta_threshold]
 
         # create a vertex group for the shape key vertices so we can easily select
         vertex_group_name = f'{SHAPE_KEY_GROUP_PREFIX}{name}'
@@ -163,10 +313,12 @@ def create_shape_key(
             mesh_object.vertex_groups.remove(vertex_group)
         vertex_group = mesh_object.vertex_groups.new(name=vertex_group_name)
         vertex_group.add(
-            index=[int(x) for x in offset_vertex_indices], # type: ignore
+            index=offset_vertex_indices.tolist(),
             weight=1.0,
             type='REPLACE'
         )
+        # the group can be recreated under the same name before the dependency graph is evaluated
+        clear_vertex_group_indices(mesh_object.name)
 
     shape_key_block.lock_shape = True
 
@@ -0,0 +1,331 @@
+import sys
+import json
+import time
+import logging
+import argparse
+import numpy as np
+from pathlib import Path
+from typing import TYPE_CHECKING
+from .misc import get_dna_reader, get_dna_writer, get_temp_dna_file_path, DNAFileWrite
+from ..constants import (
+    POSES_FOLDER,
+    JOINT_GROUP_VALUE_EPSILON,
+    BLEND_SHAPE_DELTA_EPSILON
+)
+
+if TYPE_CHECKING:
+    from ..bindings import riglogic
+
+logger = logging.getLogger(__name__)
+
+
+def get_pose_library(folder: Path = POSES_FOLDER / 'face') -> dict[str, dict]:
+    """
+    Gets the face board control locations of every pose in the pose library.
+
+    Args:
+        folder (Path, optional): The folder to search for pose.json files. Defaults to the bundled face poses.
+
+    Returns:
+        dict[str, dict]: The pose data by the pose's relative folder.
+    """
+    poses = {}
+    for file_path in sorted(Path(folder).rglob('pose.json')):
+        with open(file_path, 'r') as file:
+            poses[file_path.parent.relative_to(folder).as_posix()] = json.load(file)
+    return poses
+
+
+def get_gui_control_values(reader: 'riglogic.BinaryStreamReader', pose: dict) -> list[float]:
+    """
+    Gets the value of each GUI control in the DNA for a pose. Controls that are not in the
+    pose are at rest, the same as when a pose is applied to the face board.
+    """
+    values = []
+    for index in range(reader.getGUIControlCount()):
+        control_name, axis = reader.getGUIControlName(index).split('.')
+        axis = axis.rsplit('t', -1)[-1].lower()
+        location = pose.get(control_name, {}).get('location', [0.0, 0.0, 0.0])
+        values.append(location['xyz'.index(axis)])
+    return values
+
+
+def evaluate_poses(
+        reader: 'riglogic.BinaryStreamReader',
+        poses: dict[str, dict],
+        iterations: int = 10
+    ) -> tuple[dict[str, dict[str, np.ndarray]], float]:
+    """
+    Evaluates rig logic for each pose.
+
+    Args:
+        reader (riglogic.BinaryStreamReader): The DNA reader.
+        poses (dict[str, dict]): The poses to evaluate.
+        iterations (int, optional): How many times to evaluate each pose for the timing. Defaults to 10.
+
+    Returns:
+        tuple[dict[str, dict[str, np.ndarray]], float]: The joint, blend shape and animated map outputs
+        of each pose, and the average seconds spent in each calculate call.
+    """
+    from ..bindings import riglogic # noqa: F811
+    manager = riglogic.RigLogic.create(reader=reader, config=riglogic.Configuration())
+    instance = riglogic.RigInstance.create(rigLogic=manager, memRes=None)
+
+    outputs = {}
+    seconds = 0.0
+    for name, pose in poses.items():
+        for index, value in enumerate(get_gui_control_values(reader, pose)):
+            instance.setGUIControl(index, value)
+        manager.mapGUIToRawControls(instance)
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            manager.calculate(instance)
+        seconds += time.perf_counter() - start
+
+        outputs[name] = {
+            'joints': np.array(instance.getJointOutputs(), dtype=np.float64),
+            'blend_shapes': np.array(instance.getBlendShapeOutputs(), dtype=np.float64),
+            'animated_maps': np.array(instance.getAnimatedMapOutputs(), dtype=np.float64)
+        }
+    return outputs, seconds / max(len(poses) * iterations, 1)
+
+
+class DNAOptimizer:
+    """
+    Writes a copy of a DNA file without the data that has no effect on the rig. Joint group values
+    below a tolerance are pruned, along with the rows and columns of the joint groups that end up
+    empty. Blend shape targets of channels that nothing drives are removed and so are deltas that
+    are effectively zero. Values can optionally be quantized to a fixed step.
+    """
+    def __init__(
+            self,
+            dna_file_path: Path,
+            joint_value_epsilon: float = JOINT_GROUP_VALUE_EPSILON,
+            delta_epsilon: float = BLEND_SHAPE_DELTA_EPSILON,
+            remove_unused_targets: bool = True,
+            quantize_step: float | None = None,
+            reader: 'riglogic.BinaryStreamReader | None' = None
+        ):
+        self._source_dna_file = Path(dna_file_path)
+        self._joint_value_epsilon = joint_value_epsilon
+        self._delta_epsilon = delta_epsilon
+        self._remove_unused_targets = remove_unused_targets
+        self._quantize_step = quantize_step
+        self._dna_reader = reader or get_dna_reader(file_path=self._source_dna_file)
+        self.report = {}
+
+    def quantize(self, values: np.ndarray) -> np.ndarray:
+        if not self._quantize_step:
+            return values
+        return np.round(values / self._quantize_step) * self._quantize_step
+
+    def optimize_joint_groups(self, writer: 'riglogic.BinaryStreamWriter') -> dict:
+        reader = self._dna_reader
+        value_count = 0
+        pruned_value_count = 0
+        for group_index in range(reader.getJointGroupCount()):
+            input_indices = np.array(reader.getJointGroupInputIndices(group_index), dtype=np.int64)
+            output_indices = np.array(reader.getJointGroupOutputIndices(group_index), dtype=np.int64)
+            lods = np.array(reader.getJointGroupLODs(group_index), dtype=np.int64)
+            values = np.array(reader.getJointGroupValues(group_index), dtype=np.float64)
+            values = values.reshape(len(output_indices), len(input_indices))
+            value_count += values.size
+
+            values = self.quantize(np.where(np.abs(values) < self._joint_value_epsilon, 0.0, values))
+            # the rows are sorted by LOD, so a row is used by every LOD that has more rows than its index
+            keep_rows = np.any(values != 0.0, axis=1)
+            keep_columns = np.any(values != 0.0, axis=0)
+            kept_row_counts = np.concatenate(([0], np.cumsum(keep_rows)))
+            values = values[keep_rows][:, keep_columns]
+            pruned_value_count += int(keep_rows.size * keep_columns.size - values.size)
+
+            writer.setJointGroupLODs(group_index, kept_row_counts[lods].tolist())
+            writer.setJointGroupInputIndices(group_index, input_indices[keep_columns].tolist())
+            writer.setJointGroupOutputIndices(group_index, output_indices[keep_rows].tolist())
+            writer.setJointGroupValues(group_index, values.astype(np.float32).ravel().tolist())
+
+        return {
+            'joint_group_values': value_count,
+            'pruned_joint_group_values': pruned_value_count
+        }
+
+    def optimize_blend_shapes(self, writer: 'riglogic.BinaryStreamWriter') -> dict:
+        reader = self._dna_reader
+        driven_channels = set(reader.getBlendShapeChannelOutputIndices())
+        target_count = 0
+        removed_target_count = 0
+        delta_count = 0
+        removed_delta_count = 0
+        mesh_delta_errors = {}
+        for mesh_index in range(reader.getMeshCount()):
+            targets = []
+            # the largest change to a kept delta from quantizing, and the longest delta that was removed
+            max_quantize_error = 0.0
+            max_removed_delta = 0.0
+            for target_index in range(reader.getBlendShapeTargetCount(mesh_index)):
+                target_count += 1
+                channel_index = reader.getBlendShapeChannelIndex(mesh_index, target_index)
+                if self._remove_unused_targets and channel_index not in driven_channels:
+                    removed_target_count += 1
+                    continue
+
+                vertex_indices = np.array(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index), dtype=np.int64)
+                deltas = np.column_stack((
+                    reader.getBlendShapeTargetDeltaXs(mesh_index, target_index),
+                    reader.getBlendShapeTargetDeltaYs(mesh_index, target_index),
+                    reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+                )).reshape(-1, 3)
+                quantized_deltas = self.quantize(deltas)
+                keep = np.linalg.norm(quantized_deltas, axis=1) > self._delta_epsilon
+                delta_count += len(deltas)
+                removed_delta_count += int(np.count_nonzero(~keep))
+                max_quantize_error = max(
+                    max_quantize_error, 
+                    float(np.abs(quantized_deltas[keep] - deltas[keep]).max(initial=0.0))
+                )
+                max_removed_delta = max(
+                    max_removed_delta, 
+                    float(np.linalg.norm(deltas[~keep], axis=1).max(initial=0.0))
+                )
+                targets.append((channel_index, vertex_indices[keep], quantized_deltas[keep]))
+
+            mesh_delta_errors[reader.getMeshName(mesh_index)] = {
+                'max_quantize_error': max_quantize_error,
+                'max_removed_delta': max_removed_delta
+            }
+
+            writer.clearBlendShapeTargets(meshIndex=mesh_index)
+            for target_index, (channel_index, vertex_indices, deltas) in enumerate(targets):
+                writer.setBlendShapeChannelIndex(
+                    meshIndex=mesh_index,
+                    blendShapeTargetIndex=target_index,
+                    blendShapeChannelIndex=channel_index
+                )
+                writer.setBlendShapeTargetVertexIndices(
+                    meshIndex=mesh_index,
+                    blendShapeTargetIndex=target_index,
+                    vertexIndices=vertex_indices.tolist()
+                )
+                writer.setBlendShapeTargetDeltas(
+                    meshIndex=mesh_index,
+                    blendShapeTargetIndex=target_index,
+                    deltas=deltas.tolist()
+                )
+
+        return {
+            'blend_shape_targets': target_count,
+            'removed_blend_shape_targets': removed_target_count,
+            'blend_shape_deltas': delta_count,
+            'removed_blend_shape_deltas': removed_delta_count,
+            'max_blend_shape_quantize_error': max(
+                (errors['max_quantize_error'] for errors in mesh_delta_errors.values()), default=0.0
+            ),
+            'max_removed_blend_shape_delta': max(
+                (errors['max_removed_delta'] for errors in mesh_delta_errors.values()), default=0.0
+            ),
+            'blend_shape_delta_errors': mesh_delta_errors
+        }
+
+    def measure(self, file_path: Path, poses: dict[str, dict], iterations: int = 10) -> dict:
+        """
+        Evaluates the pose library with the source and optimized DNA files and compares the results.
+        """
+        original_outputs, original_seconds = evaluate_poses(self._dna_reader, poses, iterations)
+        optimized_outputs, optimized_seconds = evaluate_poses(get_dna_reader(file_path=file_path), poses, iterations)
+
+        errors = {}
+        for name, outputs in original_outputs.items():
+            for key, values in outputs.items():
+                error = float(np.abs(optimized_outputs[name][key] - values).max(initial=0.0))
+                errors[key] = max(errors.get(key, 0.0), error)
+
+        return {
+            'pose_count': len(poses),
+            'original_calculate_seconds': original_seconds,
+            'optimized_calculate_seconds': optimized_seconds,
+            'calculate_speedup': original_seconds / optimized_seconds if optimized_seconds else 0.0,
+            'max_pose_errors': errors
+        }
+
+    def run(
+            self,
+            file_path: Path,
+            poses: dict[str, dict] | None = None,
+            iterations: int = 10
+        ) -> dict:
+        """
+        Writes the optimized DNA file and returns a report of what was removed, the change in file
+        size, and the calculate speedup and max pose error over the pose library.
+        """
+        from ..bindings import riglogic # noqa: F811
+        file_path = Path(file_path)
+        temp_file_path = get_temp_dna_file_path(file_path)
+        writer = get_dna_writer(file_path=temp_file_path)
+        writer.setFrom(
+            self._dna_reader,
+            riglogic.DataLayer.All,
+            riglogic.UnknownLayerPolicy.Preserve,
+            None
+        )
+
+        self.report = {
+            'source': str(self._source_dna_file),
+            'target': str(file_path),
+            **self.optimize_joint_groups(writer),
+            **self.optimize_blend_shapes(writer)
+        }
+        logger.info(f'Saving optimized DNA to: "{file_path}"...')
+        DNAFileWrite(writer, temp_file_path, file_path).run()
+
+        self.report['original_size'] = self._source_dna_file.stat().st_size
+        self.report['optimized_size'] = file_path.stat().st_size
+        poses = get_pose_library() if poses is None else poses
+        if poses:
+            self.report.update(self.measure(file_path, poses, iterations))
+
+        logger.info(f'Optimized DNA saved to: "{file_path}"\n{json.dumps(self.report, indent=2)}')
+        return self.report
+
+
+def main(argv: list[str] | None = None):
+    """
+    Optimizes a DNA file and logs a report of the result. This needs the addon to be installed, 
+    since it is run with Blender's python.
+
+    Example:
+        blender -b --python-expr "from meta_human_dna.dna_io.optimizer import main; main()" -- ada.dna ada_optimized.dna --quantize-step 0.0001
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    # when run through blender, only use the arguments after "--"
+    if '--' in argv:
+        argv = argv[argv.index('--') + 1:]
+
+    parser = argparse.ArgumentParser(description='Prunes data that has no effect on the rig from a DNA file.')
+    parser.add_argument('source', help='The DNA file to optimize')
+    parser.add_argument('target', help='The optimized DNA file to write')
+    parser.add_argument('--joint-value-epsilon', type=float, default=JOINT_GROUP_VALUE_EPSILON, help='Joint group values below this are pruned')
+    parser.add_argument('--delta-epsilon', type=float, default=BLEND_SHAPE_DELTA_EPSILON, help='Blend shape deltas not longer than this are removed')
+    parser.add_argument('--keep-unused-targets', action='store_true', help='Keep the blend shape targets that nothing drives')
+    parser.add_argument('--quantize-step', type=float, default=None, help='Rounds the values to a multiple of this step')
+    parser.add_argument('--iterations', type=int, default=10, help='How many times to evaluate each pose when timing')
+    parser.add_argument('--report', default=None, help='A json file to save the report to')
+    arguments = parser.parse_args(argv)
+
+    report = DNAOptimizer(
+        dna_file_path=Path(arguments.source),
+        joint_value_epsilon=arguments.joint_value_epsilon,
+        delta_epsilon=arguments.delta_epsilon,
+        remove_unused_targets=not arguments.keep_unused_targets,
+        quantize_step=arguments.quantize_step
+    ).run(Path(arguments.target), iterations=arguments.iterations)
+
+    if arguments.report:
+        with open(arguments.report, 'w') as file:
+            json.dump(report, file, indent=2)
+        logger.info(f'Saved the optimization report to: "{arguments.report}"')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
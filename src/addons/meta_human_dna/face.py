@@ -7,14 +7,15 @@ import math
 import bmesh
 import queue
 import logging
+import numpy as np
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal
 from mathutils import Vector, Matrix
 from .dna_io import (
     get_dna_reader, 
     create_shape_key,
-    DNAImporter,
-    DNAExporter
+    get_topology_vertex_groups,
+    DNAImporter
 )
 from . import utilities
 from .constants import (
@@ -30,7 +31,6 @@ from .constants import (
     TOPOLOGY_TEXTURE,
     NUMBER_OF_FACE_LODS,
     FACE_GUI_EMPTIES, 
-    TOPOLOGY_VERTEX_GROUPS_FILE_PATH,
     SCALE_FACTOR,
     INVALID_NAME_CHARACTERS_REGEX,
     TEXTURE_LOGIC_NODE_NAME,
@@ -39,7 +39,8 @@ from .constants import (
     EXTRA_BONES,
     ALTERNATE_TEXTURE_FILE_NAMES,
     ALTERNATE_TEXTURE_FILE_EXTENSIONS,
-    UNREAL_EXPORTED_HEAD_MATERIAL_NAMES
+    UNREAL_EXPORTED_HEAD_MATERIAL_NAMES,
+    IMPORT_REPORT_FILE_NAME
 )
 
 if TYPE_CHECKING:
@@ -101,17 +102,40 @@ class MetahumanFace:
 
         self.asset_root_folder = self.dna_file_path.parent.parent.parent.parent.parent.parent
 
-        file_format = 'binary' if self.dna_file_path.suffix.lower() == ".dna" else 'json'
-        self.dna_reader = get_dna_reader(
-            file_path=self.dna_file_path,
-            file_format=file_format
-        )
-        self.dna_importer = DNAImporter(
-            instance=self.rig_logic_instance, 
-            import_properties=self.dna_import_properties,
-            linear_modifier=self.linear_modifier,
-            reader=self.dna_reader
+        # memory is only traced when a report is requested, since tracing slows down python allocations.
+        # The profiler is started by ingest, so that it is always stopped when the import finishes
+        self.profiler = utilities.PhaseProfiler(
+            name=self.name,
+            trace_memory=bool(self.dna_import_properties and self.dna_import_properties.write_import_report)
         )
+        # the reader and importer are created on first access, so that ingest can read the DNA 
+        # after the profiler has started and the read is included in the import report
+        self._dna_reader = None
+        self._dna_importer = None
+
+    @property
+    def dna_reader(self):
+        if self._dna_reader is None:
+            file_format = 'binary' if self.dna_file_path.suffix.lower() == ".dna" else 'json'
+            with self.profiler.span('dna_read'):
+                self._dna_reader = get_dna_reader(
+                    file_path=self.dna_file_path,
+                    file_format=file_format
+                )
+        return self._dna_reader
+
+    @property
+    def dna_importer(self) -> DNAImporter:
+        if self._dna_importer is None:
+            self._dna_importer = DNAImporter(
+                instance=self.rig_logic_instance, 
+                # fallback to the last used import settings, so deferred LODs can be streamed in later
+                import_properties=self.dna_import_properties or self.window_manager_properties,
+                linear_modifier=self.linear_modifier,
+                reader=self.dna_reader,
+                profiler=self.profiler
+            )
+        return self._dna_importer
     
     @property
     def linear_modifier(self) -> float:
@@ -350,7 +374,8 @@ class MetahumanFace:
         utilities.set_viewport_shading('MATERIAL')
 
         # set the image textures to match
-        self._set_image_textures(materials)
+        with self.profiler.span('images'):
+            self._set_image_textures(materials)
         # prefix the material image names with the metahuman name
         for material in materials:
             utilities.prefix_material_image_names(
@@ -437,6 +462,47 @@ class MetahumanFace:
         face_board_object.data.relation_line_position = 'HEAD' # type: ignore
         return face_board_object
 
+    def _assign_lod_materials(self, mesh_objects: list[bpy.types.Object]):
+        for key, material_name in MESH_SHADER_MAPPING.items():
+            material = bpy.data.materials.get(f'{self.name}_{material_name}')
+            if not material:
+                continue
+            for mesh_object in mesh_objects:
+                if mesh_object.name.startswith(f'{self.name}_{key}'):
+                    if mesh_object.data.materials: # type: ignore
+                        mesh_object.data.materials[0] = material # type: ignore
+                    else:
+                        mesh_object.data.materials.append(material) # type: ignore
+
+    @utilities.preserve_context
+    def stream_lod(self, lod_index: int) -> list[bpy.types.Object]:
+        """
+        Builds the meshes for a LOD that was deferred on import.
+        """
+        if not self.rig_logic_instance.deferred_lods[lod_index]:
+            return []
+
+        from .ui import callbacks
+        logger.info(f'Streaming in LOD{lod_index} for "{self.name}"...')
+        mesh_objects, errors = self.dna_importer.stream_lod(lod_index)
+        for message in errors:
+            logger.error(message)
+
+        self._assign_lod_materials(mesh_objects)
+        # only show the streamed meshes if they are the active LOD
+        for mesh_object in mesh_objects:
+            mesh_object.hide_set(self.rig_logic_instance.get('active_lod', 0) != lod_index)
+
+        callbacks.update_output_items(None, bpy.context)
+        return mesh_objects
+
+    def stream_deferred_lods(self) -> list[bpy.types.Object]:
+        mesh_objects = []
+        for lod_index, deferred in enumerate(self.rig_logic_instance.deferred_lods):
+            if deferred:
+                mesh_objects.extend(self.stream_lod(lod_index))
+        return mesh_objects
+
     def import_action(self, file_path: Path):
         file_path = Path(file_path)
         if not self.face_board_object:
@@ -447,21 +513,45 @@ class MetahumanFace:
         elif file_path.suffix.lower() == '.fbx':
             utilities.import_action_from_fbx(file_path, self.face_board_object)
 
-    def ingest(self) -> tuple[bool, str]:        
+    def save_import_report(self):
+        """
+        Writes the import phase timings as a JSON report next to the DNA file and optionally 
+        logs a summary table.
+        """
+        if not self.dna_import_properties:
+            return
+        
+        if self.dna_import_properties.write_import_report:
+            self.profiler.save(self.dna_file_path.parent / f'{self.name}_{IMPORT_REPORT_FILE_NAME}')
+        if self.dna_import_properties.print_import_report:
+            logger.info(f'Import report for "{self.name}":\n{self.profiler.get_summary_table()}')
+
+    def ingest(self) -> tuple[bool, str]:
+        self.profiler.start()
+        try:
+            return self._ingest()
+        finally:
+            self.profiler.stop()
+            self.save_import_report()
+
+    def _ingest(self) -> tuple[bool, str]:        
         valid, message = self.dna_importer.run()
         self.rig_logic_instance.head_rig = self.dna_importer.rig_object
 
         self._organize_viewport()
-        self.import_materials()
+        with self.profiler.span('materials'):
+            self.import_materials()
         # import the face board if one does not already exist in the scene
         if not any(i.face_board for i in self.scene_properties.rig_logic_instance_list):
-            face_board_object = self._import_face_board()
+            with self.profiler.span('face_board'):
+                face_board_object = self._import_face_board()
         else:
             face_board_object = next(i.face_board for i in self.scene_properties.rig_logic_instance_list if i.face_board)
 
         # Note that the topology vertex groups are only valid for the default metahuman head mesh with 24408 vertices
         if len(self.dna_reader.getVertexLayoutPositionIndices(0)) == 24408:
-            self._create_topology_vertex_groups()
+            with self.profiler.span('topology_vertex_groups'):
+                self._create_topology_vertex_groups()
 
         # set the references on the rig logic instance
         self.rig_logic_instance.head_mesh = self.head_mesh_object
@@ -532,25 +622,26 @@ class MetahumanFace:
             bpy.context.scene.cursor.location = Vector((target_center.x, 0, 0)) # type: ignore
             bpy.ops.object.origin_set(type='ORIGIN_CURSOR')
 
-            from_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
+            # the mesh data is handed to the core module as arrays straight from foreach_get
+            uv_data = utilities.get_mesh_vertex_uv_data(mesh_object)
+            vertex_data = utilities.get_mesh_vertex_data(mesh_object)
             from_data = {
                 'name': mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(from_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(from_bmesh_object)
+                'uv_data': uv_data,
+                'vertex_data': vertex_data
             }
-            to_bmesh_object = DNAExporter.get_bmesh(mesh_object=mesh_object, rotation=0)
             to_data = {
                 'name': self.head_mesh_object.name,
-                'uv_data': DNAExporter.get_mesh_vertex_uvs(to_bmesh_object),
-                'vertex_data': DNAExporter.get_mesh_vertex_positions(to_bmesh_object),
+                'uv_data': uv_data,
+                'vertex_data': vertex_data,
                 'dna_reader': self.dna_reader
             }
 
-            from_bmesh_object.free()
-            to_bmesh_object.free()
-
             vertex_positions = meta_human_dna_core.calculate_dna_mesh_vertex_positions(from_data, to_data)
-            self.head_mesh_object.data.vertices.foreach_set("co", vertex_positions.ravel()) # type: ignore
+            self.head_mesh_object.data.vertices.foreach_set( # type: ignore
+                "co", 
+                np.ascontiguousarray(vertex_positions, dtype=np.float32).ravel()
+            )
             self.head_mesh_object.data.update() # type: ignore
 
             utilities.auto_fit_bones(
@@ -616,12 +707,14 @@ class MetahumanFace:
         ):
         if self.head_rig_object and self.head_mesh_object:
             amount = self.scene_properties.push_along_normal_distance
-            for pose_bone in bpy.context.selected_pose_bones: # type: ignore
-                normal = utilities.get_ray_cast_normal(
-                    self.head_mesh_object, 
-                    pose_bone,
-                    max_distance=0.01
-                )
+            selected_pose_bones = list(bpy.context.selected_pose_bones) # type: ignore
+            normals = utilities.get_ray_cast_normals(
+                self.head_mesh_object, 
+                selected_pose_bones,
+                max_distance=0.01
+            )
+            for pose_bone in selected_pose_bones:
+                normal = normals.get(pose_bone.name)
                 if normal:
                     bone_world_position = self.head_rig_object.matrix_world @ pose_bone.matrix.to_translation()
                     if direction == 'forward':
@@ -706,20 +799,20 @@ class MetahumanFace:
             return
 
         if self.head_mesh_object:
-            with open(TOPOLOGY_VERTEX_GROUPS_FILE_PATH, 'r') as file:
-                data = json.load(file)
-                logger.info("Creating topology vertex groups...")
-                for vertex_group_name, vertex_indexes in data.items():
-                    # get the existing vertex_group or create a new one
-                    vertex_group = self.head_mesh_object.vertex_groups.get(vertex_group_name)
-                    if not vertex_group:
-                        vertex_group = self.head_mesh_object.vertex_groups.new(name=vertex_group_name)
-
-                    vertex_group.add(
-                        index=vertex_indexes,
-                        weight=1.0,
-                        type='REPLACE'
-                    )
+            logger.info("Creating topology vertex groups...")
+            for vertex_group_name, vertex_indexes in get_topology_vertex_groups().items():
+                # get the existing vertex_group or create a new one
+                vertex_group = self.head_mesh_object.vertex_groups.get(vertex_group_name)
+                if not vertex_group:
+                    vertex_group = self.head_mesh_object.vertex_groups.new(name=vertex_group_name)
+
+                # all the vertices of the group are added in one call
+                vertex_group.add(
+                    index=vertex_indexes.tolist(),
+                    weight=1.0,
+                    type='REPLACE'
+                )
+            utilities.clear_vertex_group_indices(self.head_mesh_object.name)
 
     def select_vertex_group(self):
         if self.rig_logic_instance and self.rig_logic_instance.head_mesh:
@@ -747,7 +840,8 @@ class MetahumanFace:
                     mesh_object=self.rig_logic_instance.head_mesh,
                     armature_object=self.rig_logic_instance.head_rig,
                     vertex_group_name=self.rig_logic_instance.head_rig_bone_groups,
-                    dna_reader=self.dna_reader
+                    dna_reader=self.dna_reader,
+                    dna_file_path=self.dna_file_path
                 ):
                     bone.select = True
 
@@ -814,6 +908,9 @@ class MetahumanFace:
             bone_names = [pose_bone.name for pose_bone in bpy.context.selected_pose_bones] # type: ignore
             utilities.switch_to_bone_edit_mode(self.rig_logic_instance.head_rig)
             
+            # compute the DNA rest matrices for all the selected bones in one pass
+            bone_matrices = self.dna_importer.get_bone_matrices(bone_names=bone_names)
+
             for bone_name in bone_names:
                 edit_bone = self.head_rig_object.data.edit_bones[bone_name] # type: ignore
                 extra_bone = extra_bone_lookup.get(bone_name)
@@ -829,7 +926,7 @@ class MetahumanFace:
                     # default values are stored in Y-up, so convert to Z-up
                     edit_bone.matrix = Matrix.Rotation(math.radians(90), 4, 'X').to_4x4() @ global_matrix
                 else:
-                    bone_matrix = self.dna_importer.get_bone_matrix(bone_name=bone_name)
+                    bone_matrix = bone_matrices.get(bone_name)
                     if bone_matrix:
                         edit_bone.matrix = bone_matrix
 
@@ -860,7 +957,8 @@ class MetahumanFace:
                 'name': shape_key_name,
                 'is_neutral': self.rig_logic_instance.generate_neutral_shapes,
                 'linear_modifier': self.linear_modifier,
-                'prefix': f'{mesh_dna_name}__'
+                'prefix': f'{mesh_dna_name}__',
+                'geometry_cache': self.dna_importer.geometry_cache
             }
 
         for mesh_index in range(self.dna_reader.getMeshCount()):
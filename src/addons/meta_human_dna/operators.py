@@ -1,14 +1,14 @@
 import os
 import bpy
 import queue
-import shutil
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
+from bpy_extras.io_utils import ImportHelper
 from .face import MetahumanFace
 from .ui import importer, callbacks
 from . import utilities
-from .dna_io import DNACalibrator, DNAExporter, create_shape_key
+from .dna_io import DNACalibrator, DNAExporter, create_shape_key, compare_dna
 from .properties import MetahumanDnaImportProperties
 from .constants import (
     SEND2UE_FACE_SETTINGS,
@@ -718,6 +718,19 @@ class ExportToDisk(bpy.types.Operator):
     bl_idname = "meta_human_dna.export_to_disk"
     bl_label = "Export to Disk"
 
+    _timer = None
+    _dna_io_instance: DNAExporter | None = None
+
+    def modal(self, context, event):
+        if event.type == 'TIMER':
+            [a.tag_redraw() for a in context.screen.areas] # type: ignore
+            write_task = self._dna_io_instance.write_task # type: ignore
+            context.window_manager.meta_human_dna.progress = min(write_task.progress, 0.99) # type: ignore
+            context.window_manager.meta_human_dna.progress_description = write_task.description # type: ignore
+            if write_task.done: # type: ignore
+                return self.finish(context)
+        return {'PASS_THROUGH'}
+
     def execute(self, context):
         face = utilities.get_active_face()
         if face and face.rig_logic_instance:
@@ -727,19 +740,23 @@ class ExportToDisk(bpy.types.Operator):
                 self.report({'ERROR'}, 'File must be saved to use a relative path')
                 return {'CANCELLED'}
 
+            preferences = context.preferences.addons[ToolInfo.NAME].preferences # type: ignore
             dna_io_instance: DNAExporter = None # type: ignore
             if instance.output_method == 'calibrate':
                 dna_io_instance = DNACalibrator(
                     instance=instance,
-                    linear_modifier=face.linear_modifier
+                    linear_modifier=face.linear_modifier,
+                    fsync=preferences.fsync_dna_files
                 )              
             elif instance.output_method == 'overwrite':
                 dna_io_instance = DNAExporter(
                     instance=instance,
-                    linear_modifier=face.linear_modifier
+                    linear_modifier=face.linear_modifier,
+                    fsync=preferences.fsync_dna_files
                 )
 
-            valid, title, message, fix = dna_io_instance.run()
+            # the scene data is captured on the main thread, then the file is written in the background
+            valid, title, message, fix = dna_io_instance.run(background=True)
             if not valid:
                 # self.report({'ERROR'}, message)
                 utilities.report_error(
@@ -749,11 +766,74 @@ class ExportToDisk(bpy.types.Operator):
                     width=300
                 )
                 return {'CANCELLED'}
-            else:
-                self.report({'INFO'}, message)
+
+            self._dna_io_instance = dna_io_instance
+            context.window_manager.meta_human_dna.progress = 0 # type: ignore
+            context.window_manager.meta_human_dna.progress_title = 'Exporting DNA...' # type: ignore
+            self._timer = context.window_manager.event_timer_add(0.1, window=context.window) # type: ignore
+            context.window_manager.modal_handler_add(self) # type: ignore
+            return {'RUNNING_MODAL'}
             
         return {'FINISHED'}
 
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self._timer) # type: ignore
+        context.window_manager.meta_human_dna.progress = 1 # type: ignore
+        context.window_manager.meta_human_dna.progress_title = '' # type: ignore
+        context.window_manager.meta_human_dna.progress_description = '' # type: ignore
+
+        write_task = self._dna_io_instance.write_task # type: ignore
+        if write_task.error: # type: ignore
+            self.report({'ERROR'}, f'Failed to write the DNA file: {write_task.error}') # type: ignore
+            return {'CANCELLED'}
+
+        self._dna_io_instance.finish_write() # type: ignore
+        self.report({'INFO'}, 'Export successful.')
+        return {'FINISHED'}
+
+class CompareDna(bpy.types.Operator, ImportHelper):
+    """Compares the active rig logic instance's DNA file with another DNA file and reports their differences"""
+    bl_idname = "meta_human_dna.compare_dna"
+    bl_label = "Compare DNA"
+    filename_ext = ".dna"
+
+    filter_glob: bpy.props.StringProperty(
+        default="*.dna",
+        options={"HIDDEN"},
+        subtype="FILE_PATH",
+    ) # type: ignore
+
+    def execute(self, context):
+        properties = context.scene.meta_human_dna # type: ignore
+        instance = properties.rig_logic_instance_list[properties.rig_logic_instance_list_active_index]
+        expected_file_path = Path(bpy.path.abspath(instance.dna_file_path))
+        current_file_path = Path(bpy.path.abspath(self.filepath))
+        for file_path in (expected_file_path, current_file_path):
+            if not file_path.exists():
+                self.report({'ERROR'}, f'File not found: {file_path}')
+                return {'CANCELLED'}
+
+        diff_report = compare_dna(expected_file_path, current_file_path)
+        logger.info(f'Compared "{expected_file_path}" with "{current_file_path}"\n{diff_report.get_summary()}')
+        if diff_report.is_equal:
+            self.report({'INFO'}, 'The DNA files match.')
+        else:
+            report_file_path = diff_report.save(current_file_path.with_suffix('.diff.json'))
+            self.report(
+                {'WARNING'}, 
+                f'Found {len(diff_report.differences)} differences and {len(diff_report.changed_joint_names)} '
+                f'changed joints. See "{report_file_path}" for details.'
+            )
+        return {'FINISHED'}
+
+    @classmethod
+    def poll(cls, context):
+        properties = context.scene.meta_human_dna # type: ignore
+        if len(properties.rig_logic_instance_list) == 0:
+            return False
+        instance = properties.rig_logic_instance_list[properties.rig_logic_instance_list_active_index]
+        return bool(instance.dna_file_path)
+
 class SyncWithBodyBonesInBlueprint(bpy.types.Operator):
     """Syncs the spine bone positions with the body skeleton in the unreal blueprint. This can help ensure that your head matches the body height. You must have the blueprint asset path set in your Send to Unreal Settings so it knows where to look for the bone positions"""
     bl_idname = "meta_human_dna.sync_with_body_in_blueprint"
@@ -858,12 +938,15 @@ class AutoFitSelectedBones(bpy.types.Operator):
                     self.report({'ERROR'}, f'The selected bone "{pose_bone.id_data.name}:{pose_bone.name}" is not associated with the rig logic instance "{face.rig_logic_instance.name}"')
                     return {'CANCELLED'}
             
-            utilities.auto_fit_bones(
+            bone_names = utilities.auto_fit_bones(
                 mesh_object=face.head_mesh_object, 
                 armature_object=face.head_rig_object,
                 dna_reader=face.dna_reader,
-                only_selected=True
+                only_selected=True,
+                changed_only=context.scene.meta_human_dna.auto_fit_changed_only, # type: ignore
+                dna_file_path=face.dna_file_path
             )
+            self.report({'INFO'}, f'Fit {len(bone_names)} bones')
 
         return {'FINISHED'}
     
@@ -1181,6 +1264,7 @@ class DuplicateRigLogicInstance(bpy.types.Operator):
         instance = callbacks.get_active_rig_logic()
         if instance:
             if instance.head_mesh and instance.head_rig:
+                file_report = utilities.FileSyncReport()
                 new_head_mesh_object = utilities.copy_mesh(
                     mesh_object=instance.head_mesh,
                     new_mesh_name=instance.head_mesh.name.replace(instance.name, self.new_name),
@@ -1197,7 +1281,8 @@ class DuplicateRigLogicInstance(bpy.types.Operator):
                     mesh_object=new_head_mesh_object,
                     old_prefix=instance.name,
                     new_prefix=self.new_name,
-                    new_folder=new_folder
+                    new_folder=new_folder,
+                    report=file_report
                 )
                 # duplicate the texture logic node
                 if new_head_mesh_material:
@@ -1245,7 +1330,8 @@ class DuplicateRigLogicInstance(bpy.types.Operator):
                             mesh_object=new_extra_mesh_object,
                             old_prefix=instance.name,
                             new_prefix=self.new_name,
-                            new_folder=new_folder
+                            new_folder=new_folder,
+                            report=file_report
                         )                        
 
                 # move the duplicated rig to the right of the last head mesh
@@ -1259,8 +1345,15 @@ class DuplicateRigLogicInstance(bpy.types.Operator):
                 # then parent the duplicated rig to the same face board
                 new_rig_object.parent = instance.face_board
 
+                # DNA files are always replaced when they are written, so the copy can be a hard link
                 new_dna_file_path = new_folder / f'{self.new_name}.dna'
-                shutil.copy(instance.dna_file_path, new_dna_file_path)
+                utilities.sync_file(
+                    source=Path(bpy.path.abspath(instance.dna_file_path)), 
+                    destination=new_dna_file_path,
+                    hard_link=True,
+                    report=file_report
+                )
+                self.report({'INFO'}, f'Duplicated files: {file_report.get_summary()}')
 
 
                 # add the duplicated instance to the list and set the initial values
@@ -1,10 +1,11 @@
 import bpy
 import logging
 from .ui import callbacks
-from .constants import ToolInfo, NUMBER_OF_FACE_LODS
+from .constants import ToolInfo, NUMBER_OF_FACE_LODS, GEOMETRY_CACHE_MAX_SIZE
 from .rig_logic import (
     RigLogicInstance, 
     ShapeKeyData, 
+    FingerprintData,
     OutputData,
     MaterialSlotToInstance
 )
@@ -57,6 +58,28 @@ class MetahumanDnaAddonProperties:
     next_metrics_consent_timestamp: bpy.props.FloatProperty(default=0.0) # type: ignore
     extra_dna_folder_list: bpy.props.CollectionProperty(type=ExtraDnaFolder) # type: ignore
     extra_dna_folder_list_active_index: bpy.props.IntProperty() # type: ignore
+    use_geometry_cache: bpy.props.BoolProperty(
+        name="Use Geometry Cache",
+        default=True,
+        description="Caches the mesh geometry that is decoded from imported DNA files on disk, so re-importing the same DNA file skips decoding it"
+    ) # type: ignore
+    geometry_cache_folder: bpy.props.StringProperty(
+        name="Geometry Cache Folder",
+        default="",
+        subtype='DIR_PATH',
+        description="The folder the geometry cache is stored in. If empty, the user cache folder is used"
+    ) # type: ignore
+    geometry_cache_max_size: bpy.props.IntProperty(
+        name="Max Cache Size (MB)",
+        default=GEOMETRY_CACHE_MAX_SIZE,
+        min=0,
+        description="The max size of the geometry cache folder in megabytes. The least recently used entries are removed when it is exceeded"
+    ) # type: ignore
+    fsync_dna_files: bpy.props.BoolProperty(
+        name="Flush DNA Files to Disk",
+        default=False,
+        description="Forces exported DNA files to be flushed to disk before they replace the existing file. This is safer if the system crashes, but makes exporting slower"
+    ) # type: ignore
 
 
 
@@ -106,6 +129,21 @@ class MetahumanDnaImportProperties(get_dna_import_property_group_base_class()):
         name='Maps Folder',
         description='This can be set to an alternate folder location for the face wrinkle maps. If no folder is set, the importer looks for a "maps" folder next to the .dna file',
     ) # type: ignore
+    defer_unselected_lods: bpy.props.BoolProperty(
+        default=False,
+        name='Stream Other LODs',
+        description='Whether to register the LODs that are not imported as placeholders. They are streamed in from the DNA file the first time they are set as the active LOD or when they are exported'
+    ) # type: ignore
+    write_import_report: bpy.props.BoolProperty(
+        default=False,
+        name='Write Report',
+        description='Whether to write a JSON report with the time and peak memory of each import phase next to the .dna file. Note that tracking memory makes the import slower'
+    ) # type: ignore
+    print_import_report: bpy.props.BoolProperty(
+        default=False,
+        name='Print Report',
+        description='Whether to print a summary table of the time spent in each import phase to the console'
+    ) # type: ignore
 
 
 class MetahumanWindowMangerProperties(bpy.types.PropertyGroup, MetahumanDnaImportProperties):
@@ -123,6 +161,7 @@ class MetahumanWindowMangerProperties(bpy.types.PropertyGroup, MetahumanDnaImpor
     progress: bpy.props.FloatProperty(default=1.0) # type: ignore
     progress_description: bpy.props.StringProperty(default='') # type: ignore
     progress_mesh_name: bpy.props.StringProperty(default='') # type: ignore
+    progress_title: bpy.props.StringProperty(default='') # type: ignore
     evaluate_dependency_graph: bpy.props.BoolProperty(default=True) # type: ignore
 
     face_pose_previews: bpy.props.EnumProperty( # type: ignore
@@ -155,6 +194,15 @@ class MetahumanSceneProperties(bpy.types.PropertyGroup):
         step=1,
         precision=5
     ) # type: ignore
+    auto_fit_changed_only: bpy.props.BoolProperty(
+        name="Only Fit Changed",
+        description=(
+            "Only fits the selected bones that were moved, or that are near head mesh vertices that moved, since "
+            "they were last fit. All the selected bones are fit when there is no previous fit, the selection "
+            "changed, or most of the mesh changed"
+        ),
+        default=True
+    ) # type: ignore
     # --------------------- riglogic properties ------------------
     rig_logic_instance_list: bpy.props.CollectionProperty(type=RigLogicInstance) # type: ignore
     rig_logic_instance_list_active_index: bpy.props.IntProperty(
@@ -171,6 +219,7 @@ def register():
     bpy.utils.register_class(MaterialSlotToInstance)
     bpy.utils.register_class(OutputData)
     bpy.utils.register_class(ShapeKeyData)
+    bpy.utils.register_class(FingerprintData)
     bpy.utils.register_class(RigLogicInstance)
 
     try:
@@ -212,6 +261,7 @@ def unregister():
 
     # unregister the list data classes
     bpy.utils.unregister_class(RigLogicInstance)
+    bpy.utils.unregister_class(FingerprintData)
     bpy.utils.unregister_class(ShapeKeyData)
     bpy.utils.unregister_class(OutputData)
     bpy.utils.unregister_class(MaterialSlotToInstance)
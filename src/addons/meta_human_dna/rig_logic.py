@@ -6,6 +6,7 @@ from pathlib import Path
 from mathutils import Matrix, Vector, Euler
 from . import utilities
 from .ui import callbacks
+from .constants import NUMBER_OF_FACE_LODS
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -122,6 +123,21 @@ class ShapeKeyData(bpy.types.PropertyGroup):
     ) # type: ignore
 
 
+class FingerprintData(bpy.types.PropertyGroup):
+    name: bpy.props.StringProperty(
+        default='',
+        description='The name of the mesh or armature the fingerprint belongs to',
+    ) # type: ignore
+    value: bpy.props.StringProperty(
+        default='',
+        description='A hash of the mesh or armature data that matches the data in the DNA file',
+    ) # type: ignore
+    dna_hash: bpy.props.StringProperty(
+        default='',
+        description='The content hash of the DNA file that the fingerprint was recorded against',
+    ) # type: ignore
+
+
 class RigLogicInstance(bpy.types.PropertyGroup):
     name: bpy.props.StringProperty(
         default='my_metahuman',
@@ -183,6 +199,12 @@ class RigLogicInstance(bpy.types.PropertyGroup):
     ) # type: ignore
 
     # ----- View Options Properties -----
+    deferred_lods: bpy.props.BoolVectorProperty(
+        name="Deferred LODs",
+        size=NUMBER_OF_FACE_LODS,
+        default=[False] * NUMBER_OF_FACE_LODS,
+        description="The LODs that have not been built yet and will be streamed in from the DNA file when needed"
+    ) # type: ignore
     active_lod: bpy.props.EnumProperty(
         name="Active LOD",
         items=callbacks.get_head_mesh_lod_items,
@@ -368,6 +390,7 @@ class RigLogicInstance(bpy.types.PropertyGroup):
     calibrate_bones: bpy.props.BoolProperty(default=True) # type: ignore
     calibrate_meshes: bpy.props.BoolProperty(default=True) # type: ignore
     calibrate_shape_keys: bpy.props.BoolProperty(default=True) # type: ignore
+    fingerprint_list: bpy.props.CollectionProperty(type=FingerprintData) # type: ignore
 
     # this holds the rig logic references
     data = {}
@@ -383,6 +406,24 @@ class RigLogicInstance(bpy.types.PropertyGroup):
         except ReferenceError:
             return None
     
+    def get_fingerprint(self, name: str, dna_hash: str | None = None) -> str | None:
+        """
+        Gets the fingerprint recorded for the object. When a DNA hash is given, the fingerprint is 
+        only returned if it was recorded against a DNA file with that content.
+        """
+        item = self.fingerprint_list.get(name)
+        if not item or (dna_hash is not None and item.dna_hash != dna_hash):
+            return None
+        return item.value
+
+    def set_fingerprint(self, name: str, value: str, dna_hash: str = ''):
+        item = self.fingerprint_list.get(name)
+        if not item:
+            item = self.fingerprint_list.add()
+            item.name = name
+        item.value = value
+        item.dna_hash = dna_hash
+
     def get_shape_key_block(self, mesh_index: int, name: str) -> bpy.types.ShapeKey | None:
         cached_shape_key = self.get_shape_key(mesh_index)
         if cached_shape_key and cached_shape_key.key_blocks:
@@ -49,6 +49,17 @@ class MetaHumanDnaPreferences(MetahumanDnaAddonProperties, bpy.types.AddonPrefer
             icon="REMOVE",
         )
 
+        row = self.layout.row()
+        row.prop(self, "use_geometry_cache")
+        row = self.layout.row()
+        row.enabled = self.use_geometry_cache
+        row.prop(self, "geometry_cache_folder")
+        row = self.layout.row()
+        row.enabled = self.use_geometry_cache
+        row.prop(self, "geometry_cache_max_size")
+        row = self.layout.row()
+        row.prop(self, "fsync_dna_files")
+
 
 def register():
     bpy.utils.register_class(ExtraDnaFolder)
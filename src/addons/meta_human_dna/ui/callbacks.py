@@ -274,6 +274,13 @@ def set_bake_end_frame(self, value):
 
 def set_active_lod(self, value):
     self['active_lod'] = value
+    # build the LOD meshes from the DNA file the first time a deferred LOD is displayed
+    if 0 <= value < len(self.deferred_lods) and self.deferred_lods[value]:
+        from ..utilities import get_face
+        face = get_face(self.name)
+        if face:
+            face.stream_lod(value)
+
     for scene_object in bpy.context.scene.objects: # type: ignore
         if scene_object.name.startswith(self.name) and scene_object.type == 'MESH':
             ignored_names = [
@@ -519,7 +526,9 @@ def get_head_mesh_lod_items(self, context):
             for i in range(NUMBER_OF_FACE_LODS):
                 head_mesh = bpy.data.objects.get(f'{instance.name}_head_lod{i}_mesh')
                 if head_mesh:
-                    items.append((f'lod{i}', f'LOD {i}', f'Displays only LOD {i}'))
+                    items.append((f'lod{i}', f'LOD {i}', f'Displays only LOD {i}', 'NONE', i))
+                elif instance.deferred_lods[i]:
+                    items.append((f'lod{i}', f'LOD {i} (Not Loaded)', f'Streams in LOD {i} from the DNA file and displays only it', 'NONE', i))
     except AttributeError:
         pass
 
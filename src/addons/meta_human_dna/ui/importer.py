@@ -59,6 +59,7 @@ class META_HUMAN_DNA_LODS_PT_panel(bpy.types.Panel):
                 row.enabled = False
             row.prop(operator, f"import_lod{i}")
             row = layout.row()
+        row.prop(operator, "defer_unselected_lods")
 
 class META_HUMAN_DNA_EXTRAS_PT_panel(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
@@ -99,6 +100,11 @@ class META_HUMAN_DNA_EXTRAS_PT_panel(bpy.types.Panel):
             row.alert = True
             row.label(text=path_error, icon='ERROR')
 
+        row = layout.row()
+        row.prop(operator, "write_import_report")
+        row = layout.row()
+        row.prop(operator, "print_import_report")
+
 
 class META_HUMAN_DNA_FILE_INFO_PT_panel(bpy.types.Panel):
     bl_space_type = 'FILE_BROWSER'
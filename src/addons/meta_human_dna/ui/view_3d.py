@@ -303,6 +303,8 @@ class META_HUMAN_DNA_PT_armature_utilities_sub_panel(bpy.types.Panel):
             row = self.layout.row()
             row.operator('meta_human_dna.mirror_selected_bones', text='Mirror Selected Bones')
             row = self.layout.row()
+            row.prop(properties, 'auto_fit_changed_only')
+            row = self.layout.row()
             split = row.split(factor=0.5)
             split.scale_y = 1.5
             split.operator('meta_human_dna.auto_fit_selected_bones', text='Auto Fit')
@@ -341,6 +343,8 @@ class META_HUMAN_DNA_PT_utilities_sub_panel(bpy.types.Panel):
         row = self.layout.row()
         row.scale_y = 1.5
         row.operator('meta_human_dna.convert_selected_to_dna', icon='RNA_ADD')
+        row = self.layout.row()
+        row.operator('meta_human_dna.compare_dna', icon='ARROW_LEFTRIGHT')
 
 
 class META_HUMAN_DNA_PT_view_options(bpy.types.Panel):
@@ -483,7 +487,10 @@ class META_HUMAN_DNA_PT_shape_keys(bpy.types.Panel):
                 
         if context.window_manager.meta_human_dna.progress < 1: # type: ignore
             row = self.layout.row()
-            row.label(text=f'Importing onto "{context.window_manager.meta_human_dna.progress_mesh_name}"...', icon='SORTTIME') # type: ignore
+            row.label(
+                text=context.window_manager.meta_human_dna.progress_title or f'Importing onto "{context.window_manager.meta_human_dna.progress_mesh_name}"...', # type: ignore
+                icon='SORTTIME'
+            )
             row = self.layout.row()
             row.progress(
                 factor=context.window_manager.meta_human_dna.progress, # type: ignore
@@ -3,4 +3,6 @@ from .action import * # noqa: F403
 from .armature import * # noqa: F403
 from .material import * # noqa: F403
 from .mesh import * # noqa: F403
-from .unreal import * # noqa: F403
\ No newline at end of file
+from .unreal import * # noqa: F403
+from .profiler import * # noqa: F403
+from .files import * # noqa: F403
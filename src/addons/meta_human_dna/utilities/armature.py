@@ -1,8 +1,10 @@
 import bpy
 import json
 import math
-import bmesh
+import hashlib
 import logging
+import numpy as np
+from pathlib import Path
 from typing import Literal
 from mathutils import Vector, Matrix, Euler
 from .misc import (
@@ -14,16 +16,51 @@ from .misc import (
 )
 from .mesh import (
     get_vertex_group_vertices,
-    update_vertex_positions
+    get_vertex_group_index,
+    update_vertex_positions,
+    get_mesh_vertex_data,
+    get_evaluated_vertex_positions_array,
+    find_closest_vertex_indices
 )
 from ..constants import ( 
     CUSTOM_BONE_SHAPE_NAME, 
-    CUSTOM_BONE_SHAPE_SCALE
+    CUSTOM_BONE_SHAPE_SCALE,
+    FLOATING_POINT_PRECISION,
+    AUTO_FIT_MAX_CHANGED_VERTEX_RATIO
 )
 
 
 logger = logging.getLogger(__name__)
 
+# the mesh vertex positions at the last auto fit by mesh object name. Rows are NaN until
+# the bone that their vertex is mapped to has been fit
+_fitted_vertex_positions: dict[str, np.ndarray] = {}
+# the bone selection of the last auto fit by mesh object name, None when all the bones were fit
+_fitted_bone_selections: dict[str, set[str] | None] = {}
+# the fitted bone heads in armature space by armature object name and bone name
+_fitted_bone_heads: dict[str, dict[str, np.ndarray]] = {}
+
+def get_armature_fingerprint(armature_object: bpy.types.Object) -> str:
+    """
+    Hashes the bone names, hierarchy and rest matrices of the armature.
+
+    Args:
+        armature_object (bpy.types.Object): The armature object.
+
+    Returns:
+        str: The hex digest of the armature data.
+    """
+    matrices = get_bone_matrices(armature_object)
+    bones = armature_object.data.bones # type: ignore
+
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(matrices.tobytes())
+    hasher.update('|'.join(
+        f'{bone.name}:{bone.parent.name if bone.parent else ""}' for bone in bones
+    ).encode())
+    return hasher.hexdigest()
+
+
 def get_bone_rest_transformations(
         bone: bpy.types.Bone, 
         force_object_space: bool = False
@@ -45,6 +82,183 @@ def get_bone_rest_transformations(
 
     return rest_location, rest_rotation.to_euler('XYZ'), rest_scale, rest_to_parent_matrix # type: ignore
 
+def get_joint_depths(parent_indices: np.ndarray) -> np.ndarray:
+    """
+    Gets the depth of each joint in the hierarchy. Roots are joints that are their 
+    own parent (or have a negative parent index) and have a depth of 0.
+
+    Args:
+        parent_indices (np.ndarray): The parent index of each joint.
+
+    Returns:
+        np.ndarray: The depth of each joint.
+    """
+    parent_indices = np.asarray(parent_indices, dtype=np.int64)
+    joint_indices = np.arange(len(parent_indices))
+    roots = (parent_indices == joint_indices) | (parent_indices < 0)
+    parents = np.where(roots, joint_indices, parent_indices)
+
+    depths = np.full(len(parent_indices), -1, dtype=np.int32)
+    depths[roots] = 0
+    frontier = roots
+    level = 0
+    # walk down the hierarchy one level at a time, so this is O(depth) array operations
+    while frontier.any():
+        level += 1
+        frontier = (depths == -1) & frontier[parents]
+        depths[frontier] = level
+
+    if (depths == -1).any():
+        raise ValueError('The joint hierarchy contains a cycle or an invalid parent index.')
+    return depths
+
+
+def get_euler_xyz_rotation_matrices(rotations: np.ndarray) -> np.ndarray:
+    """
+    Converts an array of XYZ euler rotations in radians into 3x3 rotation matrices. This 
+    matches the result of mathutils.Euler(rotation, 'XYZ').to_matrix().
+
+    Args:
+        rotations (np.ndarray): A (N, 3) array of euler rotations in radians.
+
+    Returns:
+        np.ndarray: A (N, 3, 3) array of rotation matrices.
+    """
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+    cos_x, cos_y, cos_z = np.cos(rotations).T
+    sin_x, sin_y, sin_z = np.sin(rotations).T
+
+    matrices = np.empty((len(rotations), 3, 3), dtype=np.float64)
+    matrices[:, 0, 0] = cos_y * cos_z
+    matrices[:, 0, 1] = sin_x * sin_y * cos_z - cos_x * sin_z
+    matrices[:, 0, 2] = cos_x * sin_y * cos_z + sin_x * sin_z
+    matrices[:, 1, 0] = cos_y * sin_z
+    matrices[:, 1, 1] = sin_x * sin_y * sin_z + cos_x * cos_z
+    matrices[:, 1, 2] = cos_x * sin_y * sin_z - sin_x * cos_z
+    matrices[:, 2, 0] = -sin_y
+    matrices[:, 2, 1] = sin_x * cos_y
+    matrices[:, 2, 2] = cos_x * cos_y
+    return matrices
+
+
+def get_joint_local_matrices(translations: np.ndarray, rotations: np.ndarray) -> np.ndarray:
+    """
+    Builds the parent space matrices of the joints from their translations and XYZ euler 
+    rotations in radians.
+
+    Args:
+        translations (np.ndarray): A (N, 3) array of translations.
+        rotations (np.ndarray): A (N, 3) array of euler rotations in radians.
+
+    Returns:
+        np.ndarray: A (N, 4, 4) array of matrices.
+    """
+    translations = np.asarray(translations, dtype=np.float64).reshape(-1, 3)
+    matrices = np.zeros((len(translations), 4, 4), dtype=np.float64)
+    matrices[:, :3, :3] = get_euler_xyz_rotation_matrices(rotations)
+    matrices[:, :3, 3] = translations
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def get_joint_world_matrices(
+        parent_indices: np.ndarray,
+        translations: np.ndarray,
+        rotations: np.ndarray,
+        root_matrix: Matrix | None = None,
+        depths: np.ndarray | None = None
+    ) -> np.ndarray:
+    """
+    Calculates the world space matrices of all the joints in a hierarchy. The joints are 
+    processed one hierarchy level at a time, so each level is a single batched matrix multiply.
+
+    Args:
+        parent_indices (np.ndarray): The parent index of each joint.
+        translations (np.ndarray): A (N, 3) array of parent space translations.
+        rotations (np.ndarray): A (N, 3) array of parent space euler rotations in radians.
+        root_matrix (Matrix | None, optional): A matrix to pre-multiply the roots with. Defaults to None.
+        depths (np.ndarray | None, optional): Precomputed joint depths. Defaults to None.
+
+    Returns:
+        np.ndarray: A (N, 4, 4) array of world space matrices.
+    """
+    parent_indices = np.asarray(parent_indices, dtype=np.int64)
+    if depths is None:
+        depths = get_joint_depths(parent_indices)
+
+    local_matrices = get_joint_local_matrices(translations, rotations)
+    world_matrices = np.empty_like(local_matrices)
+
+    roots = depths == 0
+    if root_matrix is not None:
+        world_matrices[roots] = np.array(root_matrix, dtype=np.float64) @ local_matrices[roots]
+    else:
+        world_matrices[roots] = local_matrices[roots]
+
+    for level in range(1, int(depths.max(initial=0)) + 1):
+        indices = np.flatnonzero(depths == level)
+        world_matrices[indices] = world_matrices[parent_indices[indices]] @ local_matrices[indices]
+
+    return world_matrices
+
+
+def get_rotation_matrices_euler_xyz(matrices: np.ndarray) -> np.ndarray:
+    """
+    Converts an array of 3x3 rotation matrices into XYZ euler rotations in radians. This 
+    matches the result of mathutils.Matrix.to_euler('XYZ'), including the choice between 
+    the two equivalent solutions.
+
+    Args:
+        matrices (np.ndarray): A (N, 3, 3) array of normalized rotation matrices.
+
+    Returns:
+        np.ndarray: A (N, 3) array of euler rotations in radians.
+    """
+    matrices = np.asarray(matrices, dtype=np.float64).reshape(-1, 3, 3)
+    cos_y = np.hypot(matrices[:, 0, 0], matrices[:, 1, 0])
+    locked = cos_y <= 16 * np.finfo(np.float32).eps
+
+    first = np.column_stack((
+        np.where(
+            locked, 
+            np.arctan2(-matrices[:, 1, 2], matrices[:, 1, 1]), 
+            np.arctan2(matrices[:, 2, 1], matrices[:, 2, 2])
+        ),
+        np.arctan2(-matrices[:, 2, 0], cos_y),
+        np.where(locked, 0.0, np.arctan2(matrices[:, 1, 0], matrices[:, 0, 0]))
+    ))
+    second = np.column_stack((
+        np.arctan2(-matrices[:, 2, 1], -matrices[:, 2, 2]),
+        np.arctan2(-matrices[:, 2, 0], -cos_y),
+        np.arctan2(-matrices[:, 1, 0], -matrices[:, 0, 0])
+    ))
+    # like blender, use the solution with the smallest rotation
+    use_second = ~locked & (np.abs(first).sum(axis=1) > np.abs(second).sum(axis=1))
+    return np.where(use_second[:, None], second, first)
+
+
+def get_bone_matrices(armature_object: bpy.types.Object) -> np.ndarray:
+    """
+    Gets the armature space rest matrices of all the bones in a single read, without 
+    switching to edit mode.
+
+    Args:
+        armature_object (bpy.types.Object): The armature object.
+
+    Returns:
+        np.ndarray: A (N, 4, 4) array of bone matrices in the order of the armature bones.
+    """
+    # make sure the bones reflect any changes made in edit mode
+    if armature_object.mode == 'EDIT':
+        armature_object.update_from_editmode()
+
+    bones = armature_object.data.bones # type: ignore
+    matrices = np.empty(len(bones) * 16, dtype=np.float32)
+    bones.foreach_get('matrix_local', matrices)
+    # the matrices are stored column major
+    return matrices.reshape(-1, 4, 4).transpose(0, 2, 1).astype(np.float64)
+
+
 def get_bone_shape(name: str = CUSTOM_BONE_SHAPE_NAME):
     rotations = [
         [90, 0, 0],
@@ -192,18 +406,35 @@ def get_closet_vertex_to_bone(
         pose_bone: bpy.types.PoseBone,
         max_distance: float = 0.01
     ) -> bpy.types.MeshVertex | None:
-    # get the bone applied position not the pose position
-    bone = pose_bone.id_data.data.bones[pose_bone.name]
-    position = mesh_object.matrix_world.inverted() @ bone.head_local
-    vert = min(
-        mesh_object.data.vertices,  # type: ignore
-        key=lambda vert: (position - vert.co).length_squared
+    index = get_closet_vertex_indices_to_bones(
+        mesh_object=mesh_object, 
+        pose_bones=[pose_bone], 
+        max_distance=max_distance,
+        rest_position=True
+    ).get(pose_bone.name)
+    if index is not None:
+        return mesh_object.data.vertices[index] # type: ignore
+
+
+def get_ray_cast_normals(
+        mesh_object: bpy.types.Object, 
+        pose_bones: list[bpy.types.PoseBone],
+        max_distance: float = 0.01
+    ) -> dict[str, Vector]:
+    """
+    Gets the world space normal of the closest vertex to each bone's rest position.
+    """
+    bone_to_vert_index = get_closet_vertex_indices_to_bones(
+        mesh_object=mesh_object, 
+        pose_bones=pose_bones, 
+        max_distance=max_distance,
+        rest_position=True
     )
-    distance = (position - vert.co).length_squared
-    # only return the vertex if it is within the max distance
-    if distance < max_distance:
-        return vert
-    logger.warning(f'Vertex {vert.index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
+    vertices = mesh_object.data.vertices # type: ignore
+    return {
+        bone_name: mesh_object.matrix_world @ vertices[index].normal
+        for bone_name, index in bone_to_vert_index.items()
+    }
 
 
 def get_ray_cast_normal(
@@ -211,59 +442,66 @@ def get_ray_cast_normal(
         pose_bone: bpy.types.PoseBone,
         max_distance: float = 0.01
     ) -> Vector | None:
-    vertex = get_closet_vertex_to_bone(mesh_object, pose_bone, max_distance)
-    if vertex:
-        return mesh_object.matrix_world @ vertex.normal
+    return get_ray_cast_normals(mesh_object, [pose_bone], max_distance).get(pose_bone.name)
 
 
 def get_vertex_positions(
         mesh_object: bpy.types.Object, 
         bone_to_vert_index: dict[str, int]
     ) -> dict[str, Vector]:
-    positions = {}
-    depsgraph = bpy.context.evaluated_depsgraph_get() # type: ignore
-    bmesh_object = bmesh.new()
-    bmesh_object.from_object(mesh_object, depsgraph)
-    bmesh_object.verts.ensure_lookup_table()
-    
-    for bone_name, index in bone_to_vert_index.items():
-        positions[bone_name] = bmesh_object.verts[index].co
-    
-    bmesh_object.free()
-    
-    return positions
+    """
+    Gets the evaluated object space positions of the given vertex indices.
+    """
+    positions = get_evaluated_vertex_positions_array(mesh_object)
+    return {
+        bone_name: Vector(positions[index].tolist())
+        for bone_name, index in bone_to_vert_index.items()
+    }
+
 
 def get_closet_vertex_indices_to_bones(
         mesh_object: bpy.types.Object, 
         pose_bones: list[bpy.types.PoseBone],
-        max_distance: float = 0.01
+        max_distance: float = 0.01,
+        rest_position: bool = False
     ) -> dict[str, int]:
-    bone_to_vert_index = {}
+    """
+    Gets the index of the closest vertex to each bone. All the bones are queried in one pass 
+    against the mesh's cached spatial index.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        pose_bones (list[bpy.types.PoseBone]): The pose bones.
+        max_distance (float, optional): The max squared distance of a vertex. Defaults to 0.01.
+        rest_position (bool, optional): Whether to search from the bone rest positions against the 
+            mesh data, rather than from the posed positions against the evaluated mesh. Defaults to False.
+
+    Returns:
+        dict[str, int]: The vertex index of each bone that has one within the max distance.
+    """
+    if not pose_bones:
+        return {}
 
-    # initialize the bmesh object to evaluate against the current depsgraph so 
-    # we get the correct vertex positions with taking into account modifiers
-    depsgraph = bpy.context.evaluated_depsgraph_get() # type: ignore
-    bmesh_object = bmesh.new()
-    bmesh_object.from_object(mesh_object, depsgraph)
-    bmesh_object.verts.ensure_lookup_table()
-
-    for pose_bone in pose_bones:
-        position = pose_bone.matrix.translation
-        vert = min(
-            bmesh_object.verts,  # type: ignore
-            key=lambda vert: (position - vert.co).length_squared
-        )
-        # only return the vertex if it is within the max distance
-        distance = (position - vert.co).length_squared
-        if distance < max_distance:
-            bone_to_vert_index[pose_bone.name] = vert.index
-        else:
-            logger.warning(f'Vertex {vert.index} is too far from bone "{pose_bone.name}":\n{distance} > {max_distance}')
+    if rest_position:
+        bones = pose_bones[0].id_data.data.bones
+        matrix = mesh_object.matrix_world.inverted()
+        positions = [matrix @ bones[pose_bone.name].head_local for pose_bone in pose_bones]
+    else:
+        # the evaluated mesh takes into account the modifiers
+        positions = [pose_bone.matrix.translation for pose_bone in pose_bones]
 
-    bmesh_object.free()
+    indices, distances = find_closest_vertex_indices(mesh_object, positions, evaluated=not rest_position)
 
+    bone_to_vert_index = {}
+    for pose_bone, index, distance in zip(pose_bones, indices.tolist(), distances.tolist()):
+        # only return the vertex if it is within the max distance
+        if index >= 0 and distance * distance < max_distance:
+            bone_to_vert_index[pose_bone.name] = index
+        else:
+            logger.warning(f'Vertex {index} is too far from bone "{pose_bone.name}":\n{distance * distance} > {max_distance}')
     return bone_to_vert_index
 
+
 def get_matching_vertex_index_location(
         source_mesh_object: bpy.types.Object, 
         target_mesh_object: bpy.types.Object, 
@@ -280,28 +518,16 @@ def get_matching_vertex_index_location(
 
     vertex_positions = get_vertex_positions(
         mesh_object=target_mesh_object,
-        vert_pairs=[('', vertex.index)] # type: ignore
+        bone_to_vert_index={pose_bone.name: vertex.index}
     )
-
-    # return target_mesh_object.matrix_world @ target_mesh_object.data.vertices[vertex.index].co   # type: ignore
-    return target_mesh_object.matrix_world @ vertex_positions[0][-1]
+    return target_mesh_object.matrix_world @ vertex_positions[pose_bone.name]
 
 
 def get_weighted_bone_names(mesh_object: bpy.types.Object) -> list[str]:
     """
     Gets the names of the bones that are weighted to the given mesh.
     """
-    weighted_bones = set()
-
-    # Iterate over all vertices in the mesh
-    for vertex in mesh_object.data.vertices: # type: ignore
-        for group in vertex.groups:
-            # Get the vertex group (bone) name
-            bone_name = mesh_object.vertex_groups[group.group].name
-            # Add the bone name to the set
-            weighted_bones.add(bone_name)
-
-    return list(weighted_bones)
+    return get_vertex_group_index(mesh_object).get_weighted_group_names()
 
 
 @exclude_rig_logic_evaluation
@@ -343,16 +569,30 @@ def get_topology_group_surface_bones(
         mesh_object: bpy.types.Object,
         armature_object: bpy.types.Object,
         vertex_group_name: str,
-        dna_reader
+        dna_reader,
+        dna_file_path: Path | None = None
     ) -> list[bpy.types.Bone]:
-    from ..bindings import meta_human_dna_core
-    bones = []
-    vertex_indices = get_vertex_group_vertices(mesh_object, vertex_group_name)
-    vertex_to_bone_name = meta_human_dna_core.calculate_vertex_to_bone_name_mapping(
-        dna_reader=dna_reader
+    """
+    Gets the bones that are mapped to the vertices in the topology group. The vertices are always 
+    read from the vertex group on the mesh. When the DNA file path is given, the vertex to bone 
+    mapping is read from the cache instead of being calculated again.
+    """
+    if dna_file_path and Path(dna_file_path).exists():
+        from ..dna_io import get_vertex_to_bone_name_mapping
+        vertex_to_bone_name = get_vertex_to_bone_name_mapping(dna_file_path, dna_reader)
+    else:
+        from ..bindings import meta_human_dna_core
+        vertex_to_bone_name = meta_human_dna_core.calculate_vertex_to_bone_name_mapping(
+            dna_reader=dna_reader
+        )
+
+    bone_names = dict.fromkeys(
+        vertex_to_bone_name.get(vertex_index, None)
+        for vertex_index in get_vertex_group_vertices(mesh_object, vertex_group_name)
     )
-    for vertex_index in vertex_indices:
-        bone_name = vertex_to_bone_name.get(vertex_index, None)
+
+    bones = []
+    for bone_name in bone_names:
         if bone_name:
             bone = armature_object.data.bones.get(bone_name) # type: ignore
             if bone:
@@ -387,23 +627,157 @@ def get_ignored_bones_names(armature_object: bpy.types.Object) -> list[str]:
     mouth_bone_names = get_mouth_bone_names(armature_object)
     return mouth_bone_names + meta_human_dna_core.EYE_BALL_L_BONES + meta_human_dna_core.EYE_BALL_R_BONES
 
+def get_changed_auto_fit_bone_names(
+        mesh_object: bpy.types.Object,
+        armature_object: bpy.types.Object,
+        vertex_positions: np.ndarray,
+        dna_file_path: Path | None,
+        selected_bone_names: list[str] | None = None,
+        dna_reader=None
+    ) -> list[str] | None:
+    """
+    Gets the bones that need to be fit again. These are the bones mapped to vertices that moved 
+    or were never fit, and the bones that were moved since they were fit.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        armature_object (bpy.types.Object): The armature object.
+        vertex_positions (np.ndarray): The current (N, 3) vertex positions.
+        dna_file_path (Path | None): The DNA file that the vertex to bone mapping comes from.
+        selected_bone_names (list[str] | None, optional): The bones to fit. Defaults to None, which is all the bones.
+        dna_reader (optional): A reader of the DNA file. Defaults to None.
+
+    Returns:
+        list[str] | None: The changed bone names, or None if all the given bones must be fit, because there 
+        is no previous fit, the topology or bone selection changed, or too much of the mesh moved.
+    """
+    previous_positions = _fitted_vertex_positions.get(mesh_object.name)
+    if previous_positions is None or previous_positions.shape != vertex_positions.shape:
+        return None
+    if not dna_file_path or not Path(dna_file_path).exists():
+        return None
+    selection = set(selected_bone_names) if selected_bone_names is not None else None
+    if selection != _fitted_bone_selections.get(mesh_object.name):
+        return None
+
+    fitted = ~np.isnan(previous_positions[:, 0])
+    moved = np.any(np.abs(vertex_positions - previous_positions) > FLOATING_POINT_PRECISION, axis=1)
+    if np.count_nonzero(moved & fitted) > np.count_nonzero(fitted) * AUTO_FIT_MAX_CHANGED_VERTEX_RATIO:
+        return None
+
+    from ..dna_io import get_vertex_to_bone_name_mapping
+    vertex_to_bone_name = get_vertex_to_bone_name_mapping(dna_file_path, dna_reader)
+    bone_names = (vertex_to_bone_name.get(index) for index in np.flatnonzero(moved | ~fitted).tolist())
+    changed_bone_names = dict.fromkeys(name for name in bone_names if name)
+
+    # the bones that were moved by hand since they were fit
+    fitted_bone_heads = _fitted_bone_heads.get(armature_object.name, {})
+    for bone in armature_object.data.bones: # type: ignore
+        fitted_head = fitted_bone_heads.get(bone.name)
+        if fitted_head is not None and np.any(np.abs(np.array(bone.head_local) - fitted_head) > FLOATING_POINT_PRECISION):
+            changed_bone_names[bone.name] = None
+
+    if selection is not None:
+        return [name for name in changed_bone_names if name in selection]
+    return list(changed_bone_names)
+
+
+def save_auto_fit_state(
+        mesh_object: bpy.types.Object,
+        armature_object: bpy.types.Object,
+        fitted_bone_names: list[str],
+        bone_heads: dict[str, np.ndarray],
+        selected_bone_names: list[str] | None,
+        dna_file_path: Path | None,
+        dna_reader=None
+    ):
+    """
+    Saves the vertex positions and bone heads after an auto fit. Only the vertices that are mapped
+    to the fitted bones are marked as fitted, so the vertices of the other bones are still refit later.
+    """
+    vertex_positions = get_mesh_vertex_data(mesh_object)[1]
+    previous_positions = _fitted_vertex_positions.get(mesh_object.name)
+    if previous_positions is None or previous_positions.shape != vertex_positions.shape:
+        previous_positions = np.full(vertex_positions.shape, np.nan, dtype=vertex_positions.dtype)
+
+    if dna_file_path and Path(dna_file_path).exists():
+        from ..dna_io import get_vertex_to_bone_name_mapping
+        vertex_to_bone_name = get_vertex_to_bone_name_mapping(dna_file_path, dna_reader)
+        fitted_bone_name_set = set(fitted_bone_names)
+        # vertices that are not mapped to a bone never need a fit
+        rows = np.ones(len(vertex_positions), dtype=bool)
+        rows[[
+            index for index, bone_name in vertex_to_bone_name.items() 
+            if index < len(rows) and bone_name not in fitted_bone_name_set
+        ]] = False
+        previous_positions[rows] = vertex_positions[rows]
+    else:
+        previous_positions = vertex_positions
+
+    _fitted_vertex_positions[mesh_object.name] = previous_positions
+    _fitted_bone_selections[mesh_object.name] = set(selected_bone_names) if selected_bone_names is not None else None
+    _fitted_bone_heads.setdefault(armature_object.name, {}).update(bone_heads)
+
+
+def clear_auto_fit_state():
+    _fitted_vertex_positions.clear()
+    _fitted_bone_selections.clear()
+    _fitted_bone_heads.clear()
+
+
 @preserve_context
 def auto_fit_bones(
         mesh_object: bpy.types.Object, 
         armature_object: bpy.types.Object,
         dna_reader,
-        only_selected: bool = False
-    ):
+        only_selected: bool = False,
+        changed_only: bool = False,
+        dna_file_path: Path | None = None
+    ) -> list[str]:
+    """
+    Fits the bones to the mesh.
+
+    Args:
+        mesh_object (bpy.types.Object): The head mesh object.
+        armature_object (bpy.types.Object): The head armature object.
+        dna_reader: A reader of the DNA file.
+        only_selected (bool, optional): Whether to only fit the selected bones. Defaults to False.
+        changed_only (bool, optional): Whether to only fit the bones near the vertices that moved 
+            since the last fit. This falls back to a full fit when that can't be determined. Defaults to False.
+        dna_file_path (Path | None, optional): The DNA file, which is needed to fit only the changed bones. Defaults to None.
+
+    Returns:
+        list[str]: The names of the bones that were fit.
+    """
     import meta_human_dna_core
     from ..dna_io import DNAExporter
-    bmesh_object = DNAExporter.get_bmesh(mesh_object, rotation=0)
-    vertex_indices, vertex_positions = DNAExporter.get_mesh_vertex_positions(bmesh_object)
-    bone_data = DNAExporter.get_bone_transforms(armature_object)
-    bmesh_object.free()
+    # the vertex data is handed to the core module as arrays straight from foreach_get
+    vertex_indices, vertex_positions = get_mesh_vertex_data(mesh_object)
 
     bone_names = []
+    selected_bone_names = None
     if only_selected:
         bone_names = [bone.name for bone in bpy.context.selected_pose_bones] # type: ignore
+        selected_bone_names = list(bone_names)
+
+    if changed_only:
+        changed_bone_names = get_changed_auto_fit_bone_names(
+            mesh_object=mesh_object, 
+            armature_object=armature_object,
+            vertex_positions=vertex_positions, 
+            dna_file_path=dna_file_path, 
+            selected_bone_names=selected_bone_names,
+            dna_reader=dna_reader
+        )
+        if changed_bone_names is None:
+            logger.info('Fitting all the bones, since the changed vertices could not be determined.')
+        else:
+            logger.info(f'Fitting {len(changed_bone_names)} bones near the vertices that moved since the last fit.')
+            if not changed_bone_names:
+                return []
+            bone_names = changed_bone_names
+
+    bone_data = DNAExporter.get_bone_transforms(armature_object)
 
     switch_to_bone_edit_mode(armature_object)
     result = meta_human_dna_core.calculate_fitted_bone_positions(
@@ -419,22 +793,59 @@ def auto_fit_bones(
         factor=1.0,
         only_bone_names=bone_names, # type: ignore
     )
-    for bone_name, (head, tail) in result['bone_positions'].items():
-        edit_bone = armature_object.data.edit_bones.get(bone_name) # type: ignore
-        if edit_bone:
-            edit_bone.head = Vector(head)
-            edit_bone.tail = Vector(tail)
-    for bone_name, delta in result['bone_deltas']:
-        edit_bone = armature_object.data.edit_bones.get(bone_name) # type: ignore
-        if edit_bone:
-            edit_bone.head += Vector(delta)
-            edit_bone.tail += Vector(delta)
+
+    edit_bones = armature_object.data.edit_bones # type: ignore
+    heads = np.empty(len(edit_bones) * 3, dtype=np.float32)
+    tails = np.empty(len(edit_bones) * 3, dtype=np.float32)
+    edit_bones.foreach_get('head', heads)
+    edit_bones.foreach_get('tail', tails)
+    heads = heads.reshape(-1, 3)
+    tails = tails.reshape(-1, 3)
+    bone_indices = {name: index for index, name in enumerate(edit_bones.keys())}
+
+    positions = [
+        (bone_indices[bone_name], head, tail) 
+        for bone_name, (head, tail) in result['bone_positions'].items() 
+        if bone_name in bone_indices
+    ]
+    if positions:
+        indices, head_positions, tail_positions = zip(*positions)
+        heads[list(indices)] = head_positions
+        tails[list(indices)] = tail_positions
+
+    deltas = [
+        (bone_indices[bone_name], delta) 
+        for bone_name, delta in result['bone_deltas'] 
+        if bone_name in bone_indices
+    ]
+    if deltas:
+        indices, offsets = zip(*deltas)
+        np.add.at(heads, list(indices), np.asarray(offsets, dtype=np.float32))
+        np.add.at(tails, list(indices), np.asarray(offsets, dtype=np.float32))
+
+    edit_bones.foreach_set('head', heads.ravel())
+    edit_bones.foreach_set('tail', tails.ravel())
+
     for data in result['mesh_deltas']:
         update_vertex_positions(
             mesh_object=bpy.data.objects[data['name']],
             vertex_indices=data['vertex_indices'],
             offset=Vector(data['offset'])
         )
-    
 
-    
\ No newline at end of file
+    fitted_bone_names = list(result['bone_positions'].keys())
+    # the next fit only needs to refit the bones near vertices that move after this
+    save_auto_fit_state(
+        mesh_object=mesh_object,
+        armature_object=armature_object,
+        fitted_bone_names=fitted_bone_names,
+        bone_heads={
+            bone_name: heads[bone_indices[bone_name]].copy() 
+            for bone_name in fitted_bone_names + [bone_name for bone_name, _ in result['bone_deltas']]
+            if bone_name in bone_indices
+        },
+        selected_bone_names=selected_bone_names,
+        dna_file_path=dna_file_path,
+        dna_reader=dna_reader
+    )
+    return fitted_bone_names
\ No newline at end of file
@@ -0,0 +1,196 @@
+import os
+import sys
+import shutil
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from ..constants import FILE_COPY_MAX_WORKERS, FILE_HASH_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+# the linux ioctl request that clones a file's extents on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+
+class FileSyncReport:
+    """
+    Tallies the files and bytes that were written, linked, or skipped because they were unchanged.
+    """
+    def __init__(self):
+        self.files_written = 0
+        self.files_linked = 0
+        self.files_skipped = 0
+        self.bytes_written = 0
+        self.bytes_linked = 0
+        self.bytes_skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, action: str, size: int):
+        with self._lock:
+            setattr(self, f'files_{action}', getattr(self, f'files_{action}') + 1)
+            setattr(self, f'bytes_{action}', getattr(self, f'bytes_{action}') + size)
+
+    def get_summary(self) -> str:
+        megabyte = 1024 * 1024
+        return (
+            f'{self.files_written} files written ({self.bytes_written / megabyte:.2f}MB), '
+            f'{self.files_linked} linked ({self.bytes_linked / megabyte:.2f}MB), '
+            f'{self.files_skipped} skipped ({self.bytes_skipped / megabyte:.2f}MB)'
+        )
+
+
+def get_file_hash(file_path: Path) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(FILE_HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_file_unchanged(source: Path, destination: Path, compare_hashes: bool = True) -> bool:
+    """
+    Checks whether the destination already has the same content as the source. The file stats
+    are compared first, and the contents are only hashed when the sizes match but the times do not.
+
+    Args:
+        source (Path): The source file.
+        destination (Path): The destination file.
+        compare_hashes (bool, optional): Whether to hash the files when the stats are inconclusive. Defaults to True.
+
+    Returns:
+        bool: Whether the destination is unchanged.
+    """
+    try:
+        source_stat = os.stat(source)
+        destination_stat = os.stat(destination)
+    except FileNotFoundError:
+        return False
+
+    if source_stat.st_size != destination_stat.st_size:
+        return False
+    # a hard link, or a copy that kept the modification time
+    if (source_stat.st_dev, source_stat.st_ino) == (destination_stat.st_dev, destination_stat.st_ino):
+        return True
+    if source_stat.st_mtime_ns == destination_stat.st_mtime_ns:
+        return True
+    return compare_hashes and get_file_hash(source) == get_file_hash(destination)
+
+
+def _clone_file(source: Path, destination: Path) -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    except OSError:
+        Path(destination).unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def copy_file(source: Path, destination: Path, hard_link: bool = False) -> str:
+    """
+    Copies a file by replacing the destination with a hard link, a copy-on-write clone or
+    a full copy, in that order of preference. Hard links share their data with the source, so
+    they must only be used for files that are always replaced rather than written in place.
+
+    Args:
+        source (Path): The source file.
+        destination (Path): The destination file.
+        hard_link (bool, optional): Whether to try to hard link the file. Defaults to False.
+
+    Returns:
+        str: Either "linked" or "written".
+    """
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_path = destination.parent / f'.{destination.name}.{threading.get_ident()}.tmp'
+    temp_file_path.unlink(missing_ok=True)
+
+    action = 'written'
+    try:
+        if hard_link:
+            try:
+                os.link(source, temp_file_path)
+                action = 'linked'
+            except OSError:
+                pass
+        if action != 'linked' and not _clone_file(source, temp_file_path):
+            shutil.copy2(source, temp_file_path)
+        os.replace(temp_file_path, destination)
+    finally:
+        temp_file_path.unlink(missing_ok=True)
+    return action
+
+
+def write_file(data: bytes, destination: Path, report: FileSyncReport | None = None):
+    """
+    Writes the data to the destination file, unless it already has the same contents.
+    """
+    destination = Path(destination)
+    if destination.exists() and destination.stat().st_size == len(data):
+        if hashlib.blake2b(data, digest_size=16).hexdigest() == get_file_hash(destination):
+            if report:
+                report.add('skipped', len(data))
+            return
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_file_path = destination.parent / f'.{destination.name}.{threading.get_ident()}.tmp'
+    try:
+        temp_file_path.write_bytes(data)
+        os.replace(temp_file_path, destination)
+    finally:
+        temp_file_path.unlink(missing_ok=True)
+    if report:
+        report.add('written', len(data))
+
+
+def sync_file(
+        source: Path,
+        destination: Path,
+        hard_link: bool = False,
+        report: FileSyncReport | None = None
+    ):
+    """
+    Copies the source file to the destination, unless the destination is already unchanged.
+    """
+    size = os.path.getsize(source)
+    if is_file_unchanged(source, destination):
+        action = 'skipped'
+    else:
+        action = copy_file(source, destination, hard_link=hard_link)
+    if report:
+        report.add(action, size)
+
+
+def sync_files(
+        file_paths: list[tuple[Path, Path]],
+        hard_link: bool = False,
+        report: FileSyncReport | None = None,
+        max_workers: int = FILE_COPY_MAX_WORKERS
+    ) -> FileSyncReport:
+    """
+    Copies the source files to their destinations in a thread pool, skipping the unchanged ones.
+
+    Args:
+        file_paths (list[tuple[Path, Path]]): The source and destination file paths.
+        hard_link (bool, optional): Whether to try to hard link the files. Defaults to False.
+        report (FileSyncReport | None, optional): A report to add to. Defaults to None.
+        max_workers (int, optional): The max number of threads. Defaults to FILE_COPY_MAX_WORKERS.
+
+    Returns:
+        FileSyncReport: The report of the bytes that were written and skipped.
+    """
+    report = report or FileSyncReport()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(sync_file, source, destination, hard_link, report)
+            for source, destination in file_paths
+        ]
+        for future in futures:
+            future.result()
+    return report
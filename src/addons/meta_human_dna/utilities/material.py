@@ -1,17 +1,23 @@
 import bpy
-import shutil
+import logging
 from pathlib import Path
 from .misc import exclude_rig_logic_evaluation
+from .files import FileSyncReport, sync_files
+
+logger = logging.getLogger(__name__)
 
 @exclude_rig_logic_evaluation
 def copy_materials(
         mesh_object: bpy.types.Object, 
         old_prefix: str,
         new_prefix: str,
-        new_folder: Path
+        new_folder: Path,
+        report: FileSyncReport | None = None
     ) -> bpy.types.Material | None:
     # duplicate the head mesh materials
     first_new_mesh_material = None
+    file_paths = {}
+    image_file_paths = []
     for slot in mesh_object.material_slots:
         material = slot.material
         if material:
@@ -32,11 +38,21 @@ def copy_materials(
                             image_file_path = Path(bpy.path.abspath(new_image.filepath))
                             if image_file_path.exists():
                                 new_image_file_path = new_folder / 'maps' / image_file_path.name
-                                new_image_file_path.parent.mkdir(parents=True, exist_ok=True)
-                                shutil.copy(image_file_path, new_image_file_path)
-                                new_image.filepath = str(new_image_file_path)
+                                file_paths[new_image_file_path] = image_file_path
+                                image_file_paths.append((new_image, new_image_file_path))
                         # assign the new image to the node
                         node.image = new_image                    
+
+    # copy the image files in parallel, skipping the ones that are already in the new folder
+    if file_paths:
+        report = sync_files(
+            [(source, destination) for destination, source in file_paths.items()], 
+            report=report
+        )
+        logger.info(f'Copied the images of "{mesh_object.name}": {report.get_summary()}')
+    # the images are only pointed at their new files once the files exist
+    for new_image, new_image_file_path in image_file_paths:
+        new_image.filepath = str(new_image_file_path)
     return first_new_mesh_material
     
 
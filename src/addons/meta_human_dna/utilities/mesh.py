@@ -2,11 +2,13 @@ import re
 import bpy
 import json
 import math
+import hashlib
 import bmesh
 import logging
+import numpy as np
 from typing import Literal
 from mathutils import Vector, Matrix
-from bpy_extras.bmesh_utils import bmesh_linked_uv_islands
+from mathutils.kdtree import KDTree
 from .misc import (
     exclude_rig_logic_evaluation,
     switch_to_edit_mode,
@@ -18,7 +20,11 @@ from ..constants import (
     LOD_REGEX,
     Axis,
     TOPOLOGY_VERTEX_GROUPS_FILE_PATH,
-    FLOATING_POINT_PRECISION
+    FLOATING_POINT_PRECISION,
+    TOPO_GROUP_PREFIX,
+    SHAPE_KEY_GROUP_PREFIX,
+    SHAPE_KEY_CHUNK_SIZE,
+    SCALE_FACTOR
 )
 
 
@@ -89,17 +95,21 @@ def update_vertex_positions(
         vertex_indices: list[int],
         offset: Vector = Vector((0, 0, 0))
     ):
-    # get the bmesh data
-    bmesh_object = bmesh.new()
-    bmesh_object.from_mesh(mesh_object.data) # type: ignore
-
-    bmesh_object.verts.ensure_lookup_table()
-    for vertex_index in vertex_indices:
-        vert = bmesh_object.verts[vertex_index]
-        vert.co += offset
+    mesh = mesh_object.data
+    vertex_indices = np.asarray(vertex_indices, dtype=np.int64)
+    # the basis shape key is offset too, otherwise the change is lost when the shape keys are evaluated
+    collections = [mesh.vertices] # type: ignore
+    if mesh.shape_keys: # type: ignore
+        collections.append(mesh.shape_keys.reference_key.data) # type: ignore
+
+    for collection in collections:
+        positions = np.empty(len(collection) * 3, dtype=np.float32)
+        collection.foreach_get('co', positions)
+        positions = positions.reshape(-1, 3)
+        positions[vertex_indices] += np.array(offset, dtype=np.float32)
+        collection.foreach_set('co', positions.ravel())
+    mesh.update() # type: ignore
 
-    bmesh_object.to_mesh(mesh_object.data) # type: ignore
-    bmesh_object.free()
 
 def get_middle_vertices(mesh_object: bpy.types.Object) -> list[int]:
     verts = []
@@ -135,30 +145,184 @@ def zero_x_on_middle_vertices(mesh_object: bpy.types.Object, threshold: float =
     bmesh_data.free()
 
 
-def set_vertex_selection(
+class VertexGroupIndex:
+    """
+    The vertex group memberships of a mesh in compressed sparse row form, so that the 
+    vertices of a group are a slice of one array rather than a scan over every vertex. It is 
+    built in a single pass over the vertices and is cached per mesh until its geometry is updated.
+    """
+    def __init__(self, mesh_object: bpy.types.Object):
+        self.mesh_name = mesh_object.data.name # type: ignore
+        self.vertex_count = len(mesh_object.data.vertices) # type: ignore
+        self.group_names = [vertex_group.name for vertex_group in mesh_object.vertex_groups]
+        self.group_lookup = {name: index for index, name in enumerate(self.group_names)}
+
+        # vertex.groups is variable length, so it can't be read with foreach_get
+        group_indices = []
+        vertex_indices = []
+        weights = []
+        for vertex in mesh_object.data.vertices: # type: ignore
+            for element in vertex.groups:
+                group_indices.append(element.group)
+                vertex_indices.append(vertex.index)
+                weights.append(element.weight)
+
+        group_indices = np.asarray(group_indices, dtype=np.int32)
+        valid = group_indices < len(self.group_names)
+        order = np.argsort(group_indices[valid], kind='stable')
+        self.vertex_indices = np.asarray(vertex_indices, dtype=np.int32)[valid][order]
+        self.weights = np.asarray(weights, dtype=np.float32)[valid][order]
+        self.offsets = np.zeros(len(self.group_names) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(group_indices[valid], minlength=len(self.group_names)), 
+            out=self.offsets[1:]
+        )
+
+    def get_vertices(
+            self, 
+            vertex_group_name: str, 
+            weight_equal_or_above: float | None = None
+        ) -> np.ndarray:
+        """
+        Gets the vertex indices in the vertex group, in ascending order.
+
+        Args:
+            vertex_group_name (str): The name of the vertex group.
+            weight_equal_or_above (float | None, optional): The min weight of the vertices. Defaults to None, 
+                which includes every vertex in the group.
+
+        Returns:
+            np.ndarray: The vertex indices.
+        """
+        group_index = self.group_lookup.get(vertex_group_name)
+        if group_index is None:
+            return np.empty(0, dtype=np.int32)
+        start, end = self.offsets[group_index], self.offsets[group_index + 1]
+        vertex_indices = self.vertex_indices[start:end]
+        if weight_equal_or_above is not None:
+            vertex_indices = vertex_indices[self.weights[start:end] >= weight_equal_or_above]
+        return vertex_indices
+
+    def get_mask(self, vertex_group_name: str, weight_above: float = 0.0) -> np.ndarray:
+        """
+        Gets a boolean array over all the vertices that is True for the vertices with a weight 
+        above the given weight in the vertex group.
+        """
+        mask = np.zeros(self.vertex_count, dtype=bool)
+        group_index = self.group_lookup.get(vertex_group_name)
+        if group_index is not None:
+            start, end = self.offsets[group_index], self.offsets[group_index + 1]
+            mask[self.vertex_indices[start:end][self.weights[start:end] > weight_above]] = True
+        return mask
+
+    def get_weighted_group_names(self) -> list[str]:
+        return [name for index, name in enumerate(self.group_names) if self.offsets[index + 1] > self.offsets[index]]
+
+    def is_valid(self, mesh_object: bpy.types.Object) -> bool:
+        """
+        Checks the parts of the mesh that can change without a geometry update, like 
+        renaming, adding or removing vertex groups, or swapping the mesh data.
+        """
+        return (
+            self.mesh_name == mesh_object.data.name and # type: ignore
+            self.vertex_count == len(mesh_object.data.vertices) and # type: ignore
+            self.group_names == [vertex_group.name for vertex_group in mesh_object.vertex_groups]
+        )
+
+
+_vertex_group_indices: dict[str, VertexGroupIndex] = {}
+
+
+def get_vertex_group_index(mesh_object: bpy.types.Object) -> VertexGroupIndex:
+    """
+    Gets the vertex group index of the mesh. The index is cached by object name and is 
+    dropped by vertex_group_index_listener when the geometry or weights of the mesh are updated.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+
+    Returns:
+        VertexGroupIndex: The vertex group index.
+    """
+    vertex_group_index = _vertex_group_indices.get(mesh_object.name)
+    if vertex_group_index and vertex_group_index.is_valid(mesh_object):
+        return vertex_group_index
+
+    vertex_group_index = VertexGroupIndex(mesh_object)
+    _vertex_group_indices[mesh_object.name] = vertex_group_index
+    return vertex_group_index
+
+
+def clear_vertex_group_indices(mesh_object_name: str | None = None):
+    """
+    Removes the cached vertex group index of the object, or of every object if no name is given.
+    """
+    if mesh_object_name is None:
+        _vertex_group_indices.clear()
+    else:
+        _vertex_group_indices.pop(mesh_object_name, None)
+
+
+def vertex_group_index_listener(scene: bpy.types.Scene, dependency_graph: bpy.types.Depsgraph):
+    """
+    Drops the cached vertex group indices of the meshes whose geometry was updated, which 
+    includes weight painting and assigning weights.
+    """
+    if not _vertex_group_indices:
+        return
+
+    for update in dependency_graph.updates:
+        if not update.is_updated_geometry:
+            continue
+        name = getattr(update.id.original, 'name', None)
+        if isinstance(update.id, bpy.types.Object):
+            _vertex_group_indices.pop(name, None) # type: ignore
+        elif isinstance(update.id, bpy.types.Mesh):
+            for object_name, vertex_group_index in list(_vertex_group_indices.items()):
+                if vertex_group_index.mesh_name == name:
+                    del _vertex_group_indices[object_name]
+
+
+def set_vertex_selection_mask(
         mesh_object: bpy.types.Object, 
-        vertex_indexes: list[int],
+        mask: np.ndarray,
         add: bool = False
     ):
+    """
+    Selects the vertices of the mesh where the mask is True in edit mode.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        mask (np.ndarray): A boolean array with a value for each vertex.
+        add (bool, optional): Whether to add to the current selection. Defaults to False.
+    """
+    # the selection is written to the mesh in object mode, then flushed to the edges and faces in edit mode
+    switch_to_object_mode()
+    vertices = mesh_object.data.vertices # type: ignore
+    if add:
+        selection = np.empty(len(vertices), dtype=bool)
+        vertices.foreach_get('select', selection)
+        mask = mask | selection
+    vertices.foreach_set('select', mask)
+
     switch_to_edit_mode(mesh_object)
-    # get the mesh data
-    mesh_data = mesh_object.data 
-    # get the bmesh data
+    mesh_data = mesh_object.data
     bmesh_data = bmesh.from_edit_mesh(mesh_data) # type: ignore
-    
-    for vert in bmesh_data.verts:
-        if vert.index in vertex_indexes:
-            vert.select_set(True)
-        else:
-            if not add:
-                vert.select_set(False)
-
     bmesh_data.select_mode |= {'VERT'}
     bmesh_data.select_flush_mode()
-        
     bmesh.update_edit_mesh(mesh_data) # type: ignore
 
 
+def set_vertex_selection(
+        mesh_object: bpy.types.Object, 
+        vertex_indexes: list[int],
+        add: bool = False
+    ):
+    mask = np.zeros(len(mesh_object.data.vertices), dtype=bool) # type: ignore
+    mask[np.asarray(vertex_indexes, dtype=np.int64)] = True
+    set_vertex_selection_mask(mesh_object, mask, add=add)
+
+
 def select_vertex_group(
         mesh_object: bpy.types.Object, 
         vertex_group_name: str,
@@ -168,28 +332,13 @@ def select_vertex_group(
     if not vertex_group:
         return
     
-    switch_to_edit_mode(mesh_object)
-    # get the mesh data
-    mesh_data = mesh_object.data
-    # get the bmesh data
-    bmesh_data = bmesh.from_edit_mesh(mesh_data) # type: ignore
-    
-    bmesh_data.verts.layers.deform.verify()
-    deform = bmesh_data.verts.layers.deform.active
-
-    for vert in bmesh_data.verts:
-        for group_index, weight in vert[deform].items():
-            if group_index == vertex_group.index and weight > 0.0:
-                vert.select_set(True)
-                break
-        else:
-            if not add:
-                vert.select_set(False)
-
-    bmesh_data.select_mode |= {'VERT'}
-    bmesh_data.select_flush_mode()
-        
-    bmesh.update_edit_mesh(mesh_data) # type: ignore
+    # leaving edit mode writes the edit mesh weights back, so the cached index is stale 
+    # before the dependency graph is evaluated again
+    if mesh_object.mode == 'EDIT':
+        clear_vertex_group_indices(mesh_object.name)
+    switch_to_object_mode()
+    mask = get_vertex_group_index(mesh_object).get_mask(vertex_group_name)
+    set_vertex_selection_mask(mesh_object, mask, add=add)
 
 
 def get_shape_key_delta_vertices(
@@ -198,45 +347,38 @@ def get_shape_key_delta_vertices(
         basis_shape_key_name: str = 'Basis',
         delta_threshold: float = 0.0001
     ) -> list[int]:
-    switch_to_object_mode()
-    
-    # Make this the active shape key and show only this shape key
-    shape_key_index = mesh_object.data.shape_keys.key_blocks.keys().index(shape_key_name) # type: ignore
-    mesh_object.show_only_shape_key = True
-    mesh_object.active_shape_key_index = shape_key_index
-    update_mesh(mesh_object)
-
-    shape_key_bmesh = bmesh.new()
-    shape_key_bmesh.from_object(
-        mesh_object,
-        bpy.context.evaluated_depsgraph_get(), # type: ignore
-        cage=True,
-    )
+    """
+    Gets the vertices that the shape key moves away from the basis shape key. The key block 
+    positions are compared directly, so the modifiers are not evaluated and the shape key 
+    display settings of the object are left as they are.
 
-    # Now do the same so we can extract the basis shape key
-    basis_shape_key_index = mesh_object.data.shape_keys.key_blocks.keys().index(basis_shape_key_name) # type: ignore
-    mesh_object.show_only_shape_key = True
-    mesh_object.active_shape_key_index = basis_shape_key_index
-    update_mesh(mesh_object)
-
-    basis_shape_key_bmesh = bmesh.new()
-    basis_shape_key_bmesh.from_object(
-        mesh_object,
-        bpy.context.evaluated_depsgraph_get(), # type: ignore
-        cage=True,
-    )
-    
-    vertex_indices = []
-    basis_shape_key_bmesh.verts.ensure_lookup_table()
-    for vert in shape_key_bmesh.verts:
-        basis_vert = basis_shape_key_bmesh.verts[vert.index]
-        if (basis_vert.co - vert.co).length > delta_threshold: # type: ignore
-            vertex_indices.append(vert.index)
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        shape_key_name (str): The name of the shape key.
+        basis_shape_key_name (str, optional): The name of the basis shape key. Defaults to 'Basis', and 
+            falls back to the relative key of the shape key.
+        delta_threshold (float, optional): The min distance a vertex must move. Defaults to 0.0001.
+
+    Returns:
+        list[int]: The indices of the vertices that move.
+    """
+    # the key blocks are only synced from the edit mesh when leaving edit mode, so 
+    # sync them without changing the mode
+    if mesh_object.mode == 'EDIT':
+        mesh_object.update_from_editmode()
+
+    key_blocks = mesh_object.data.shape_keys.key_blocks # type: ignore
+    key_block = key_blocks[shape_key_name]
+    basis_key_block = key_blocks.get(basis_shape_key_name) or key_block.relative_key
 
-    shape_key_bmesh.free()
-    basis_shape_key_bmesh.free()
+    positions = np.empty(len(key_block.data) * 3, dtype=np.float32)
+    basis_positions = np.empty(len(basis_key_block.data) * 3, dtype=np.float32)
+    key_block.data.foreach_get('co', positions)
+    basis_key_block.data.foreach_get('co', basis_positions)
 
-    return vertex_indices
+    deltas = (positions - basis_positions).reshape(-1, 3)
+    lengths_squared = np.einsum('ij,ij->i', deltas, deltas)
+    return np.flatnonzero(lengths_squared > delta_threshold ** 2).tolist()
 
 
 def get_lod_index(name: str) -> int:
@@ -367,11 +509,103 @@ def get_bounding_box_width(scene_object: bpy.types.Object) -> float:
     return width
 
 def find_closest_vertex(vertices, position):
-    return min(
-        vertices,
-        key=lambda vert: (position - vert).length_squared
-    )
-    
+    vertices = list(vertices)
+    offsets = np.array(vertices, dtype=np.float64).reshape(-1, 3) - np.array(position, dtype=np.float64)
+    return vertices[int(np.argmin(np.einsum('ij,ij->i', offsets, offsets)))]
+
+
+# the spatial index of each mesh by (object name, evaluated), with the hash of the positions it was built from
+_vertex_kdtrees: dict[tuple[str, bool], tuple[str, KDTree]] = {}
+
+
+def get_evaluated_vertex_positions_array(mesh_object: bpy.types.Object) -> np.ndarray:
+    """
+    Gets the vertex positions of the mesh with its modifiers and shape keys applied, in object space.
+    """
+    depsgraph = bpy.context.evaluated_depsgraph_get() # type: ignore
+    evaluated_object = mesh_object.evaluated_get(depsgraph)
+    mesh = evaluated_object.to_mesh()
+    try:
+        return get_mesh_vertex_positions_array(mesh)
+    finally:
+        evaluated_object.to_mesh_clear()
+
+
+def get_vertex_kdtree(
+        mesh_object: bpy.types.Object, 
+        evaluated: bool = False
+    ) -> tuple[KDTree, np.ndarray]:
+    """
+    Gets a spatial index of the mesh vertices in object space. The index is cached per mesh and
+    is only rebuilt when the hash of the vertex positions changes.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        evaluated (bool, optional): Whether to index the positions with the modifiers applied. Defaults to False.
+
+    Returns:
+        tuple[KDTree, np.ndarray]: The spatial index and the (N, 3) vertex positions it was built from.
+    """
+    if evaluated:
+        positions = get_evaluated_vertex_positions_array(mesh_object)
+    else:
+        positions = get_mesh_vertex_positions_array(mesh_object.data) # type: ignore
+    fingerprint = hashlib.blake2b(positions.tobytes(), digest_size=16).hexdigest()
+
+    key = (mesh_object.name, evaluated)
+    cached = _vertex_kdtrees.get(key)
+    if cached and cached[0] == fingerprint:
+        return cached[1], positions
+
+    prune_vertex_kdtrees()
+    kdtree = KDTree(len(positions))
+    for index, position in enumerate(positions.tolist()):
+        kdtree.insert(position, index)
+    kdtree.balance()
+    _vertex_kdtrees[key] = (fingerprint, kdtree)
+    return kdtree, positions
+
+
+def prune_vertex_kdtrees():
+    """
+    Removes the spatial indices of objects that were deleted or renamed.
+    """
+    for key in list(_vertex_kdtrees.keys()):
+        if key[0] not in bpy.data.objects:
+            del _vertex_kdtrees[key]
+
+
+def clear_vertex_kdtrees():
+    _vertex_kdtrees.clear()
+
+
+def find_closest_vertex_indices(
+        mesh_object: bpy.types.Object,
+        positions: list[Vector] | np.ndarray,
+        evaluated: bool = False
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Finds the closest vertex to each of the positions.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        positions (list[Vector] | np.ndarray): The positions in the mesh's object space.
+        evaluated (bool, optional): Whether to search the positions with the modifiers applied. Defaults to False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The index of the closest vertex to each position and their distances.
+    """
+    kdtree, _ = get_vertex_kdtree(mesh_object, evaluated=evaluated)
+    indices = np.full(len(positions), -1, dtype=np.int64)
+    distances = np.full(len(positions), np.inf, dtype=np.float64)
+    for row, position in enumerate(np.asarray(positions, dtype=np.float64).reshape(-1, 3).tolist()):
+        _, index, distance = kdtree.find(position)
+        if index is not None:
+            indices[row] = index
+            distances[row] = distance
+    return indices, distances
+
+
 @exclude_rig_logic_evaluation
 def copy_mesh(
         mesh_object: bpy.types.Object, 
@@ -417,32 +651,318 @@ def copy_mesh(
 
     return mesh_object_copy
 
+def transform_vectors(vectors: np.ndarray, matrix: Matrix | None = None) -> np.ndarray:
+    """
+    Transforms an array of vectors by the 3x3 part of the given matrix in a single multiply.
+
+    Args:
+        vectors (np.ndarray): A (N, 3) array of vectors.
+        matrix (Matrix | None): The matrix to transform the vectors by.
+
+    Returns:
+        np.ndarray: The transformed (N, 3) array of vectors.
+    """
+    if matrix is None:
+        return vectors
+    return vectors @ np.array(matrix.to_3x3(), dtype=vectors.dtype).T
+
+
+def get_mesh_vertex_positions_array(mesh: bpy.types.Mesh, matrix: Matrix | None = None) -> np.ndarray:
+    positions = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', positions)
+    return transform_vectors(positions.reshape(-1, 3), matrix)
+
+
+def get_mesh_vertex_normals_array(mesh: bpy.types.Mesh, matrix: Matrix | None = None) -> np.ndarray:
+    normals = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('normal', normals)
+    return transform_vectors(normals.reshape(-1, 3), matrix)
+
+
+def get_mesh_split_normals_array(mesh: bpy.types.Mesh, matrix: Matrix | None = None) -> np.ndarray:
+    normals = np.empty(len(mesh.loops) * 3, dtype=np.float32)
+    mesh.corner_normals.foreach_get('vector', normals)
+    return transform_vectors(normals.reshape(-1, 3), matrix)
+
+
+def get_mesh_vertex_data(
+        mesh_object: bpy.types.Object, 
+        scale: float = SCALE_FACTOR
+    ) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the vertex indices and positions of the mesh in centimeters, as contiguous arrays that 
+    can be handed to the core module without being copied into lists.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The vertex indices and the (N, 3) float32 positions.
+    """
+    positions = np.empty(len(mesh_object.data.vertices) * 3, dtype=np.float32) # type: ignore
+    mesh_object.data.vertices.foreach_get('co', positions) # type: ignore
+    positions *= scale
+    return np.arange(len(positions) // 3, dtype=np.int32), positions.reshape(-1, 3)
+
+
+def get_mesh_vertex_uv_data(mesh_object: bpy.types.Object) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the UVs of each loop and the last loop that uses each vertex as contiguous arrays.
+    Vertices that are not used by a loop point to their own index.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The loop index of each vertex and the (L, 2) float32 loop UVs.
+    """
+    mesh = mesh_object.data
+    uv_layer = mesh.uv_layers.active # type: ignore
+    if not uv_layer:
+        return np.zeros(0, dtype=np.int32), np.zeros((0, 2), dtype=np.float32)
+
+    loop_uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32) # type: ignore
+    uv_layer.data.foreach_get('uv', loop_uvs)
+    loop_vertex_indices = get_mesh_loop_vertex_indices(mesh) # type: ignore
+    uv_indices = np.full(len(mesh.vertices), -1, dtype=np.int32) # type: ignore
+    np.maximum.at(uv_indices, loop_vertex_indices, np.arange(len(loop_vertex_indices), dtype=np.int32))
+    unused = uv_indices < 0
+    uv_indices[unused] = np.flatnonzero(unused)
+    return uv_indices, loop_uvs.reshape(-1, 2)
+
+
+def get_mesh_loop_vertex_indices(mesh: bpy.types.Mesh) -> np.ndarray:
+    loop_vertex_indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertex_indices)
+    return loop_vertex_indices
+
+
+def get_mesh_face_offsets(mesh: bpy.types.Mesh) -> np.ndarray:
+    """
+    Gets the offsets of each face into the loop arrays, so the loops of face i are offsets[i]:offsets[i+1].
+
+    Args:
+        mesh (bpy.types.Mesh): The mesh.
+
+    Returns:
+        np.ndarray: A (F + 1) array of loop offsets.
+    """
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    offsets = np.zeros(len(mesh.polygons) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(loop_totals)
+    # polygons store their loops contiguously in order, but check in case they don't
+    if not np.array_equal(offsets[:-1], loop_starts):
+        raise ValueError(f'The polygon loops of mesh "{mesh.name}" are not stored contiguously.')
+    return offsets
+
+
+def get_mesh_uv_arrays(mesh: bpy.types.Mesh, uv_layer_name: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gets the unique UV coordinates of the mesh and the index of the UV that each loop uses.
+
+    Args:
+        mesh (bpy.types.Mesh): The mesh.
+        uv_layer_name (str | None): The UV layer to read from. Defaults to the active UV layer.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The (U, 2) unique UVs and the per loop UV indices.
+    """
+    uv_layer = mesh.uv_layers.get(uv_layer_name) if uv_layer_name else mesh.uv_layers.active
+    if not uv_layer:
+        return np.zeros((0, 2), dtype=np.float32), np.zeros(len(mesh.loops), dtype=np.int32)
+
+    loop_uvs = np.empty(len(mesh.loops) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get('uv', loop_uvs)
+    uvs, loop_uv_indices = np.unique(loop_uvs.reshape(-1, 2), axis=0, return_inverse=True)
+    return uvs, loop_uv_indices.reshape(-1).astype(np.int32)
+
+
+def get_uv_island_indices(bmesh_object: bmesh.types.BMesh, uv_layer) -> list[int]:
+    """
+    Gets the UV island of each face with a union-find over the face loops. Faces are on the
+    same island when they share a vertex with the same UV, which matches bmesh_linked_uv_islands.
+    Islands that only contain hidden faces are given an index of -1.
+
+    Args:
+        bmesh_object (bmesh.types.BMesh): The bmesh object.
+        uv_layer: The bmesh UV layer.
+
+    Returns:
+        list[int]: The island index of each face, by face index.
+    """
+    bmesh_object.faces.index_update()
+    parents = list(range(len(bmesh_object.faces)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    corner_faces = {}
+    for face in bmesh_object.faces:
+        for loop in face.loops:
+            other_face_index = corner_faces.setdefault((loop.vert.index, *loop[uv_layer].uv), face.index)
+            if other_face_index != face.index:
+                root, other_root = find(face.index), find(other_face_index)
+                if root != other_root:
+                    parents[other_root] = root
+
+    islands = [find(index) for index in range(len(parents))]
+    # like bmesh_linked_uv_islands, islands are only seeded from visible faces
+    visible_islands = {islands[face.index] for face in bmesh_object.faces if not face.hide}
+    return [island if island in visible_islands else -1 for island in islands]
+
+
+def get_shape_key_deltas(
+        mesh_object: bpy.types.Object,
+        key_block_names: list[str],
+        matrix: Matrix | None = None,
+        threshold: float = 0.0,
+        chunk_size: int = SHAPE_KEY_CHUNK_SIZE
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the deltas of the key blocks against the reference key as sparse arrays. The coordinates 
+    of the key blocks are read in chunks, and each chunk is diffed against the reference key in a 
+    single array operation. Deltas that are not longer than the threshold are dropped.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+        key_block_names (list[str]): The names of the key blocks to get the deltas of.
+        matrix (Matrix | None, optional): A matrix to transform the deltas by. Defaults to None.
+        threshold (float, optional): The min length of a transformed delta. Defaults to 0.0.
+        chunk_size (int, optional): The number of key blocks to diff at once. Defaults to SHAPE_KEY_CHUNK_SIZE.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The offsets of each key block into the vertex 
+        indices, the vertex indices and the (N, 3) deltas.
+    """
+    shape_keys = mesh_object.data.shape_keys # type: ignore
+    key_blocks = shape_keys.key_blocks
+    vertex_count = len(shape_keys.reference_key.data)
+    basis = np.empty(vertex_count * 3, dtype=np.float32)
+    shape_keys.reference_key.data.foreach_get('co', basis)
+    basis = basis.reshape(-1, 3)
+    transform = np.array(matrix.to_3x3(), dtype=np.float32).T if matrix is not None else None
+
+    counts = []
+    vertex_indices = []
+    deltas = []
+    buffer = np.empty((min(chunk_size, len(key_block_names)), vertex_count * 3), dtype=np.float32)
+    for start in range(0, len(key_block_names), chunk_size):
+        names = key_block_names[start:start + chunk_size]
+        chunk = buffer[:len(names)]
+        for row, name in zip(chunk, names):
+            key_blocks[name].data.foreach_get('co', row)
+
+        chunk_deltas = chunk.reshape(len(names), vertex_count, 3) - basis
+        if transform is not None:
+            chunk_deltas = chunk_deltas @ transform
+        lengths = np.einsum('tvi,tvi->tv', chunk_deltas, chunk_deltas)
+        targets, vertices = np.nonzero(lengths > threshold * threshold)
+        counts.append(np.bincount(targets, minlength=len(names)))
+        vertex_indices.append(vertices.astype(np.int32))
+        deltas.append(chunk_deltas[targets, vertices])
+
+    offsets = np.zeros(len(key_block_names) + 1, dtype=np.int64)
+    if not key_block_names:
+        return offsets, np.empty(0, dtype=np.int32), np.empty((0, 3), dtype=np.float32)
+    offsets[1:] = np.cumsum(np.concatenate(counts))
+    return offsets, np.concatenate(vertex_indices), np.concatenate(deltas)
+
+
+def get_vertex_group_weight_arrays(mesh_object: bpy.types.Object) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the vertex group weights of every vertex in a single pass over the vertex group elements.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The number of groups on each vertex, and the 
+        flat vertex group indices and weights in vertex order.
+    """
+    vertices = mesh_object.data.vertices # type: ignore
+    counts = np.empty(len(vertices), dtype=np.int64)
+    elements = []
+    for vertex in vertices:
+        groups = vertex.groups
+        counts[vertex.index] = len(groups)
+        elements.extend((group.group, group.weight) for group in groups)
+
+    elements = np.array(elements, dtype=np.float64).reshape(-1, 2)
+    return counts, elements[:, 0].astype(np.int64), elements[:, 1]
+
+
+def get_mesh_fingerprint(mesh_object: bpy.types.Object) -> str:
+    """
+    Hashes the mesh data that is written to DNA, which is the vertex positions, the topology, 
+    the UVs and the vertex group weights. Topology and shape key vertex groups are ignored, 
+    since they are only used for selection.
+
+    Args:
+        mesh_object (bpy.types.Object): The mesh object.
+
+    Returns:
+        str: The hex digest of the mesh data.
+    """
+    mesh = mesh_object.data
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(get_mesh_vertex_positions_array(mesh).tobytes()) # type: ignore
+    hasher.update(get_mesh_loop_vertex_indices(mesh).tobytes()) # type: ignore
+    hasher.update(get_mesh_face_offsets(mesh).tobytes()) # type: ignore
+    for array in get_mesh_uv_arrays(mesh): # type: ignore
+        hasher.update(array.tobytes())
+
+    # number the skinning vertex groups so that adding or removing other groups doesn't change the hash
+    group_numbers = np.full(len(mesh_object.vertex_groups) + 1, -1, dtype=np.int64)
+    group_names = []
+    for vertex_group in mesh_object.vertex_groups:
+        if not vertex_group.name.startswith((TOPO_GROUP_PREFIX, SHAPE_KEY_GROUP_PREFIX)):
+            group_numbers[vertex_group.index] = len(group_names)
+            group_names.append(vertex_group.name)
+
+    counts, group_indices, weights = get_vertex_group_weight_arrays(mesh_object)
+    vertex_indices = np.repeat(np.arange(len(counts)), counts)
+    group_indices = group_numbers[group_indices]
+    included = group_indices >= 0
+    hasher.update('|'.join(group_names).encode())
+    hasher.update(vertex_indices[included].tobytes())
+    hasher.update(group_indices[included].tobytes())
+    hasher.update(weights[included].tobytes())
+    return hasher.hexdigest()
+
+
 def split_mesh_along_uv_islands(bmesh_object: bmesh.types.BMesh) -> dict[int, int]:
     uv_layer = bmesh_object.loops.layers.uv.active
-    _uv_border_verts = []
-
     if not uv_layer:
-        return {}    
+        return {}
 
-    # get each uv island and it's loops
-    for island_faces in bmesh_linked_uv_islands(bmesh_object, uv_layer):        
-        island_loops = [loop for face in island_faces for loop in face.loops] # type: ignore
-        for loop in island_loops:
+    bmesh_object.verts.index_update()
+    islands = get_uv_island_indices(bmesh_object, uv_layer)
+
+    # find the verts on the border of each uv island
+    _uv_border_vert_indices = set()
+    for face in bmesh_object.faces:
+        island = islands[face.index]
+        if island == -1:
+            continue
+        for loop in face.loops:
             # Select border loops on the island
-            loops = (loop, loop.link_loop_radial_next)
-            if (loops[0] == loops[1]
-                or loops[1].face not in island_faces
-                or loops[0][uv_layer].uv != loops[1].link_loop_next[uv_layer].uv
-                or loops[1][uv_layer].uv != loops[0].link_loop_next[uv_layer].uv):
-                _uv_border_verts.append(loop.vert)
+            radial_loop = loop.link_loop_radial_next
+            if (loop == radial_loop
+                or islands[radial_loop.face.index] != island
+                or tuple(loop[uv_layer].uv) != tuple(radial_loop.link_loop_next[uv_layer].uv)
+                or tuple(radial_loop[uv_layer].uv) != tuple(loop.link_loop_next[uv_layer].uv)):
+                _uv_border_vert_indices.add(loop.vert.index)
 
     uv_border_edges = []
     uv_border_verts = []
     for edge in bmesh_object.edges:
-        if not edge.is_boundary and all(vert in _uv_border_verts for vert in edge.verts):
+        if not edge.is_boundary and all(vert.index in _uv_border_vert_indices for vert in edge.verts):
             uv_border_edges.append(edge)
             uv_border_verts.extend(list(edge.verts))
 
+    # key the border verts by their position. When several share a position, the last one wins
+    border_verts_by_position = {tuple(vert.co): vert for vert in uv_border_verts}
+
     # Split those edges
     split = bmesh.ops.split_edges(bmesh_object, edges=uv_border_edges)
     
@@ -456,24 +976,20 @@ def split_mesh_along_uv_islands(bmesh_object: bmesh.types.BMesh) -> dict[int, in
     split_to_original_vert_lookup = {}
     for edge in split['edges']:
         for vert in edge.verts:
-            for _vert in uv_border_verts:
-                if vert.co == _vert.co:
-                    split_to_original_vert_lookup[vert.index] = _vert.index
+            original_vert = border_verts_by_position.get(tuple(vert.co))
+            if original_vert is not None:
+                split_to_original_vert_lookup[vert.index] = original_vert.index
                     
     return split_to_original_vert_lookup
 
 
 def save_topology_vertex_groups(mesh_object: bpy.types.Object):
-    vertex_groups = {}
-    for vertex_group in mesh_object.vertex_groups:
-        if vertex_group.name.startswith('TOPO_GROUP_'):
-            vertex_groups[vertex_group.name] = [
-                vertex.index for vertex in 
-                mesh_object.data.vertices if vertex_group.index in [ # type: ignore
-                    group.group
-                    for group in vertex.groups
-                ]
-            ]
+    vertex_group_index = get_vertex_group_index(mesh_object)
+    vertex_groups = {
+        name: vertex_group_index.get_vertices(name).tolist()
+        for name in vertex_group_index.group_names
+        if name.startswith(TOPO_GROUP_PREFIX)
+    }
 
     with open(TOPOLOGY_VERTEX_GROUPS_FILE_PATH, 'w') as file:
         json.dump(vertex_groups, file)
@@ -484,17 +1000,10 @@ def get_vertex_group_vertices(
         vertex_group_name: str,
         weight_equal_or_above: float = 1.0
     ) -> list[int]:
-    vertex_group = mesh_object.vertex_groups.get(vertex_group_name)
-    if not vertex_group:
-        return []
-    
-    return [
-        vertex.index for vertex in 
-        mesh_object.data.vertices if vertex_group.index in [ # type: ignore
-            group.group
-            for group in vertex.groups
-        ] and vertex_group.weight(vertex.index) >= weight_equal_or_above
-    ]
+    return get_vertex_group_index(mesh_object).get_vertices(
+        vertex_group_name, 
+        weight_equal_or_above=weight_equal_or_above
+    ).tolist()
 
 @preserve_context
 def auto_unwrap_uvs(mesh_objects: list[bpy.types.Object]):
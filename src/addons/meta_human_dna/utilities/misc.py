@@ -272,7 +272,14 @@ def link_send2ue_extension():
 
 
 def setup_scene(*args):
+    from .mesh import clear_vertex_kdtrees, clear_vertex_group_indices
+    from .armature import clear_auto_fit_state
     scene_properties = getattr(bpy.context.scene, ToolInfo.NAME, object) # type: ignore
+    # the spatial and vertex group indices and the auto fit state are keyed by object name, so they 
+    # can't be reused in a new file
+    clear_vertex_kdtrees()
+    clear_vertex_group_indices()
+    clear_auto_fit_state()
     
     # initialize the rig logic instances
     for instance in getattr(scene_properties, 'rig_logic_instance_list', []):
@@ -295,6 +302,13 @@ def pre_undo(*args):
         instance.destroy()
 
 def post_undo(*args):
+    from .mesh import clear_vertex_kdtrees, clear_vertex_group_indices
+    from .armature import clear_auto_fit_state
+    # undo can delete or restore the objects that the spatial and vertex group indices were built 
+    # from, and can move the bones and vertices back to where they were before the last auto fit
+    clear_vertex_kdtrees()
+    clear_vertex_group_indices()
+    clear_auto_fit_state()
     bpy.context.window_manager.meta_human_dna.evaluate_dependency_graph = True # type: ignore
     for instance in bpy.context.scene.meta_human_dna.rig_logic_instance_list: # type: ignore
         instance.evaluate()
@@ -0,0 +1,129 @@
+import json
+import time
+import logging
+import tracemalloc
+from pathlib import Path
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PhaseProfiler:
+    """
+    Records the wall time and peak python memory of named phases. Phases can be nested
+    and tagged (i.e. with a LOD index or mesh name) so that reports can be broken down.
+    Note that peak memory is only tracked when trace_memory is enabled, and only covers
+    allocations made through python, not the ones made internally by Blender.
+    """
+    def __init__(self, name: str, trace_memory: bool = False):
+        self.name = name
+        self.trace_memory = trace_memory
+        self.spans = []
+        self._stack = []
+        self._started_tracing = False
+        self._start_time = None
+        self._total_time = 0.0
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stop(self):
+        if self._start_time is not None:
+            self._total_time = time.perf_counter() - self._start_time
+            self._start_time = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _update_peaks(self):
+        # resetting the peak would hide it from any parent spans, so propagate it up the stack first
+        if not tracemalloc.is_tracing():
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for span in self._stack:
+            span['_peak'] = max(span['_peak'], peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def span(self, phase: str, **tags):
+        memory_tracing = tracemalloc.is_tracing()
+        if memory_tracing:
+            self._update_peaks()
+
+        span = {
+            'phase': phase,
+            'parent': self._stack[-1]['phase'] if self._stack else None,
+            'depth': len(self._stack),
+            **tags,
+            '_start_memory': tracemalloc.get_traced_memory()[0] if memory_tracing else 0,
+            '_peak': 0
+        }
+        self.spans.append(span)
+        self._stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span['seconds'] = time.perf_counter() - start
+            if memory_tracing:
+                self._update_peaks()
+                span['peak_memory_bytes'] = max(span['_peak'] - span['_start_memory'], 0)
+            self._stack.pop()
+
+    def to_dict(self) -> dict:
+        phases = {}
+        spans = []
+        for span in self.spans:
+            data = {key: value for key, value in span.items() if not key.startswith('_')}
+            spans.append(data)
+            totals = phases.setdefault(span['phase'], {'seconds': 0.0, 'count': 0})
+            totals['seconds'] += data.get('seconds', 0.0)
+            totals['count'] += 1
+            if 'peak_memory_bytes' in data:
+                totals['peak_memory_bytes'] = max(
+                    totals.get('peak_memory_bytes', 0),
+                    data['peak_memory_bytes']
+                )
+
+        lods = {}
+        for data in spans:
+            if 'lod' in data and 'mesh' in data:
+                lod = lods.setdefault(str(data['lod']), {'seconds': 0.0, 'meshes': {}})
+                mesh = lod['meshes'].setdefault(data['mesh'], {})
+                mesh[data['phase']] = data.get('seconds', 0.0)
+                if data['phase'] == 'mesh':
+                    lod['seconds'] += data.get('seconds', 0.0)
+
+        return {
+            'name': self.name,
+            'total_seconds': self._total_time,
+            'trace_memory': self.trace_memory,
+            'phases': phases,
+            'lods': lods,
+            'spans': spans
+        }
+
+    def save(self, file_path: Path) -> Path:
+        file_path = Path(file_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=2)
+        logger.info(f'Saved report "{file_path}"')
+        return file_path
+
+    def get_summary_table(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f'{"Phase":<24}{"Count":>8}{"Seconds":>12}{"Peak MB":>12}',
+            '-' * 56
+        ]
+        for phase, totals in data['phases'].items():
+            peak = totals.get('peak_memory_bytes')
+            peak_text = f'{peak / (1024 * 1024):.2f}' if peak is not None else '-'
+            lines.append(f'{phase:<24}{totals["count"]:>8}{totals["seconds"]:>12.3f}{peak_text:>12}')
+        lines.append('-' * 56)
+        lines.append(f'{"Total":<24}{"":>8}{data["total_seconds"]:>12.3f}')
+        return '\n'.join(lines)
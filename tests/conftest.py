@@ -78,9 +78,10 @@ def pytest_configure():
 
 from fixtures.addon import addon  # noqa: E402, F401
 from fixtures.dna_data import ( # noqa: E402, F401
-    original_dna_json_data,
-    exported_dna_json_data,
-    calibrated_dna_json_data
+    exported_dna_file,
+    exported_dna_diff,
+    calibrated_dna_file,
+    calibrated_dna_diff
 )
 from fixtures.scene import (  # noqa: E402, F401
     load_dna,
@@ -4,7 +4,7 @@ import bpy
 from pathlib import Path
 
 @pytest.fixture(scope='session', autouse=True)
-def addon(addons: list[tuple[str, Path]]):
+def addon(addons: list[tuple[str, Path]], temp_folder: Path):
     for addon_name, scripts_folder in addons:
         script_directory = bpy.context.preferences.filepaths.script_directories.get(addon_name) # type: ignore
         if script_directory:
@@ -23,6 +23,10 @@ def addon(addons: list[tuple[str, Path]]):
     for addon_name, _ in addons:
         bpy.ops.preferences.addon_enable(module=addon_name)
 
+    # keep the geometry cache out of the user cache folder
+    preferences = bpy.context.preferences.addons['meta_human_dna'].preferences # type: ignore
+    preferences.geometry_cache_folder = str(temp_folder / 'user_geometry_cache')
+
     yield
 
     for addon_name, scripts_folder in addons:
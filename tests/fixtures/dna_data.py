@@ -1,31 +1,19 @@
 import pytest
-from constants import TEST_DNA_FOLDER
+from pathlib import Path
+from constants import TEST_DNA_FOLDER, TOLERANCE
 
 
 @pytest.fixture(scope="session")
-def original_dna_json_data(temp_folder, dna_file_name: str) -> dict:
-    from utilities.dna_data import get_dna_json_data
-
-    dna_file_path = TEST_DNA_FOLDER / dna_file_name
-    json_file_path = temp_folder / f"{dna_file_name.split('.')[0]}.json"
-    return get_dna_json_data(dna_file_path, json_file_path)
-
-
-@pytest.fixture(scope="session")
-def exported_dna_json_data(
+def exported_dna_file(
     modify_scene,
     temp_folder,
     dna_file_name: str
-) -> dict:
-    from utilities.dna_data import get_dna_json_data
+) -> Path | None:
     from meta_human_dna.utilities import get_active_face
     from meta_human_dna.dna_io import DNAExporter
 
     face = get_active_face()
-    name = dna_file_name.split(".")[0]
     export_folder = temp_folder / "export"
-    dna_file_path = export_folder / dna_file_name
-    json_file_path = export_folder / f"{name}.json"
     export_folder.mkdir(exist_ok=True)
 
     if face and face.rig_logic_instance:
@@ -33,26 +21,28 @@ def exported_dna_json_data(
         DNAExporter(
             instance=face.rig_logic_instance, linear_modifier=face.linear_modifier
         ).run()
-        return get_dna_json_data(dna_file_path, json_file_path)
+        return export_folder / dna_file_name
+
 
-    return {}
+@pytest.fixture(scope="session")
+def exported_dna_diff(exported_dna_file: Path | None, dna_file_name: str):
+    from meta_human_dna.dna_io import compare_dna
+
+    if exported_dna_file:
+        return compare_dna(TEST_DNA_FOLDER / dna_file_name, exported_dna_file, tolerances=TOLERANCE)
 
 
 @pytest.fixture(scope="session")
-def calibrated_dna_json_data(
+def calibrated_dna_file(
     modify_scene,
     temp_folder,
     dna_file_name: str
-) -> dict:
-    from utilities.dna_data import get_dna_json_data
+) -> Path | None:
     from meta_human_dna.utilities import get_active_face
     from meta_human_dna.dna_io import DNACalibrator
 
     face = get_active_face()
-    name = dna_file_name.split(".")[0]
     calibrate_folder = temp_folder / "calibrate"
-    dna_file_path = calibrate_folder / dna_file_name
-    json_file_path = calibrate_folder / f"{name}.json"
     calibrate_folder.mkdir(exist_ok=True)
 
     if face and face.rig_logic_instance:
@@ -60,7 +50,12 @@ def calibrated_dna_json_data(
         DNACalibrator(
             instance=face.rig_logic_instance, linear_modifier=face.linear_modifier
         ).run()
-        
-        return get_dna_json_data(dna_file_path, json_file_path)
+        return calibrate_folder / dna_file_name
+
+
+@pytest.fixture(scope="session")
+def calibrated_dna_diff(calibrated_dna_file: Path | None, dna_file_name: str):
+    from meta_human_dna.dna_io import compare_dna
 
-    return {}
+    if calibrated_dna_file:
+        return compare_dna(TEST_DNA_FOLDER / dna_file_name, calibrated_dna_file, tolerances=TOLERANCE)
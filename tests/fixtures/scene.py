@@ -35,10 +35,10 @@ def load_dna(
 @pytest.fixture(scope='session')
 def head_bmesh(load_dna) -> bmesh.types.BMesh | None:
     from meta_human_dna.utilities import get_active_face
-    from meta_human_dna.dna_io.exporter import DNAExporter
+    from utilities.mesh import get_reference_bmesh
     face = get_active_face()
     if face and face.head_mesh_object:
-        return DNAExporter.get_bmesh(face.head_mesh_object)
+        return get_reference_bmesh(face.head_mesh_object)
     
 @pytest.fixture(scope='session')
 def head_armature(load_dna) -> bpy.types.Object | None:
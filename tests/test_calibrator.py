@@ -1,62 +1,52 @@
+import time
+import logging
 import pytest
 from constants import TOLERANCE
 from mathutils import Euler, Vector
 from utilities.dna_data import (
     get_test_bone_definitions_params, 
-    get_test_bone_behaviors_params,
     get_test_mesh_geometry_params
 )
 from utilities.assertions import (
     assert_bone_definitions, 
     assert_bone_behaviors, 
-    assert_mesh_geometry
+    assert_mesh_geometry,
+    assert_dna_diff
 )
 
+logger = logging.getLogger(__name__)
+
 
 @pytest.mark.parametrize(
-    ('bone_name', 'attribute', 'axis_name'),
+    ('bone_index', 'bone_name', 'attribute'),
      get_test_bone_definitions_params()
 )
 def test_bone_definitions(
-    original_dna_json_data, 
-    calibrated_dna_json_data,
+    calibrated_dna_diff,
+    bone_index: int,
     bone_name: str,
     attribute: str,
-    axis_name: str,
     changed_bone_name: str,
     changed_bone_rotation: tuple[Euler, Euler],
     changed_bone_location: tuple[Vector, Vector]
 ):
     assert_bone_definitions(
-        expected_data=original_dna_json_data,
-        current_data=calibrated_dna_json_data,
+        diff_report=calibrated_dna_diff,
+        bone_index=bone_index,
         bone_name=bone_name,
         attribute=attribute,
-        axis_name=axis_name,
         changed_bone_name=changed_bone_name,
         changed_bone_rotation=changed_bone_rotation,
         changed_bone_location=changed_bone_location
     )
 
 
-@pytest.mark.parametrize(
-    'bone_name',
-     get_test_bone_behaviors_params()
-)
-def test_bone_behaviors(
-    original_dna_json_data, 
-    calibrated_dna_json_data,
-    bone_name: str
-):
-    assert_bone_behaviors(
-        expected_data=original_dna_json_data,
-        current_data=calibrated_dna_json_data,
-        bone_name=bone_name
-    )
+def test_bone_behaviors(calibrated_dna_diff):
+    assert_bone_behaviors(diff_report=calibrated_dna_diff)
 
 
 @pytest.mark.parametrize(
-    ('mesh_name', 'attribute', 'axis_name'), 
+    ('mesh_name', 'attribute'), 
     get_test_mesh_geometry_params(
         vertex_positions=True,
         normals=True,
@@ -64,24 +54,73 @@ def test_bone_behaviors(
     )
 )
 def test_mesh_geometry(
-    original_dna_json_data, 
-    calibrated_dna_json_data,
+    calibrated_dna_diff,
     mesh_name: str,
     attribute: str,
-    axis_name: str,
-    changed_mesh_name: int,
+    changed_mesh_name: str,
     changed_vertex_index: int,
     changed_vertex_location: tuple[Vector, Vector, Vector]
 ):
     assert_mesh_geometry(
-        expected_data=original_dna_json_data,
-        current_data=calibrated_dna_json_data,
+        diff_report=calibrated_dna_diff,
         mesh_name=mesh_name,
         attribute=attribute,
-        axis_name=axis_name,
         changed_mesh_name=changed_mesh_name,
         changed_vertex_index=changed_vertex_index,
         changed_vertex_location=changed_vertex_location,
-        tolerance=TOLERANCE[attribute],
         assert_mesh_indices=True
-    )
\ No newline at end of file
+    )
+
+
+def test_calibrated_dna_diff(
+    calibrated_dna_diff,
+    changed_bone_name: str,
+    changed_mesh_name: str,
+    changed_vertex_index: int,
+    changed_vertex_location: tuple[Vector, Vector, Vector]
+):
+    logger.info(calibrated_dna_diff.get_summary())
+    assert_dna_diff(
+        diff_report=calibrated_dna_diff,
+        changed_bone_name=changed_bone_name,
+        changed_mesh_name=changed_mesh_name,
+        changed_vertex_index=changed_vertex_index,
+        changed_vertex_location=changed_vertex_location
+    )
+    # calibration keeps the behavior of the original DNA
+    assert not [
+        difference for difference in calibrated_dna_diff.differences 
+        if difference.layer == 'behavior'
+    ], calibrated_dna_diff.get_summary()
+
+
+def test_vertex_position_changes(
+    modify_scene,
+    changed_mesh_name: str,
+    changed_vertex_index: int
+):
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNACalibrator
+
+    face = get_active_face()
+    assert face and face.rig_logic_instance, 'No active face was found.'
+    calibrator = DNACalibrator(
+        instance=face.rig_logic_instance, 
+        linear_modifier=face.linear_modifier
+    )
+    calibrator.initialize_scene_data()
+
+    start = time.perf_counter()
+    calibrator.calibrate_vertex_positions()
+    logger.info(f'Calibrated vertex positions in {(time.perf_counter() - start)*1000:.2f}ms')
+
+    for summary in calibrator.calibration_summary:
+        if summary['mesh'] == changed_mesh_name:
+            # only the moved vertex should be detected, not floating point drift from the import
+            assert summary['changed_vertex_count'] == 1
+            assert summary['max_delta'] == pytest.approx(1.0, abs=TOLERANCE['positions'])
+        else:
+            assert summary['changed_vertex_count'] == 0, f'"{summary["mesh"]}" should have no changes.'
+
+    meshes = {mesh['name']: mesh for mesh in calibrator.get_vertex_position_changes()}
+    assert meshes[changed_mesh_name]['changed'].nonzero()[0].tolist() == [changed_vertex_index]
@@ -1,6 +1,9 @@
+import sys
+import time
+import logging
 import pytest
 from mathutils import Euler, Vector
-from constants import TOLERANCE
+from constants import TOLERANCE, SAMPLE_DNA_FILE
 from utilities.dna_data import (
     get_test_bone_definitions_params, 
     get_test_mesh_geometry_params
@@ -9,37 +12,95 @@ from utilities.assertions import (
     assert_bone_definitions, 
     assert_mesh_geometry
 )
+from utilities.mesh import (
+    get_reference_bmesh,
+    get_reference_mesh_faces,
+    get_reference_mesh_vertex_positions,
+    get_reference_mesh_vertex_normals,
+    get_reference_mesh_vertex_uvs
+)
+
+logger = logging.getLogger(__name__)
+
+
+def get_reference_bone_transforms(armature_object) -> tuple[list[str], list[int], list, list]:
+    """
+    The original implementation that reads the edit bones one at a time in edit mode.
+    """
+    import math
+    from mathutils import Matrix
+    from meta_human_dna.constants import EXTRA_BONES, SCALE_FACTOR
+    from meta_human_dna.utilities import switch_to_bone_edit_mode, switch_to_object_mode
+
+    bone_names, hierarchy, translations, rotations = [], [], [], []
+    hierarchy_lookup = {}
+    global_matrix = Matrix.Rotation(math.radians(-90), 4, 'X')
+    ignored_bone_names = [i for i, _ in EXTRA_BONES]
+
+    switch_to_bone_edit_mode(armature_object)
+    edit_bones = [i for i in armature_object.data.edit_bones if i.name not in ignored_bone_names]
+    for index, edit_bone in enumerate(edit_bones):
+        if index == 0:
+            translation, rotation, _ = (global_matrix @ edit_bone.matrix).decompose()
+        else:
+            translation, rotation, _ = (edit_bone.parent.matrix.inverted() @ edit_bone.matrix).decompose()
+
+        hierarchy_index = index
+        if edit_bone.parent and edit_bone.parent.name not in ignored_bone_names:
+            hierarchy_index = hierarchy_lookup[edit_bone.parent.name]
+        hierarchy_lookup[edit_bone.name] = index
+
+        bone_names.append(edit_bone.name)
+        hierarchy.append(hierarchy_index)
+        translations.append([value * SCALE_FACTOR for value in translation])
+        rotations.append([math.degrees(value) for value in rotation.to_euler('XYZ')])
+    switch_to_object_mode()
+    return bone_names, hierarchy, translations, rotations
+
+
+def get_reference_shape_key_deltas(mesh_object, key_block_names: list[str], threshold: float) -> list[dict[int, Vector]]:
+    """
+    The naive implementation that diffs each vertex of each key block against the basis one at a time.
+    """
+    key_blocks = mesh_object.data.shape_keys.key_blocks
+    basis = mesh_object.data.shape_keys.reference_key
+    targets = []
+    for name in key_block_names:
+        deltas = {}
+        for index, (point, basis_point) in enumerate(zip(key_blocks[name].data, basis.data)):
+            delta = point.co - basis_point.co
+            if delta.length > threshold:
+                deltas[index] = delta
+        targets.append(deltas)
+    return targets
 
 
 @pytest.mark.parametrize(
-    ('bone_name', 'attribute', 'axis_name'),
+    ('bone_index', 'bone_name', 'attribute'),
      get_test_bone_definitions_params()
 )
 def test_bone_definitions(
-    original_dna_json_data, 
-    exported_dna_json_data,
+    exported_dna_diff,
+    bone_index: int,
     bone_name: str,
     attribute: str,
-    axis_name: str,
     changed_bone_name: str,
     changed_bone_rotation: tuple[Euler, Euler],
     changed_bone_location: tuple[Vector, Vector]
 ):
     assert_bone_definitions(
-        expected_data=original_dna_json_data,
-        current_data=exported_dna_json_data,
+        diff_report=exported_dna_diff,
+        bone_index=bone_index,
         bone_name=bone_name,
         attribute=attribute,
-        axis_name=axis_name,
         changed_bone_name=changed_bone_name,
         changed_bone_rotation=changed_bone_rotation,
-        changed_bone_location=changed_bone_location,
-        tolerance=TOLERANCE[attribute]
+        changed_bone_location=changed_bone_location
     )
 
 
 @pytest.mark.parametrize(
-    ('mesh_name', 'attribute', 'axis_name'), 
+    ('mesh_name', 'attribute'), 
     get_test_mesh_geometry_params(
         lods=[0],
         vertex_positions=True,
@@ -48,25 +109,837 @@ def test_bone_definitions(
     )
 )
 def test_mesh_geometry(
-    original_dna_json_data, 
-    exported_dna_json_data,
+    exported_dna_diff,
     mesh_name: str,
     attribute: str,
-    axis_name: str,
-    changed_mesh_name: int,
+    changed_mesh_name: str,
     changed_vertex_index: int,
     changed_vertex_location: tuple[Vector, Vector, Vector],
 ):
     assert_mesh_geometry(
-        expected_data=original_dna_json_data,
-        current_data=exported_dna_json_data,
+        diff_report=exported_dna_diff,
         mesh_name=mesh_name,
         attribute=attribute,
-        axis_name=axis_name,
         changed_mesh_name=changed_mesh_name,
         changed_vertex_index=changed_vertex_index,
         changed_vertex_location=changed_vertex_location,
         assert_mesh_indices=False,
-        assert_index_order=False,
-        tolerance=TOLERANCE[attribute]
-    )
\ No newline at end of file
+        assert_index_order=False
+    )
+
+
+def test_exported_dna_diff(exported_dna_diff, changed_bone_name: str):
+    assert exported_dna_diff is not None, 'The DNA was not exported.'
+    logger.info(exported_dna_diff.get_summary())
+    # the exported mesh data can be reordered, so only the joints are compared by index
+    assert exported_dna_diff.changed_joint_names == {changed_bone_name}, exported_dna_diff.get_summary()
+    assert not exported_dna_diff.get('jointNames')
+    assert not exported_dna_diff.get('jointHierarchy')
+
+
+def test_mesh_data_round_trip(load_dna, changed_vertex_index: int):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face, split_mesh_along_uv_islands
+    from meta_human_dna.dna_io import DNAExporter, get_dna_reader
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+
+    start = time.perf_counter()
+    bmesh_object = get_reference_bmesh(mesh_object)
+    split_mesh_along_uv_islands(bmesh_object=bmesh_object)
+    get_reference_mesh_vertex_positions(bmesh_object)
+    get_reference_mesh_vertex_normals(bmesh_object)
+    get_reference_mesh_vertex_uvs(bmesh_object)
+    get_reference_mesh_faces(bmesh_object)
+    bmesh_object.free()
+    bmesh_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mesh_data = DNAExporter.get_mesh_data(mesh_object)
+    columnar_time = time.perf_counter() - start
+    logger.info(f'LOD0 head mesh extraction: bmesh {bmesh_time:.3f}s, columnar {columnar_time:.3f}s')
+
+    expected_positions = np.column_stack((
+        reader.getVertexPositionXs(0),
+        reader.getVertexPositionYs(0),
+        reader.getVertexPositionZs(0)
+    ))
+    assert mesh_data['positions'].shape == expected_positions.shape
+    distances = np.linalg.norm(mesh_data['positions'] - expected_positions, axis=1)
+    mismatched = set(np.flatnonzero(distances > TOLERANCE['positions']).tolist())
+    # only the vertex that was moved by the modify scene fixture can differ
+    assert mismatched <= {changed_vertex_index}, f'Vertices {sorted(mismatched)[:10]} do not match the DNA.'
+
+    # the layouts must still map each face corner to the same vertex and uv as the DNA
+    layouts = mesh_data['layouts']
+    face_offsets = mesh_data['face_offsets']
+    dna_layout_positions = reader.getVertexLayoutPositionIndices(0)
+    dna_layout_uvs = reader.getVertexLayoutTextureCoordinateIndices(0)
+    dna_us = reader.getVertexTextureCoordinateUs(0)
+    dna_vs = reader.getVertexTextureCoordinateVs(0)
+    assert len(face_offsets) - 1 == reader.getFaceCount(0)
+    for face_index in range(reader.getFaceCount(0)):
+        dna_face = reader.getFaceVertexLayoutIndices(0, face_index)
+        current_face = layouts[mesh_data['face_layout_indices'][face_offsets[face_index]:face_offsets[face_index + 1]]]
+        assert current_face[:, 0].tolist() == [dna_layout_positions[i] for i in dna_face]
+        expected_uvs = np.array([(dna_us[dna_layout_uvs[i]], dna_vs[dna_layout_uvs[i]]) for i in dna_face])
+        assert np.allclose(mesh_data['uvs'][current_face[:, 1]], expected_uvs, atol=TOLERANCE['textureCoordinates'])
+
+
+def get_reference_split_lookup(bmesh_object) -> dict[int, int]:
+    """
+    The original implementation of split_mesh_along_uv_islands that uses list membership tests.
+    """
+    import bmesh
+    from bpy_extras.bmesh_utils import bmesh_linked_uv_islands
+
+    uv_layer = bmesh_object.loops.layers.uv.active
+    _uv_border_verts = []
+    for island_faces in bmesh_linked_uv_islands(bmesh_object, uv_layer):
+        island_loops = [loop for face in island_faces for loop in face.loops]
+        for loop in island_loops:
+            loops = (loop, loop.link_loop_radial_next)
+            if (loops[0] == loops[1]
+                or loops[1].face not in island_faces
+                or loops[0][uv_layer].uv != loops[1].link_loop_next[uv_layer].uv
+                or loops[1][uv_layer].uv != loops[0].link_loop_next[uv_layer].uv):
+                _uv_border_verts.append(loop.vert)
+
+    uv_border_edges = []
+    uv_border_verts = []
+    for edge in bmesh_object.edges:
+        if not edge.is_boundary and all(vert in _uv_border_verts for vert in edge.verts):
+            uv_border_edges.append(edge)
+            uv_border_verts.extend(list(edge.verts))
+
+    split = bmesh.ops.split_edges(bmesh_object, edges=uv_border_edges)
+    bmesh_object.verts.index_update()
+    bmesh_object.verts.ensure_lookup_table()
+
+    split_to_original_vert_lookup = {}
+    for edge in split['edges']:
+        for vert in edge.verts:
+            for _vert in uv_border_verts:
+                if vert.co == _vert.co:
+                    split_to_original_vert_lookup[vert.index] = _vert.index
+    return split_to_original_vert_lookup
+
+
+@pytest.mark.slow
+def test_split_mesh_along_uv_islands(load_dna):
+    from meta_human_dna.utilities import get_active_face, split_mesh_along_uv_islands
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+
+    bmesh_object = get_reference_bmesh(face.head_mesh_object)
+    start = time.perf_counter()
+    expected = get_reference_split_lookup(bmesh_object)
+    reference_time = time.perf_counter() - start
+    expected_vertex_count = len(bmesh_object.verts)
+    bmesh_object.free()
+
+    bmesh_object = get_reference_bmesh(face.head_mesh_object)
+    start = time.perf_counter()
+    current = split_mesh_along_uv_islands(bmesh_object=bmesh_object)
+    current_time = time.perf_counter() - start
+    current_vertex_count = len(bmesh_object.verts)
+    bmesh_object.free()
+
+    logger.info(f'LOD0 uv island split: reference {reference_time:.2f}s, current {current_time:.2f}s')
+    assert current_vertex_count == expected_vertex_count
+    assert current == expected
+
+
+@pytest.mark.slow
+def test_split_mesh_along_uv_islands_timing(addon):
+    import bmesh
+    from meta_human_dna.utilities import split_mesh_along_uv_islands
+
+    # a grid of ~200k vertices with its uvs cut into four islands along the axes
+    bmesh_object = bmesh.new()
+    bmesh.ops.create_grid(bmesh_object, x_segments=446, y_segments=446, size=1.0)
+    uv_layer = bmesh_object.loops.layers.uv.new()
+    for face in bmesh_object.faces:
+        center = face.calc_center_median()
+        offset = (0.1 if center.x > 0 else 0.0, 0.1 if center.y > 0 else 0.0)
+        for loop in face.loops:
+            loop[uv_layer].uv = (loop.vert.co.x + offset[0], loop.vert.co.y + offset[1])
+
+    vertex_count = len(bmesh_object.verts)
+    start = time.perf_counter()
+    lookup = split_mesh_along_uv_islands(bmesh_object=bmesh_object)
+    seconds = time.perf_counter() - start
+    logger.info(f'{vertex_count} vertex grid uv island split: {seconds:.2f}s')
+
+    # the verts along both seams are split, and the center vert is split into four
+    assert len(bmesh_object.verts) > vertex_count
+    assert all(original_index < vertex_count for original_index in lookup.values())
+    bmesh_object.free()
+
+
+def test_mesh_skin_weights(load_dna):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNAExporter, get_dna_reader
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+    bone_index_lookup = {reader.getJointName(index): index for index in range(reader.getJointCount())}
+
+    start = time.perf_counter()
+    offsets, joint_indices, weights = DNAExporter.get_mesh_skin_weights(
+        mesh_object=face.head_mesh_object,
+        bone_index_lookup=bone_index_lookup,
+        max_influences=reader.getMaximumInfluencePerVertex(0)
+    )
+    logger.info(f'Gathered head mesh skin weights in {(time.perf_counter() - start)*1000:.2f}ms')
+
+    assert len(offsets) - 1 == len(reader.getVertexPositionXs(0))
+    root_joint_vertex_count = 0
+    for vertex_index in range(len(offsets) - 1):
+        start, end = offsets[vertex_index], offsets[vertex_index + 1]
+        current = dict(zip(joint_indices[start:end].tolist(), weights[start:end].tolist()))
+        expected = {
+            joint_index: weight for joint_index, weight in zip(
+                reader.getSkinWeightsJointIndices(0, vertex_index),
+                reader.getSkinWeightsValues(0, vertex_index)
+            ) if weight > 1e-5
+        }
+        # joint index 0 must not be skipped
+        if 0 in expected:
+            root_joint_vertex_count += 1
+            assert 0 in current, f'Vertex {vertex_index} is missing its weight on joint 0.'
+
+        assert current.keys() == expected.keys(), f'Vertex {vertex_index} has different joints.'
+        assert np.allclose(
+            [current[key] for key in expected], 
+            list(expected.values()), 
+            atol=1e-3
+        ), f'Vertex {vertex_index} has different weights.'
+
+    logger.info(f'{root_joint_vertex_count} vertices are weighted to joint 0')
+
+    # a vertex that is only weighted to joint 0 is always covered, even if the source DNA has none
+    mesh_object = face.head_mesh_object
+    root_bone_name = reader.getJointName(0)
+    vertex_index = 0
+    previous_weights = [
+        (mesh_object.vertex_groups[element.group].name, element.weight) 
+        for element in mesh_object.data.vertices[vertex_index].groups
+    ]
+    root_vertex_group = mesh_object.vertex_groups.get(root_bone_name)
+    created = root_vertex_group is None
+    if created:
+        root_vertex_group = mesh_object.vertex_groups.new(name=root_bone_name)
+    try:
+        for vertex_group_name, _ in previous_weights:
+            mesh_object.vertex_groups[vertex_group_name].remove([vertex_index])
+        root_vertex_group.add([vertex_index], 1.0, 'REPLACE')
+        offsets, joint_indices, weights = DNAExporter.get_mesh_skin_weights(
+            mesh_object=mesh_object,
+            bone_index_lookup=bone_index_lookup,
+            max_influences=reader.getMaximumInfluencePerVertex(0)
+        )
+        start, end = offsets[vertex_index], offsets[vertex_index + 1]
+        assert joint_indices[start:end].tolist() == [0]
+        assert np.allclose(weights[start:end], [1.0])
+    finally:
+        if created:
+            mesh_object.vertex_groups.remove(root_vertex_group)
+        else:
+            root_vertex_group.remove([vertex_index])
+        for vertex_group_name, weight in previous_weights:
+            mesh_object.vertex_groups[vertex_group_name].add([vertex_index], weight, 'REPLACE')
+
+
+def test_mesh_skin_weights_pruning(load_dna):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNAExporter
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    bone_index_lookup = {bone.name: index for index, bone in enumerate(face.head_rig_object.data.bones)}
+
+    offsets, _, weights = DNAExporter.get_mesh_skin_weights(
+        mesh_object=face.head_mesh_object,
+        bone_index_lookup=bone_index_lookup,
+        max_influences=2,
+        epsilon=0.01
+    )
+    counts = np.diff(offsets)
+    assert counts.max() <= 2
+    assert np.all(weights > 0.01)
+
+    # each weighted vertex is normalized after pruning
+    totals = np.add.reduceat(weights, offsets[:-1][counts > 0])
+    assert np.allclose(totals, 1.0, atol=1e-4)
+
+
+def test_face_layouts(exported_dna_file):
+    from meta_human_dna.dna_io import get_dna_reader
+
+    assert exported_dna_file, 'The DNA was not exported.'
+    expected_reader = get_dna_reader(SAMPLE_DNA_FILE)
+    current_reader = get_dna_reader(exported_dna_file)
+    expected_mesh_indices = {
+        expected_reader.getMeshName(index): index for index in range(expected_reader.getMeshCount())
+    }
+
+    for mesh_index in current_reader.getMeshIndicesForLOD(0):
+        mesh_name = current_reader.getMeshName(mesh_index)
+        expected_mesh_index = expected_mesh_indices[mesh_name]
+        face_count = current_reader.getFaceCount(mesh_index)
+        assert face_count == expected_reader.getFaceCount(expected_mesh_index), \
+            f'Mesh "{mesh_name}" has a different number of faces.'
+
+        current_positions = current_reader.getVertexLayoutPositionIndices(mesh_index)
+        expected_positions = expected_reader.getVertexLayoutPositionIndices(expected_mesh_index)
+        for face_index in range(face_count):
+            current_face = [
+                current_positions[i] for i in current_reader.getFaceVertexLayoutIndices(mesh_index, face_index)
+            ]
+            expected_face = [
+                expected_positions[i] for i in expected_reader.getFaceVertexLayoutIndices(expected_mesh_index, face_index)
+            ]
+            assert current_face == expected_face, f'Face {face_index} on mesh "{mesh_name}" does not match.'
+
+
+def test_fingerprints(load_dna):
+    from meta_human_dna.utilities import get_active_face, get_mesh_fingerprint
+    from meta_human_dna.dna_io import DNAExporter
+
+    face = get_active_face()
+    assert face and face.head_mesh_object and face.head_rig_object, 'No active face was found.'
+    exporter = DNAExporter(
+        instance=face.rig_logic_instance,
+        linear_modifier=face.linear_modifier
+    )
+    # the meshes and bones were fingerprinted on import
+    assert exporter.is_unchanged(face.head_rig_object)
+    assert exporter.is_unchanged(face.head_mesh_object)
+    fingerprint = get_mesh_fingerprint(face.head_mesh_object)
+    assert fingerprint == get_mesh_fingerprint(face.head_mesh_object)
+
+    vertex = face.head_mesh_object.data.vertices[0]
+    vertex.co.x += 0.01
+    try:
+        assert get_mesh_fingerprint(face.head_mesh_object) != fingerprint
+    finally:
+        vertex.co.x -= 0.01
+
+    # a fingerprint that was recorded against a different DNA file is treated as changed
+    instance = face.rig_logic_instance
+    recorded = instance.fingerprint_list[face.head_mesh_object.name]
+    dna_hash = recorded.dna_hash
+    recorded.dna_hash = '0' * 40
+    try:
+        assert not DNAExporter(
+            instance=instance,
+            linear_modifier=face.linear_modifier
+        ).is_unchanged(face.head_mesh_object)
+    finally:
+        recorded.dna_hash = dna_hash
+
+
+def test_source_layout_loops(load_dna):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face, get_mesh_loop_vertex_indices
+    from meta_human_dna.dna_io import DNAExporter, get_dna_reader
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    exporter = DNAExporter(
+        instance=face.rig_logic_instance,
+        linear_modifier=face.linear_modifier
+    )
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+    mesh_index = next(
+        index for index in range(reader.getMeshCount()) 
+        if mesh_object.name.endswith(reader.getMeshName(index))
+    )
+
+    # the loops of the imported mesh line up with the layouts of the source mesh
+    layout_loops = exporter.get_source_layout_loops(mesh_index, mesh_object)
+    assert layout_loops is not None
+    layout_positions = np.asarray(reader.getVertexLayoutPositionIndices(mesh_index))
+    used = np.zeros(len(layout_positions), dtype=bool)
+    for face_index in range(reader.getFaceCount(mesh_index)):
+        used[reader.getFaceVertexLayoutIndices(mesh_index, face_index)] = True
+    loop_vertex_indices = get_mesh_loop_vertex_indices(mesh_object.data)
+    assert np.array_equal(loop_vertex_indices[layout_loops[used]], layout_positions[used])
+
+
+def test_vertex_only_export(load_dna, temp_folder, changed_vertex_index: int):
+    import numpy as np
+    from mathutils import Vector
+    from meta_human_dna.utilities import get_active_face, get_armature_fingerprint
+    from meta_human_dna.dna_io import DNAExporter, get_dna_reader
+    from meta_human_dna.dna_io.cache import get_dna_content_hash
+
+    face = get_active_face()
+    assert face and face.head_mesh_object and face.head_rig_object, 'No active face was found.'
+    instance = face.rig_logic_instance
+    rig_object = face.head_rig_object
+    mesh_object = face.head_mesh_object
+    instance.output_folder_path = str(temp_folder / 'vertex_only_export')
+
+    # treat the rig as unchanged, so only the moved vertex makes the head mesh export
+    dna_hash = get_dna_content_hash(SAMPLE_DNA_FILE)
+    rig_fingerprint = instance.get_fingerprint(rig_object.name)
+    instance.set_fingerprint(rig_object.name, get_armature_fingerprint(rig_object), dna_hash=dna_hash)
+    vertex = mesh_object.data.vertices[changed_vertex_index]
+    original_location = vertex.co.copy()
+    try:
+        vertex.co = original_location + Vector((0.0, 0.0, 0.001))
+        exporter = DNAExporter(instance=instance, linear_modifier=face.linear_modifier, vertex_colors=False)
+        assert exporter.is_unchanged(rig_object)
+        assert not exporter.is_unchanged(mesh_object)
+        valid, _, message, _ = exporter.run()
+        assert valid, message
+    finally:
+        vertex.co = original_location
+        instance.set_fingerprint(rig_object.name, rig_fingerprint or '', dna_hash=dna_hash)
+
+    expected_reader = get_dna_reader(SAMPLE_DNA_FILE)
+    current_reader = get_dna_reader(temp_folder / 'vertex_only_export' / f'{instance.name}.dna')
+    assert current_reader.getMaximumInfluencePerVertex(0) == expected_reader.getMaximumInfluencePerVertex(0)
+    for vertex_index in range(current_reader.getVertexPositionCount(0)):
+        current = {
+            joint_index: weight for joint_index, weight in zip(
+                current_reader.getSkinWeightsJointIndices(0, vertex_index),
+                current_reader.getSkinWeightsValues(0, vertex_index)
+            ) if weight > 1e-5
+        }
+        expected = {
+            joint_index: weight for joint_index, weight in zip(
+                expected_reader.getSkinWeightsJointIndices(0, vertex_index),
+                expected_reader.getSkinWeightsValues(0, vertex_index)
+            ) if weight > 1e-5
+        }
+        assert current.keys() == expected.keys(), f'Vertex {vertex_index} has different joints.'
+        assert np.allclose(
+            [current[key] for key in expected],
+            list(expected.values()),
+            atol=1e-3
+        ), f'Vertex {vertex_index} has different weights.'
+
+
+def test_bone_transforms(load_dna):
+    import bpy
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNAExporter
+
+    face = get_active_face()
+    assert face and face.head_rig_object, 'No active face was found.'
+    bone_names, hierarchy, translations, rotations = get_reference_bone_transforms(face.head_rig_object)
+
+    mode = bpy.context.mode
+    start = time.perf_counter()
+    _, current_bone_names, current_hierarchy, _, current_translations, current_rotations = \
+        DNAExporter.get_bone_transforms(face.head_rig_object)
+    logger.info(f'Got {len(current_bone_names)} bone transforms in {(time.perf_counter() - start)*1000:.2f}ms')
+
+    # the bones are read without switching modes
+    assert bpy.context.mode == mode
+    assert current_bone_names == bone_names
+    assert current_hierarchy == hierarchy
+    assert np.allclose(current_translations, translations, atol=TOLERANCE['neutralJointTranslations'])
+    assert np.allclose(current_rotations, rotations, atol=TOLERANCE['neutralJointRotations'])
+
+
+def get_peak_rss() -> float | None:
+    """
+    Gets the peak resident set size of the process in megabytes, if the platform reports it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # linux reports kilobytes and macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    ('name', 'meshes', 'lods', 'rebuild'),
+    [
+        ('bones_only', False, None, False),
+        ('lod0_geometry', True, [0], False),
+        ('full', True, None, True),
+    ]
+)
+def test_export_timing(
+    modify_scene, 
+    temp_folder, 
+    monkeypatch,
+    name: str, 
+    meshes: bool, 
+    lods: list[int] | None,
+    rebuild: bool
+):
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNAExporter, get_dna_reader
+
+    face = get_active_face()
+    assert face, 'No active face was found.'
+    face.rig_logic_instance.output_folder_path = str(temp_folder / 'export_timing')
+    if rebuild:
+        # treat every object as changed so the whole DNA is written from the scene
+        monkeypatch.setattr(DNAExporter, 'is_unchanged', lambda self, scene_object: False)
+        monkeypatch.setattr(DNAExporter, 'can_update_in_place', lambda self, bone_names: False)
+
+    peak_before = get_peak_rss()
+    start = time.perf_counter()
+    DNAExporter(
+        instance=face.rig_logic_instance,
+        linear_modifier=face.linear_modifier,
+        meshes=meshes,
+        vertex_colors=False,
+        lods=lods,
+        file_name=f'{name}.dna'
+    ).run()
+    seconds = time.perf_counter() - start
+    peak_after = get_peak_rss()
+    if peak_before is None or peak_after is None:
+        logger.info(f'Export "{name}" took {seconds:.2f}s')
+    else:
+        # the native DNA reader and writer allocations are only seen in the process memory
+        logger.info(
+            f'Export "{name}" took {seconds:.2f}s with a peak RSS of {peak_after:.2f}MB '
+            f'(+{peak_after - peak_before:.2f}MB)'
+        )
+
+    # the meshes that were not exported are kept from the source DNA
+    expected_reader = get_dna_reader(SAMPLE_DNA_FILE)
+    current_reader = get_dna_reader(temp_folder / 'export_timing' / f'{name}.dna')
+    if not rebuild:
+        assert current_reader.getMeshCount() == expected_reader.getMeshCount()
+        for mesh_index in current_reader.getMeshIndicesForLOD(1):
+            assert current_reader.getVertexPositionCount(mesh_index) == \
+                expected_reader.getVertexPositionCount(mesh_index)
+            assert current_reader.getBlendShapeTargetCount(mesh_index) == \
+                expected_reader.getBlendShapeTargetCount(mesh_index)
+
+
+def test_background_dna_write(addon, temp_folder):
+    from meta_human_dna.bindings import riglogic
+    from meta_human_dna.dna_io import DNAFileWrite, get_dna_reader, get_dna_writer
+    from meta_human_dna.dna_io.misc import get_temp_dna_file_path
+
+    class FailingWriter:
+        def write(self):
+            raise OSError('Disk full')
+
+    file_path = temp_folder / 'background_write' / 'ada.dna'
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    file_path.write_bytes(b'existing')
+    temp_file_path = get_temp_dna_file_path(file_path)
+
+    # a failed write should leave the existing file untouched
+    temp_file_path.write_bytes(b'partial')
+    write_task = DNAFileWrite(FailingWriter(), temp_file_path, file_path) # type: ignore
+    write_task.start()
+    assert write_task.wait(timeout=60)
+    assert isinstance(write_task.error, OSError)
+    assert file_path.read_bytes() == b'existing'
+    assert not temp_file_path.exists()
+
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+    writer = get_dna_writer(temp_file_path)
+    writer.setFrom(reader, riglogic.DataLayer.All, riglogic.UnknownLayerPolicy.Preserve, None)
+    write_task = DNAFileWrite(writer, temp_file_path, file_path, fsync=True)
+    write_task.start()
+    assert write_task.wait(timeout=60)
+    assert write_task.error is None
+    assert write_task.progress == 1.0
+    assert not temp_file_path.exists()
+    assert get_dna_reader(file_path).getJointCount() == reader.getJointCount()
+
+
+def test_concurrent_dna_writes(addon, temp_folder):
+    import threading
+    from meta_human_dna.dna_io import DNAFileWrite
+    from meta_human_dna.dna_io.misc import get_temp_dna_file_path, is_dna_file_being_written
+
+    class BlockingWriter:
+        def __init__(self):
+            self.release = threading.Event()
+
+        def write(self):
+            self.release.wait(timeout=60)
+            raise OSError('Cancelled')
+
+    file_path = temp_folder / 'concurrent_write' / 'ada.dna'
+    first_temp_file_path = get_temp_dna_file_path(file_path)
+    second_temp_file_path = get_temp_dna_file_path(file_path)
+    assert first_temp_file_path != second_temp_file_path, 'Each write needs its own temporary file.'
+
+    writer = BlockingWriter()
+    first_write = DNAFileWrite(writer, first_temp_file_path, file_path) # type: ignore
+    first_write.start()
+    try:
+        assert is_dna_file_being_written(file_path)
+        # a second write to the same target is rejected while the first one is running
+        with pytest.raises(RuntimeError):
+            DNAFileWrite(BlockingWriter(), second_temp_file_path, file_path).start() # type: ignore
+    finally:
+        writer.release.set()
+        first_write.wait(timeout=60)
+    assert not is_dna_file_being_written(file_path)
+    second_temp_file_path.unlink(missing_ok=True)
+
+
+def test_exporter_temp_file(load_dna, temp_folder, monkeypatch):
+    from meta_human_dna.utilities import get_active_face
+    from meta_human_dna.dna_io import DNAExporter
+
+    face = get_active_face()
+    assert face and face.rig_logic_instance, 'No active face was found.'
+    export_folder = temp_folder / 'exporter_temp_file'
+    export_folder.mkdir(parents=True, exist_ok=True)
+    face.rig_logic_instance.output_folder_path = str(export_folder)
+
+    # the temporary file is only created once the DNA data is set
+    exporter = DNAExporter(instance=face.rig_logic_instance, linear_modifier=face.linear_modifier)
+    assert exporter.is_unchanged(face.head_rig_object)
+    assert not list(export_folder.glob('*.tmp'))
+
+    # and it is removed when the export fails before it is written
+    def fail(*args, **kwargs):
+        raise RuntimeError('Export failed')
+
+    monkeypatch.setattr(DNAExporter, 'write_dna', fail)
+    with pytest.raises(RuntimeError):
+        exporter.run()
+    assert exporter._temp_dna_file is not None
+    assert not list(export_folder.glob('*.tmp'))
+
+
+def test_sync_files(addon, temp_folder):
+    import os
+    from meta_human_dna.utilities import sync_files
+
+    source_folder = temp_folder / 'sync_files' / 'source'
+    destination_folder = temp_folder / 'sync_files' / 'destination'
+    source_folder.mkdir(parents=True, exist_ok=True)
+    file_paths = []
+    for index in range(4):
+        source = source_folder / f'map_{index}.png'
+        source.write_bytes(os.urandom(1024 * (index + 1)))
+        file_paths.append((source, destination_folder / source.name))
+    total_size = sum(source.stat().st_size for source, _ in file_paths)
+
+    report = sync_files(file_paths)
+    assert report.files_written + report.files_linked == 4
+    assert report.bytes_written + report.bytes_linked == total_size
+    for source, destination in file_paths:
+        assert destination.read_bytes() == source.read_bytes()
+
+    # nothing changed, so everything should be skipped
+    report = sync_files(file_paths)
+    assert report.files_skipped == 4
+    assert report.bytes_skipped == total_size
+
+    # only the changed file is copied again
+    file_paths[0][0].write_bytes(os.urandom(1024))
+    report = sync_files(file_paths)
+    assert report.files_written == 1
+    assert report.files_skipped == 3
+    assert file_paths[0][1].read_bytes() == file_paths[0][0].read_bytes()
+
+    # hard links share the source file
+    report = sync_files([(file_paths[1][0], destination_folder / 'linked.png')], hard_link=True)
+    assert report.files_linked == 1
+    assert os.path.samefile(file_paths[1][0], destination_folder / 'linked.png')
+
+
+@pytest.mark.slow
+def test_shape_key_deltas_timing(addon):
+    import bpy
+    import bmesh
+    import numpy as np
+    from meta_human_dna.utilities import get_shape_key_deltas
+
+    # a grid with ~800 sparse shape keys
+    bmesh_object = bmesh.new()
+    bmesh.ops.create_grid(bmesh_object, x_segments=49, y_segments=49, size=1.0)
+    mesh = bpy.data.meshes.new('shape_key_deltas_test')
+    bmesh_object.to_mesh(mesh)
+    bmesh_object.free()
+    mesh_object = bpy.data.objects.new('shape_key_deltas_test', mesh)
+    bpy.context.scene.collection.objects.link(mesh_object) # type: ignore
+
+    random = np.random.default_rng(0)
+    vertex_count = len(mesh.vertices)
+    basis = np.empty(vertex_count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', basis)
+    mesh_object.shape_key_add(name='Basis')
+    key_block_names = []
+    for index in range(800):
+        co = basis.reshape(-1, 3).copy()
+        moved = random.random(vertex_count) < 0.05
+        co[moved] += random.normal(scale=0.01, size=(int(moved.sum()), 3)).astype(np.float32)
+        key_block = mesh_object.shape_key_add(name=f'target_{index}')
+        key_block.data.foreach_set('co', co.ravel())
+        key_block_names.append(key_block.name)
+
+    try:
+        start = time.perf_counter()
+        expected = get_reference_shape_key_deltas(mesh_object, key_block_names, threshold=0.0001)
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        offsets, vertex_indices, deltas = get_shape_key_deltas(mesh_object, key_block_names, threshold=0.0001)
+        vectorized_time = time.perf_counter() - start
+        logger.info(
+            f'{len(key_block_names)} shape keys on {vertex_count} vertices: '
+            f'per-vertex {reference_time:.2f}s, vectorized {vectorized_time:.2f}s'
+        )
+
+        for index, expected_deltas in enumerate(expected):
+            start, end = offsets[index], offsets[index + 1]
+            assert vertex_indices[start:end].tolist() == list(expected_deltas.keys())
+            assert np.allclose(deltas[start:end], [list(delta) for delta in expected_deltas.values()], atol=1e-6)
+    finally:
+        bpy.data.objects.remove(mesh_object)
+        bpy.data.meshes.remove(mesh)
+
+
+def get_dense_target_deltas(reader, mesh_index: int, target_index: int, vertex_count: int):
+    import numpy as np
+    deltas = np.zeros((vertex_count, 3))
+    deltas[list(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index))] = np.column_stack((
+        reader.getBlendShapeTargetDeltaXs(mesh_index, target_index),
+        reader.getBlendShapeTargetDeltaYs(mesh_index, target_index),
+        reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+    ))
+    return deltas
+
+
+def test_blend_shape_round_trip(load_dna, temp_folder):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face, initialize_basis_shape_key
+    from meta_human_dna.dna_io import DNAExporter, create_shape_key, get_dna_reader
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+    mesh_name = reader.getMeshName(0)
+    target_count = min(reader.getBlendShapeTargetCount(0), 20)
+
+    initialize_basis_shape_key(mesh_object)
+    try:
+        for index in range(target_count):
+            channel_index = reader.getBlendShapeChannelIndex(0, index)
+            create_shape_key(
+                index=index,
+                mesh_index=0,
+                mesh_object=mesh_object,
+                reader=reader,
+                name=reader.getBlendShapeChannelName(channel_index),
+                prefix=f'{mesh_name}__',
+                linear_modifier=face.linear_modifier
+            )
+
+        exporter = DNAExporter(
+            instance=face.rig_logic_instance,
+            linear_modifier=face.linear_modifier,
+            reader=reader
+        )
+        channel_indices, offsets, vertex_indices, deltas = exporter.get_mesh_blend_shapes(mesh_object, mesh_name)
+        assert channel_indices == [reader.getBlendShapeChannelIndex(0, index) for index in range(target_count)]
+
+        vertex_count = len(mesh_object.data.vertices)
+        for index in range(target_count):
+            start, end = offsets[index], offsets[index + 1]
+            current = np.zeros((vertex_count, 3))
+            current[vertex_indices[start:end]] = deltas[start:end]
+            expected = get_dense_target_deltas(reader, 0, index, vertex_count)
+            assert np.allclose(current, expected, atol=TOLERANCE['positions']), \
+                f'Blend shape target {index} does not match the DNA.'
+
+        # edit the first shape key, then write the DNA and read it back
+        instance = face.rig_logic_instance
+        instance.output_folder_path = str(temp_folder / 'blend_shape_round_trip')
+        key_block = mesh_object.data.shape_keys.key_blocks[
+            f'{mesh_name}__{reader.getBlendShapeChannelName(channel_indices[0])}'
+        ]
+        key_block.data[int(vertex_indices[0])].co.z += 0.01
+        _, edited_offsets, edited_vertex_indices, edited_deltas = exporter.get_mesh_blend_shapes(mesh_object, mesh_name)
+        edited = np.zeros((vertex_count, 3))
+        edited[edited_vertex_indices[edited_offsets[0]:edited_offsets[1]]] = edited_deltas[edited_offsets[0]:edited_offsets[1]]
+
+        file_path = temp_folder / 'blend_shape_round_trip' / f'{instance.name}.dna'
+        for generate_neutral_shapes in (False, True):
+            instance.generate_neutral_shapes = generate_neutral_shapes
+            valid, _, message, _ = DNAExporter(
+                instance=instance,
+                linear_modifier=face.linear_modifier,
+                vertex_colors=False
+            ).run()
+            assert valid, message
+
+            # the targets without a shape key are kept, and neutral shape keys don't replace any targets
+            current_reader = get_dna_reader(file_path)
+            assert current_reader.getBlendShapeTargetCount(0) == reader.getBlendShapeTargetCount(0)
+            for index in range(reader.getBlendShapeTargetCount(0)):
+                assert current_reader.getBlendShapeChannelIndex(0, index) == reader.getBlendShapeChannelIndex(0, index)
+                current = get_dense_target_deltas(current_reader, 0, index, vertex_count)
+                if index == 0 and not generate_neutral_shapes:
+                    expected = edited
+                else:
+                    expected = get_dense_target_deltas(reader, 0, index, vertex_count)
+                assert np.allclose(current, expected, atol=TOLERANCE['positions']), \
+                    f'Exported blend shape target {index} does not match.'
+    finally:
+        face.rig_logic_instance.generate_neutral_shapes = False
+        mesh_object.shape_key_clear()
+        for vertex_group in list(mesh_object.vertex_groups):
+            if vertex_group.name.startswith('SHAPE_KEY_'):
+                mesh_object.vertex_groups.remove(vertex_group)
+
+
+def test_optimize_dna(addon, temp_folder):
+    import numpy as np
+    from meta_human_dna.dna_io import DNAOptimizer, get_dna_reader
+    from meta_human_dna.dna_io.optimizer import get_pose_library
+    from meta_human_dna.constants import BLEND_SHAPE_DELTA_EPSILON
+
+    poses = dict(list(get_pose_library().items())[:10])
+    assert poses, 'No poses were found in the pose library.'
+
+    file_path = temp_folder / 'ada_optimized.dna'
+    report = DNAOptimizer(dna_file_path=SAMPLE_DNA_FILE).run(file_path, poses=poses, iterations=2)
+    logger.info(
+        f'Optimized DNA is {report["optimized_size"]} bytes instead of {report["original_size"]} bytes, '
+        f'calculate speedup {report["calculate_speedup"]:.2f}x, max pose errors {report["max_pose_errors"]}'
+    )
+
+    assert report['optimized_size'] <= report['original_size']
+    assert report['pose_count'] == len(poses)
+    assert report['max_pose_errors']['joints'] < TOLERANCE['neutralJointTranslations'] * 10
+    assert report['max_pose_errors']['blend_shapes'] < 1e-3
+    original_reader = get_dna_reader(file_path=SAMPLE_DNA_FILE)
+    # without quantizing the kept deltas are unchanged, and only deltas within the epsilon are removed
+    assert report['max_blend_shape_quantize_error'] == 0.0
+    assert report['max_removed_blend_shape_delta'] <= BLEND_SHAPE_DELTA_EPSILON
+    assert set(report['blend_shape_delta_errors']) == {
+        original_reader.getMeshName(index) for index in range(original_reader.getMeshCount())
+    }
+
+    reader = get_dna_reader(file_path=file_path)
+    assert reader.getJointGroupCount() == original_reader.getJointGroupCount()
+    for group_index in range(reader.getJointGroupCount()):
+        values = np.array(reader.getJointGroupValues(group_index))
+        assert not np.any((values != 0.0) & (np.abs(values) < 1e-4)), \
+            f'Joint group {group_index} still has values below the tolerance.'
@@ -0,0 +1,320 @@
+import math
+import json
+import time
+import logging
+import pytest
+from mathutils import Vector, Matrix, Euler
+from constants import SAMPLE_DNA_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def get_reference_joint_world_matrices(reader, linear_modifier: float) -> list[Matrix]:
+    """
+    The original per-bone implementation that multiplies up the hierarchy one bone at a time.
+    """
+    x_locations = reader.getNeutralJointTranslationXs()
+    y_locations = reader.getNeutralJointTranslationYs()
+    z_locations = reader.getNeutralJointTranslationZs()
+    x_rotations = reader.getNeutralJointRotationXs()
+    y_rotations = reader.getNeutralJointRotationYs()
+    z_rotations = reader.getNeutralJointRotationZs()
+
+    world_matrices = []
+    for index in range(reader.getJointCount()):
+        location = Vector((
+            x_locations[index]*linear_modifier,
+            y_locations[index]*linear_modifier,
+            z_locations[index]*linear_modifier,
+        ))
+        euler_rotation = Euler((
+            math.radians(x_rotations[index]),
+            math.radians(y_rotations[index]),
+            math.radians(z_rotations[index]),
+        ), "XYZ")
+        local_matrix = Matrix.Translation(location) @ euler_rotation.to_matrix().to_4x4()
+        if index == 0:
+            world_matrices.append(local_matrix)
+        else:
+            parent_index = reader.getJointParentIndex(index)
+            world_matrices.append(world_matrices[parent_index] @ local_matrix)
+    return world_matrices
+
+
+@pytest.fixture(scope='module')
+def dna_reader(addon):
+    from meta_human_dna.dna_io import get_dna_reader
+    return get_dna_reader(SAMPLE_DNA_FILE, 'binary', 'Definition')
+
+
+@pytest.fixture(scope='module')
+def joint_arrays(dna_reader) -> tuple:
+    import numpy as np
+    joint_count = dna_reader.getJointCount()
+    parent_indices = np.array([dna_reader.getJointParentIndex(i) for i in range(joint_count)])
+    translations = np.column_stack((
+        dna_reader.getNeutralJointTranslationXs(),
+        dna_reader.getNeutralJointTranslationYs(),
+        dna_reader.getNeutralJointTranslationZs()
+    )) * 0.01
+    rotations = np.radians(np.column_stack((
+        dna_reader.getNeutralJointRotationXs(),
+        dna_reader.getNeutralJointRotationYs(),
+        dna_reader.getNeutralJointRotationZs()
+    )))
+    return parent_indices, translations, rotations
+
+
+def test_joint_world_matrices(dna_reader, joint_arrays):
+    import numpy as np
+    from meta_human_dna.utilities import get_joint_world_matrices
+
+    expected = np.array([
+        np.array(matrix) for matrix in get_reference_joint_world_matrices(dna_reader, 0.01)
+    ])
+    current = get_joint_world_matrices(*joint_arrays)
+
+    assert current.shape == expected.shape
+    assert np.allclose(current, expected, atol=1e-5), \
+        f'Max joint matrix difference is {np.abs(current - expected).max()}'
+
+
+def test_imported_bone_matrices(head_armature, dna_reader, joint_arrays):
+    import numpy as np
+    from meta_human_dna.utilities import get_joint_world_matrices
+
+    # the imported armature is rotated to Z-up
+    current = get_joint_world_matrices(
+        *joint_arrays,
+        root_matrix=Matrix.Rotation(math.radians(90), 4, 'X')
+    )
+    for index in range(dna_reader.getJointCount()):
+        bone_name = dna_reader.getJointName(index)
+        bone = head_armature.data.bones[bone_name]
+        assert np.allclose(np.array(bone.matrix_local), current[index], atol=1e-4), \
+            f'Bone "{bone_name}" does not match its DNA rest matrix.'
+
+
+@pytest.mark.slow
+def test_joint_world_matrices_timing(dna_reader, joint_arrays):
+    from meta_human_dna.utilities import get_joint_world_matrices
+
+    start = time.perf_counter()
+    get_reference_joint_world_matrices(dna_reader, 0.01)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    get_joint_world_matrices(*joint_arrays)
+    vectorized_time = time.perf_counter() - start
+
+    logger.info(
+        f'{dna_reader.getJointCount()} joints: per-bone {reference_time*1000:.2f}ms, '
+        f'vectorized {vectorized_time*1000:.2f}ms'
+    )
+
+
+def test_batch_bone_matrices(head_armature, joint_arrays):
+    import numpy as np
+    from meta_human_dna.utilities import get_active_face, get_joint_world_matrices
+
+    face = get_active_face()
+    assert face, 'No active face was found.'
+    importer = face.dna_importer
+    importer.rig_object = head_armature
+
+    expected = get_joint_world_matrices(
+        *joint_arrays,
+        root_matrix=Matrix.Rotation(math.radians(90), 4, 'X')
+    )
+
+    start = time.perf_counter()
+    bone_matrices = importer.get_bone_matrices(bone_names=importer.joint_names)
+    logger.info(f'Resolved {len(bone_matrices)} bone rest matrices in {(time.perf_counter() - start)*1000:.2f}ms')
+
+    assert len(bone_matrices) == len(importer.joint_names)
+    for bone_name, bone_matrix in bone_matrices.items():
+        index = importer.joint_index_lookup[bone_name]
+        assert np.allclose(np.array(bone_matrix), expected[index], atol=1e-5), \
+            f'Bone "{bone_name}" rest matrix does not match.'
+
+
+def test_import_report(addon, temp_folder):
+    import json
+    from meta_human_dna.utilities import PhaseProfiler
+
+    profiler = PhaseProfiler(name='test', trace_memory=True)
+    profiler.start()
+    with profiler.span('bones'):
+        pass
+    for lod_index in range(2):
+        with profiler.span('mesh', lod=lod_index, mesh=f'head_lod{lod_index}_mesh'):
+            with profiler.span('positions', lod=lod_index, mesh=f'head_lod{lod_index}_mesh'):
+                _ = [0.0] * 100000
+    profiler.stop()
+
+    report = json.loads(profiler.save(temp_folder / 'test_import_report.json').read_text())
+    assert report['phases']['mesh']['count'] == 2
+    assert report['phases']['positions']['peak_memory_bytes'] > 0
+    assert set(report['lods'].keys()) == {'0', '1'}
+    assert 'positions' in report['lods']['0']['meshes']['head_lod0_mesh']
+    assert 'mesh' in profiler.get_summary_table()
+
+
+def test_import_report_dna_read(addon, temp_folder):
+    import bpy
+    import shutil
+    from meta_human_dna.constants import IMPORT_REPORT_FILE_NAME
+    from meta_human_dna.utilities import get_face
+
+    name = 'import_report'
+    file_path = temp_folder / f'{name}.dna'
+    shutil.copy(SAMPLE_DNA_FILE, file_path)
+
+    bpy.ops.meta_human_dna.import_dna( # type: ignore
+        filepath=str(file_path),
+        import_mesh=False,
+        import_bones=True,
+        import_vertex_groups=False,
+        import_materials=False,
+        import_face_board=False,
+        write_import_report=True
+    )
+
+    # the dna is read after the profiler starts, so its time is part of the import total
+    report = json.loads((temp_folder / f'{name}_{IMPORT_REPORT_FILE_NAME}').read_text())
+    assert report['phases']['dna_read']['count'] == 1
+    assert 0 < report['phases']['dna_read']['seconds'] <= report['total_seconds']
+
+    face = get_face(name)
+    assert face, f'Face "{name}" was not imported.'
+    face.delete()
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize(
+    ('name', 'import_lods', 'defer_unselected_lods'),
+    [
+        ('lod0_only', ['lod0'], True),
+        ('all_lods', [f'lod{i}' for i in range(8)], False),
+    ]
+)
+def test_deferred_lod_import_timing(
+    load_dna, 
+    temp_folder, 
+    name: str, 
+    import_lods: list[str], 
+    defer_unselected_lods: bool
+):
+    import bpy
+    import shutil
+    import tracemalloc
+    from meta_human_dna.utilities import get_face
+
+    file_path = temp_folder / f'{name}.dna'
+    shutil.copy(SAMPLE_DNA_FILE, file_path)
+
+    lods_to_import = {f'import_lod{i}': f'lod{i}' in import_lods for i in range(8)}
+    tracemalloc.start()
+    start = time.perf_counter()
+    bpy.ops.meta_human_dna.import_dna( # type: ignore
+        filepath=str(file_path),
+        import_mesh=True,
+        import_bones=True,
+        import_vertex_groups=True,
+        import_materials=False,
+        import_face_board=False,
+        defer_unselected_lods=defer_unselected_lods,
+        **lods_to_import
+    )
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    logger.info(f'Import "{name}" took {seconds:.2f}s with a python peak memory of {peak / (1024 * 1024):.2f}MB')
+
+    face = get_face(name)
+    assert face, f'Face "{name}" was not imported.'
+    deferred_lods = list(face.rig_logic_instance.deferred_lods)
+    if defer_unselected_lods:
+        assert deferred_lods[1], 'LOD1 should be deferred.'
+        assert not bpy.data.objects.get(f'{name}_head_lod1_mesh')
+        # switching the active lod should stream the meshes in
+        face.rig_logic_instance.active_lod = 'lod1'
+        assert bpy.data.objects.get(f'{name}_head_lod1_mesh')
+        assert not face.rig_logic_instance.deferred_lods[1]
+        face.rig_logic_instance.active_lod = 'lod0'
+    else:
+        assert not any(deferred_lods)
+
+    face.delete()
+
+
+def test_geometry_cache(addon, temp_folder):
+    import numpy as np
+    from meta_human_dna.dna_io import GeometryCache, get_dna_reader
+
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+
+    # only the field groups that are accessed are decoded and saved
+    cache = GeometryCache(SAMPLE_DNA_FILE, reader=reader, cache_folder=temp_folder / 'lazy_geometry_cache')
+    cache.initialize()
+    assert np.allclose(cache.get_mesh(0)['positions'][:, 0], reader.getVertexPositionXs(0))
+    assert cache.get_array_file_path(0, 'positions').exists()
+    assert not cache.get_array_file_path(0, 'skin_weights').exists()
+    assert not cache.get_array_file_path(0, 'target_deltas').exists()
+    assert not cache.get_array_file_path(1, 'positions').exists()
+
+    # the max size is enforced as the geometry is written, and folders that are not cache entries are kept
+    cache_folder = temp_folder / 'evicted_geometry_cache'
+    unrelated_folder = cache_folder / 'user_data'
+    unrelated_folder.mkdir(parents=True)
+    (unrelated_folder / 'index.json').write_text('{}')
+    stale_folder = cache_folder / ('0' * 40)
+    stale_folder.mkdir()
+    (stale_folder / 'index.json').write_text(json.dumps({'version': 0, 'dna_file_path': 'stale.dna'}))
+    (stale_folder / '0_positions.npy').write_bytes(bytes(512 * 1024))
+    cache = GeometryCache(SAMPLE_DNA_FILE, reader=reader, cache_folder=cache_folder, max_size=1)
+    cache.initialize()
+    assert stale_folder.exists(), 'The empty entry should fit next to the stale one.'
+    cache.get_mesh(0)['target_deltas']
+    assert not stale_folder.exists(), 'The stale entry should be evicted once the geometry is written.'
+    assert unrelated_folder.exists()
+
+    cache = GeometryCache(SAMPLE_DNA_FILE, cache_folder=temp_folder / 'geometry_cache')
+    start = time.perf_counter()
+    cache.build(reader)
+    logger.info(f'Built geometry cache in {time.perf_counter() - start:.2f}s')
+    assert cache.is_valid
+
+    # a new instance should read the cache that was written to disk
+    cache = GeometryCache(SAMPLE_DNA_FILE, cache_folder=temp_folder / 'geometry_cache')
+    assert cache.is_valid
+    for mesh_index in range(reader.getMeshCount()):
+        geometry = cache.get_mesh(mesh_index)
+        assert np.allclose(geometry['positions'][:, 0], reader.getVertexPositionXs(mesh_index))
+        assert np.allclose(geometry['uvs'][:, 1], reader.getVertexTextureCoordinateVs(mesh_index))
+        assert geometry['layout_positions'].tolist() == list(reader.getVertexLayoutPositionIndices(mesh_index))
+
+        face_offsets = geometry['face_offsets']
+        for face_index in range(0, reader.getFaceCount(mesh_index), 97):
+            assert geometry['face_layout_indices'][face_offsets[face_index]:face_offsets[face_index + 1]].tolist() == \
+                list(reader.getFaceVertexLayoutIndices(mesh_index, face_index))
+
+        skin_offsets = geometry['skin_offsets']
+        for vertex_index in range(0, len(geometry['positions']), 97):
+            start, end = skin_offsets[vertex_index], skin_offsets[vertex_index + 1]
+            assert geometry['skin_joint_indices'][start:end].tolist() == \
+                list(reader.getSkinWeightsJointIndices(mesh_index, vertex_index))
+            assert np.allclose(
+                geometry['skin_weights'][start:end], 
+                reader.getSkinWeightsValues(mesh_index, vertex_index)
+            )
+
+        target_offsets = geometry['target_offsets']
+        for target_index in range(0, reader.getBlendShapeTargetCount(mesh_index), 29):
+            start, end = target_offsets[target_index], target_offsets[target_index + 1]
+            assert geometry['target_vertex_indices'][start:end].tolist() == \
+                list(reader.getBlendShapeTargetVertexIndices(mesh_index, target_index))
+            assert np.allclose(
+                geometry['target_deltas'][start:end, 2], 
+                reader.getBlendShapeTargetDeltaZs(mesh_index, target_index)
+            )
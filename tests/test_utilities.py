@@ -0,0 +1,581 @@
+import json
+import time
+import logging
+import pytest
+from mathutils import Vector
+from constants import SAMPLE_DNA_FILE
+
+logger = logging.getLogger(__name__)
+
+
+def get_reference_closest_vertex_indices(mesh_object, pose_bones) -> dict[str, tuple[int, float]]:
+    """
+    The original brute force implementation that checks every vertex for each bone.
+    """
+    bones = pose_bones[0].id_data.data.bones
+    matrix = mesh_object.matrix_world.inverted()
+    closest = {}
+    for pose_bone in pose_bones:
+        position = matrix @ bones[pose_bone.name].head_local
+        vert = min(
+            mesh_object.data.vertices,
+            key=lambda vert: (position - vert.co).length_squared
+        )
+        closest[pose_bone.name] = (vert.index, (position - vert.co).length_squared)
+    return closest
+
+
+@pytest.fixture(scope='module')
+def facial_pose_bones(head_armature) -> list:
+    return [
+        pose_bone for pose_bone in head_armature.pose.bones
+        if pose_bone.name.startswith('FACIAL_')
+    ]
+
+
+def test_closest_vertex_indices(head_armature, facial_pose_bones):
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_closet_vertex_indices_to_bones,
+        find_closest_vertex_indices,
+        post_undo
+    )
+    from meta_human_dna.utilities import mesh
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    pose_bones = facial_pose_bones[::10]
+
+    expected = get_reference_closest_vertex_indices(mesh_object, pose_bones)
+    current = get_closet_vertex_indices_to_bones(
+        mesh_object=mesh_object,
+        pose_bones=pose_bones,
+        max_distance=float('inf'),
+        rest_position=True
+    )
+    assert set(current.keys()) == set(expected.keys())
+    bones = head_armature.data.bones
+    matrix = mesh_object.matrix_world.inverted()
+    for bone_name, (index, distance) in expected.items():
+        # two vertices can be the same distance away, so compare the distances rather than the indices
+        position = matrix @ bones[bone_name].head_local
+        current_distance = (position - mesh_object.data.vertices[current[bone_name]].co).length_squared
+        assert current_distance == pytest.approx(distance, abs=1e-7), \
+            f'Bone "{bone_name}" should be closest to vertex {index} not {current[bone_name]}.'
+
+    # the spatial index is rebuilt when the mesh changes
+    vertex = mesh_object.data.vertices[0]
+    original_location = vertex.co.copy()
+    try:
+        vertex.co = original_location + Vector((0.0, 0.0, 10.0))
+        indices, _ = find_closest_vertex_indices(mesh_object, [vertex.co])
+        assert indices.tolist() == [0]
+    finally:
+        vertex.co = original_location
+
+    # the spatial indices of renamed objects are dropped when the next index is built
+    original_name = mesh_object.name
+    try:
+        mesh_object.name = f'{original_name}_renamed'
+        find_closest_vertex_indices(mesh_object, [vertex.co])
+        assert (original_name, False) not in mesh._vertex_kdtrees
+        assert (mesh_object.name, False) in mesh._vertex_kdtrees
+    finally:
+        mesh_object.name = original_name
+
+    # the spatial indices are cleared when a file is loaded or an undo happens
+    post_undo()
+    assert not mesh._vertex_kdtrees
+
+
+@pytest.mark.slow
+def test_closest_vertex_indices_timing(load_dna, facial_pose_bones):
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_closet_vertex_indices_to_bones,
+        clear_vertex_kdtrees
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+
+    start = time.perf_counter()
+    get_reference_closest_vertex_indices(mesh_object, facial_pose_bones)
+    reference_time = time.perf_counter() - start
+
+    clear_vertex_kdtrees()
+    start = time.perf_counter()
+    cold = get_closet_vertex_indices_to_bones(mesh_object, facial_pose_bones, rest_position=True)
+    cold_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    warm = get_closet_vertex_indices_to_bones(mesh_object, facial_pose_bones, rest_position=True)
+    warm_time = time.perf_counter() - start
+
+    logger.info(
+        f'{len(facial_pose_bones)} bones against {len(mesh_object.data.vertices)} vertices: '
+        f'brute force {reference_time:.3f}s, kd-tree {cold_time:.3f}s (cold), {warm_time:.3f}s (cached)'
+    )
+    assert warm == cold
+
+
+def test_topology_group_surface_bones(load_dna, temp_folder):
+    from meta_human_dna.bindings import meta_human_dna_core
+    from meta_human_dna.constants import TOPO_GROUP_PREFIX
+    from meta_human_dna.dna_io import get_dna_reader, get_vertex_to_bone_name_mapping
+    from meta_human_dna.dna_io import cache
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_topology_group_surface_bones,
+        get_vertex_group_vertices
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object and face.head_rig_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    armature_object = face.head_rig_object
+
+    reader = get_dna_reader(SAMPLE_DNA_FILE)
+    cache_folder = temp_folder / 'vertex_bones'
+
+    start = time.perf_counter()
+    vertex_to_bone_name = get_vertex_to_bone_name_mapping(SAMPLE_DNA_FILE, reader, cache_folder=cache_folder)
+    cold_time = time.perf_counter() - start
+    assert list(cache_folder.glob('*.json')), 'The mapping was not saved.'
+
+    # a new session should read the mapping from disk
+    cache._vertex_to_bone_names.clear()
+    start = time.perf_counter()
+    assert get_vertex_to_bone_name_mapping(SAMPLE_DNA_FILE, reader, cache_folder=cache_folder) == vertex_to_bone_name
+    warm_time = time.perf_counter() - start
+    logger.info(f'Vertex to bone mapping: calculated {cold_time:.3f}s, cached {warm_time:.3f}s')
+
+    expected_mapping = meta_human_dna_core.calculate_vertex_to_bone_name_mapping(dna_reader=reader)
+    assert vertex_to_bone_name == {int(index): name for index, name in expected_mapping.items()}
+
+    group_name = next(name for name in mesh_object.vertex_groups.keys() if name.startswith(TOPO_GROUP_PREFIX))
+
+    def get_bone_names(dna_file_path) -> set[str]:
+        return {bone.name for bone in get_topology_group_surface_bones(
+            mesh_object=mesh_object,
+            armature_object=armature_object,
+            vertex_group_name=group_name,
+            dna_reader=reader,
+            dna_file_path=dna_file_path
+        )}
+
+    # both the cached and calculated mappings give the same bones
+    bone_names = get_bone_names(None)
+    assert get_bone_names(SAMPLE_DNA_FILE) == bone_names
+
+    # vertices added to the group on the mesh are used, not the shipped topology groups
+    group_vertices = set(get_vertex_group_vertices(mesh_object, group_name))
+    vertex_index, bone_name = next(
+        (index, name) for index, name in vertex_to_bone_name.items()
+        if index not in group_vertices and name not in bone_names
+    )
+    vertex_group = mesh_object.vertex_groups[group_name]
+    vertex_group.add(index=[vertex_index], weight=1.0, type='REPLACE')
+    try:
+        assert bone_name in get_bone_names(SAMPLE_DNA_FILE)
+        assert get_bone_names(SAMPLE_DNA_FILE) == get_bone_names(None)
+    finally:
+        vertex_group.remove(index=[vertex_index])
+
+
+@pytest.mark.slow
+def test_core_mesh_data_timing(load_dna):
+    import numpy as np
+    from utilities.mesh import (
+        get_reference_bmesh,
+        get_reference_mesh_vertex_positions,
+        get_reference_mesh_vertex_uvs
+    )
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_mesh_vertex_data,
+        get_mesh_vertex_uv_data
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+
+    # the lists that auto fit and convert used to build from a bmesh
+    start = time.perf_counter()
+    bmesh_object = get_reference_bmesh(mesh_object, rotation=0)
+    expected_indices, expected_positions = get_reference_mesh_vertex_positions(bmesh_object)
+    expected_uv_indices, expected_uvs = get_reference_mesh_vertex_uvs(bmesh_object)
+    bmesh_object.free()
+    bmesh_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vertex_indices, vertex_positions = get_mesh_vertex_data(mesh_object)
+    uv_indices, uvs = get_mesh_vertex_uv_data(mesh_object)
+    array_time = time.perf_counter() - start
+
+    assert vertex_positions.dtype == np.float32 and vertex_positions.flags['C_CONTIGUOUS']
+    assert vertex_indices.tolist() == expected_indices
+    assert np.allclose(vertex_positions, expected_positions, atol=1e-4)
+    assert uv_indices.tolist() == expected_uv_indices
+    assert np.allclose(uvs, expected_uvs)
+
+    # writing the positions back
+    start = time.perf_counter()
+    for vertex, position in zip(mesh_object.data.vertices, expected_positions):
+        vertex.co = Vector(position) / 100
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mesh_object.data.vertices.foreach_set('co', (vertex_positions / 100).ravel())
+    mesh_object.data.update()
+    foreach_time = time.perf_counter() - start
+
+    logger.info(
+        f'LOD0 head mesh data for the core module: bmesh lists {bmesh_time:.3f}s, arrays {array_time:.3f}s. '
+        f'Write back: per vertex {loop_time:.3f}s, foreach_set {foreach_time:.3f}s'
+    )
+
+
+def clear_auto_fit_state(mesh_object, armature_object):
+    from meta_human_dna.utilities import armature
+    armature._fitted_vertex_positions.pop(mesh_object.name, None)
+    armature._fitted_bone_selections.pop(mesh_object.name, None)
+    armature._fitted_bone_heads.pop(armature_object.name, None)
+
+
+def test_changed_auto_fit_bone_names(load_dna):
+    from meta_human_dna.dna_io import get_vertex_to_bone_name_mapping
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_mesh_vertex_data,
+        get_changed_auto_fit_bone_names,
+        post_undo
+    )
+    from meta_human_dna.utilities import armature
+
+    face = get_active_face()
+    assert face and face.head_mesh_object and face.head_rig_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    armature_object = face.head_rig_object
+    _, vertex_positions = get_mesh_vertex_data(mesh_object)
+
+    def get_changed(positions):
+        return get_changed_auto_fit_bone_names(
+            mesh_object, 
+            armature_object, 
+            positions, 
+            face.dna_file_path, 
+            dna_reader=face.dna_reader
+        )
+
+    # without a previous fit every bone has to be fit
+    clear_auto_fit_state(mesh_object, armature_object)
+    assert get_changed(vertex_positions) is None
+
+    armature._fitted_vertex_positions[mesh_object.name] = vertex_positions.copy()
+    armature._fitted_bone_selections[mesh_object.name] = None
+    try:
+        assert get_changed(vertex_positions) == []
+
+        vertex_to_bone_name = get_vertex_to_bone_name_mapping(face.dna_file_path, face.dna_reader)
+        moved_indices = [index for index in vertex_to_bone_name if vertex_to_bone_name[index]][:10]
+        moved_positions = vertex_positions.copy()
+        moved_positions[moved_indices] += 0.5
+        bone_names = get_changed(moved_positions)
+        assert bone_names is not None
+        assert set(bone_names) == {vertex_to_bone_name[index] for index in moved_indices}
+
+        # moving most of the mesh falls back to a full fit
+        assert get_changed(vertex_positions + 0.5) is None
+
+        # undo can move the bones and vertices back, so the previous fit is forgotten
+        post_undo()
+        assert get_changed(vertex_positions) is None
+    finally:
+        clear_auto_fit_state(mesh_object, armature_object)
+
+
+def test_auto_fit_changed_bones(load_dna):
+    import numpy as np
+    from collections import defaultdict
+    from meta_human_dna.dna_io import get_vertex_to_bone_name_mapping
+    from meta_human_dna.utilities import (
+        get_active_face,
+        auto_fit_bones,
+        update_vertex_positions,
+        switch_to_pose_mode,
+        switch_to_bone_edit_mode
+    )
+    from meta_human_dna.utilities import armature
+
+    face = get_active_face()
+    assert face and face.head_mesh_object and face.head_rig_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    armature_object = face.head_rig_object
+
+    vertex_to_bone_name = get_vertex_to_bone_name_mapping(face.dna_file_path, face.dna_reader)
+    bone_vertices = defaultdict(list)
+    for vertex_index, bone_name in vertex_to_bone_name.items():
+        if bone_name and bone_name.startswith('FACIAL_'):
+            bone_vertices[bone_name].append(vertex_index)
+    bone_a, bone_b = list(bone_vertices.keys())[:2]
+
+    def fit(*bone_names) -> list[str]:
+        switch_to_pose_mode(armature_object)
+        for bone in armature_object.data.bones:
+            bone.select = bone.name in bone_names
+        return auto_fit_bones(
+            mesh_object=mesh_object,
+            armature_object=armature_object,
+            dna_reader=face.dna_reader,
+            only_selected=True,
+            changed_only=True,
+            dna_file_path=face.dna_file_path
+        )
+
+    # keep the rest pose so the fits don't leak into the other tests
+    switch_to_bone_edit_mode(armature_object)
+    edit_bones = armature_object.data.edit_bones
+    heads = np.empty(len(edit_bones) * 3, dtype=np.float32)
+    tails = np.empty(len(edit_bones) * 3, dtype=np.float32)
+    edit_bones.foreach_get('head', heads)
+    edit_bones.foreach_get('tail', tails)
+    moved_vertex_indices = bone_vertices[bone_a] + bone_vertices[bone_b]
+    clear_auto_fit_state(mesh_object, armature_object)
+    try:
+        fitted_bone_names = fit(bone_a)
+        assert bone_a in fitted_bone_names
+        if bone_b not in fitted_bone_names:
+            # only the vertices of the fitted bones are marked as fitted
+            fitted_positions = armature._fitted_vertex_positions[mesh_object.name]
+            assert np.isnan(fitted_positions[bone_vertices[bone_b]]).all()
+        assert fit(bone_a) == [], 'Nothing changed since the last fit.'
+
+        update_vertex_positions(mesh_object, moved_vertex_indices, offset=Vector((0.0, 0.0, 0.001)))
+        assert bone_b in fit(bone_b)
+        assert bone_a in fit(bone_a), f'"{bone_a}" was not refit after its vertices moved.'
+        assert fit(bone_a) == []
+
+        # a bone that is moved by hand is refit
+        switch_to_bone_edit_mode(armature_object)
+        armature_object.data.edit_bones[bone_a].translate(Vector((0.0, 0.0, 0.01)))
+        assert bone_a in fit(bone_a), f'"{bone_a}" was not refit after it was moved.'
+
+    finally:
+        update_vertex_positions(mesh_object, moved_vertex_indices, offset=Vector((0.0, 0.0, -0.002)))
+        switch_to_bone_edit_mode(armature_object)
+        armature_object.data.edit_bones.foreach_set('head', heads)
+        armature_object.data.edit_bones.foreach_set('tail', tails)
+        switch_to_pose_mode(armature_object)
+        clear_auto_fit_state(mesh_object, armature_object)
+
+
+def get_reference_vertex_group_vertices(mesh_object, vertex_group_name: str) -> list[int]:
+    """
+    The original implementation that scans the groups of every vertex.
+    """
+    vertex_group = mesh_object.vertex_groups[vertex_group_name]
+    return [
+        vertex.index for vertex in mesh_object.data.vertices 
+        if vertex_group.index in [group.group for group in vertex.groups]
+    ]
+
+
+def test_vertex_group_index(load_dna):
+    import bpy
+    from meta_human_dna.constants import TOPO_GROUP_PREFIX
+    from meta_human_dna.utilities import (
+        get_active_face,
+        get_vertex_group_index,
+        get_vertex_group_vertices,
+        get_weighted_bone_names,
+        select_vertex_group,
+        switch_to_object_mode
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    vertex_group_index = get_vertex_group_index(mesh_object)
+    # the index is cached until the mesh is updated
+    assert get_vertex_group_index(mesh_object) is vertex_group_index
+
+    expected_weighted_names = {
+        mesh_object.vertex_groups[group.group].name
+        for vertex in mesh_object.data.vertices for group in vertex.groups
+    }
+    assert set(get_weighted_bone_names(mesh_object)) == expected_weighted_names
+
+    topology_group_names = [name for name in vertex_group_index.group_names if name.startswith(TOPO_GROUP_PREFIX)]
+    assert topology_group_names, 'The head mesh has no topology groups.'
+    for vertex_group_name in topology_group_names:
+        assert vertex_group_index.get_vertices(vertex_group_name).tolist() == \
+            get_reference_vertex_group_vertices(mesh_object, vertex_group_name), \
+            f'"{vertex_group_name}" vertices do not match.'
+
+    vertex_group_name = topology_group_names[0]
+    select_vertex_group(mesh_object, vertex_group_name, add=False)
+    switch_to_object_mode()
+    selected = [vertex.index for vertex in mesh_object.data.vertices if vertex.select]
+    assert selected == get_reference_vertex_group_vertices(mesh_object, vertex_group_name)
+
+    # adding to the selection keeps the previous group selected
+    select_vertex_group(mesh_object, topology_group_names[1], add=True)
+    switch_to_object_mode()
+    selected = {vertex.index for vertex in mesh_object.data.vertices if vertex.select}
+    assert selected == set(get_reference_vertex_group_vertices(mesh_object, topology_group_names[0])) | \
+        set(get_reference_vertex_group_vertices(mesh_object, topology_group_names[1]))
+
+    # a new vertex group is seen by the next query
+    vertex_group = mesh_object.vertex_groups.new(name='test_vertex_group_index')
+    try:
+        vertex_group.add(index=[0, 1, 2], weight=1.0, type='REPLACE')
+        bpy.context.view_layer.update() # type: ignore
+        assert get_vertex_group_index(mesh_object).get_vertices(vertex_group.name).tolist() == [0, 1, 2]
+    finally:
+        mesh_object.vertex_groups.remove(vertex_group)
+
+    # so is a vertex that is assigned to an existing group
+    vertex_group = mesh_object.vertex_groups[vertex_group_name]
+    group_vertex_indices = set(vertex_group_index.get_vertices(vertex_group_name).tolist())
+    vertex_index = next(
+        index for index in range(len(mesh_object.data.vertices)) 
+        if index not in group_vertex_indices
+    )
+    try:
+        vertex_group.add(index=[vertex_index], weight=1.0, type='REPLACE')
+        # the weight update drops the cached index when the dependency graph is evaluated
+        bpy.context.view_layer.update() # type: ignore
+        assert get_vertex_group_index(mesh_object) is not vertex_group_index
+        assert vertex_index in get_vertex_group_vertices(mesh_object, vertex_group_name)
+        select_vertex_group(mesh_object, vertex_group_name, add=False)
+        switch_to_object_mode()
+        assert mesh_object.data.vertices[vertex_index].select
+    finally:
+        vertex_group.remove([vertex_index])
+
+
+@pytest.mark.slow
+def test_select_vertex_group_timing(load_dna):
+    from meta_human_dna.constants import TOPO_GROUP_PREFIX
+    from meta_human_dna.utilities import (
+        get_active_face,
+        select_vertex_group,
+        switch_to_object_mode
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    vertex_group_name = next(
+        vertex_group.name for vertex_group in mesh_object.vertex_groups 
+        if vertex_group.name.startswith(TOPO_GROUP_PREFIX)
+    )
+
+    start = time.perf_counter()
+    get_reference_vertex_group_vertices(mesh_object, vertex_group_name)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    select_vertex_group(mesh_object, vertex_group_name)
+    index_time = time.perf_counter() - start
+    switch_to_object_mode()
+
+    expected = get_reference_vertex_group_vertices(mesh_object, vertex_group_name)
+    assert [vertex.index for vertex in mesh_object.data.vertices if vertex.select] == expected
+    logger.info(
+        f'Select "{vertex_group_name}" on {len(mesh_object.data.vertices)} vertices: '
+        f'vertex scan {reference_time:.3f}s, index {index_time:.3f}s'
+    )
+
+
+def test_topology_vertex_groups_binary(addon, temp_folder):
+    from meta_human_dna.constants import TOPOLOGY_VERTEX_GROUPS_FILE_PATH
+    from meta_human_dna.dna_io import get_topology_vertex_groups
+    from meta_human_dna.dna_io import cache
+
+    cache_folder = temp_folder / 'topology_groups'
+    start = time.perf_counter()
+    with open(TOPOLOGY_VERTEX_GROUPS_FILE_PATH, 'r') as file:
+        expected = json.load(file)
+    json_time = time.perf_counter() - start
+
+    cache._topology_vertex_groups.clear()
+    get_topology_vertex_groups(cache_folder=cache_folder)
+    assert list(cache_folder.glob('*.npz')), 'The binary topology groups were not saved.'
+
+    # a new session should read the binary file rather than the JSON
+    cache._topology_vertex_groups.clear()
+    start = time.perf_counter()
+    current = get_topology_vertex_groups(cache_folder=cache_folder)
+    binary_time = time.perf_counter() - start
+    logger.info(f'Topology groups: JSON {json_time*1000:.2f}ms, binary {binary_time*1000:.2f}ms')
+
+    assert list(current.keys()) == list(expected.keys())
+    for group_name, vertex_indices in expected.items():
+        assert current[group_name].tolist() == vertex_indices, f'"{group_name}" vertices do not match.'
+    cache._topology_vertex_groups.clear()
+
+
+def test_topology_vertex_groups_created(load_dna):
+    from meta_human_dna.constants import TOPOLOGY_VERTEX_GROUPS_FILE_PATH
+    from meta_human_dna.utilities import get_active_face, get_vertex_group_index
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    with open(TOPOLOGY_VERTEX_GROUPS_FILE_PATH, 'r') as file:
+        expected = json.load(file)
+
+    vertex_group_index = get_vertex_group_index(face.head_mesh_object)
+    for group_name, vertex_indices in expected.items():
+        assert vertex_group_index.get_vertices(group_name).tolist() == sorted(set(vertex_indices)), \
+            f'"{group_name}" was not created from the topology groups.'
+
+
+def test_shape_key_delta_vertices(load_dna):
+    import numpy as np
+    from meta_human_dna.utilities import (
+        get_active_face, 
+        get_shape_key_delta_vertices, 
+        switch_to_edit_mode, 
+        switch_to_object_mode
+    )
+
+    face = get_active_face()
+    assert face and face.head_mesh_object, 'No active face was found.'
+    mesh_object = face.head_mesh_object
+    added_basis = not mesh_object.data.shape_keys
+    if added_basis:
+        mesh_object.shape_key_add(name='Basis', from_mix=False)
+    basis_name = mesh_object.data.shape_keys.reference_key.name
+    shape_key = mesh_object.shape_key_add(name='test_shape_key_delta_vertices', from_mix=False)
+    show_only_shape_key = mesh_object.show_only_shape_key
+    active_shape_key_index = mesh_object.active_shape_key_index
+    try:
+        moved_indices = [0, 10, 100, 1000]
+        positions = np.empty(len(shape_key.data) * 3, dtype=np.float32)
+        shape_key.data.foreach_get('co', positions)
+        positions = positions.reshape(-1, 3)
+        positions[moved_indices, 2] += 0.01
+        # a move under the threshold is ignored
+        positions[5, 2] += 0.00001
+        shape_key.data.foreach_set('co', positions.ravel())
+
+        assert get_shape_key_delta_vertices(mesh_object, shape_key.name, basis_name) == moved_indices
+        assert mesh_object.show_only_shape_key == show_only_shape_key
+        assert mesh_object.active_shape_key_index == active_shape_key_index
+
+        # the key blocks are synced from edit mode without leaving it
+        switch_to_edit_mode(mesh_object)
+        try:
+            assert get_shape_key_delta_vertices(mesh_object, shape_key.name, basis_name) == moved_indices
+            assert mesh_object.mode == 'EDIT'
+        finally:
+            switch_to_object_mode()
+    finally:
+        mesh_object.shape_key_remove(shape_key)
+        if added_basis:
+            mesh_object.shape_key_clear()
@@ -1,140 +1,127 @@
 import pytest
 from mathutils import Euler, Vector
 
+LAYOUT_FIELDS = {
+    'positions': 'layoutPositions',
+    'normals': 'layoutNormals',
+    'textureCoordinates': 'layoutTextureCoordinates'
+}
+JOINT_BEHAVIOR_FIELDS = [
+    'jointRowCount',
+    'jointColumnCount',
+    'jointGroupCount',
+    'jointGroupJointIndices',
+    'jointGroupInputIndices',
+    'jointGroupOutputIndices',
+    'jointGroupLODs'
+]
+
+
 def assert_bone_definitions(
-    expected_data: dict,
-    current_data: dict,
+    diff_report,
+    bone_index: int,
     bone_name: str,
     attribute: str,
-    axis_name: str,
     changed_bone_name: str,
     changed_bone_rotation: tuple[Euler, Euler],
-    changed_bone_location: tuple[Vector, Vector],
-    tolerance: float = 1e-3
+    changed_bone_location: tuple[Vector, Vector]
 ):
-    expected_bone_index = expected_data['definition']['jointNames'].index(bone_name)
-    current_bone_index = current_data['definition']['jointNames'].index(bone_name)
-    assert current_bone_index == expected_bone_index, f'Bone index mismatch. {bone_name} should be at index {expected_bone_index} but is at {current_bone_index}'
-    
-    expected_hierarchy = expected_data['definition']['jointHierarchy'][expected_bone_index]
-    current_hierarchy = current_data['definition']['jointHierarchy'][current_bone_index]
-    assert current_hierarchy == expected_hierarchy, f'Bone hierarchy mismatch. {bone_name} should have hierarchy {expected_hierarchy} but has {current_hierarchy}'
-    
-    expected_value = expected_data['definition'][attribute][f'{axis_name}s'][expected_bone_index]
-    current_value = current_data['definition'][attribute][f'{axis_name}s'][current_bone_index]
+    assert diff_report is not None, 'The DNA was not written.'
+    assert not diff_report.get('jointNames'), \
+        f'Bone index mismatch. {bone_name} should be at index {bone_index}.\n{diff_report.get_summary()}'
+    assert bone_index not in diff_report.get_changed_indices('jointHierarchy', ''), \
+        f'Bone hierarchy mismatch. {bone_name} has a different parent.'
 
     # this ensures that we don't assert that the bone was moved in the dna if it was not moved in blender
-    changed = getattr(changed_bone_rotation[0], axis_name) != 0.0 
+    changed = any(value != 0.0 for value in changed_bone_rotation[0])
     if attribute == 'neutralJointTranslations':
-        changed = getattr(changed_bone_location[0], axis_name) != 0.0
+        changed = any(value != 0.0 for value in changed_bone_location[0])
 
+    differences = [
+        difference for difference in diff_report.get(attribute)
+        if bone_index in difference.indices
+    ]
     if bone_name == changed_bone_name and changed:
         if attribute == 'neutralJointRotations':
             pytest.skip('Skipping test since we do not support exporting bone rotations yet.')
 
-        assert current_value != pytest.approx(expected_value, abs=tolerance), \
-            f'{axis_name} bone {bone_name} {attribute} should not match, since it was moved in blender.'
+        assert differences, f'Bone {bone_name} {attribute} should not match, since it was moved in blender.'
     else:
-        assert current_value == pytest.approx(expected_value, abs=tolerance), \
-            f'{axis_name} bone {attribute} mismatch. {bone_name} should have {axis_name} {attribute} {expected_value} but has {current_value}.'
-        
-    
-def assert_bone_behaviors(
-    expected_data: dict,
-    current_data: dict,
-    bone_name: str
-):
-    # First get the bone index from its name
-    expected_bone_index = expected_data['definition']['jointNames'].index(bone_name)
-    current_bone_index = current_data['definition']['jointNames'].index(bone_name)
-    assert current_bone_index == expected_bone_index, f'Bone index mismatch. {bone_name} should be at index {expected_bone_index} but is at {current_bone_index}'
-    
-    expected_row_count = expected_data['behavior']['joints']['rowCount']
-    current_row_count = current_data['behavior']['joints']['rowCount']
-    assert current_row_count == expected_row_count, f'Row count mismatch. {bone_name} should have row count {expected_row_count} but has {current_row_count}'
-
-    expected_column_count = expected_data['behavior']['joints']['colCount']
-    current_column_count = current_data['behavior']['joints']['colCount']
-    assert current_column_count == expected_column_count, f'Column count mismatch. {bone_name} should have column count {expected_column_count} but has {current_column_count}'
-
-    expected_joint_groups = expected_data['behavior']['joints']['jointGroups']
-    current_joint_groups = current_data['behavior']['joints']['jointGroups']
-
-    for joint_group_index, (expected_joint_group_data, current_joint_group_data) in enumerate(zip(expected_joint_groups, current_joint_groups)):
-        if expected_bone_index in expected_joint_group_data['jointIndices']:
-            assert current_bone_index in current_joint_group_data['jointIndices']
-            break
+        assert not differences, \
+            f'Bone {attribute} mismatch. {bone_name} differs by up to {differences[0].max_delta if differences else 0}.'
+
+
+def assert_bone_behaviors(diff_report):
+    assert diff_report is not None, 'The DNA was not written.'
+    assert not diff_report.get('jointNames'), diff_report.get_summary()
+    differences = [
+        difference for field in JOINT_BEHAVIOR_FIELDS 
+        for difference in diff_report.get(field)
+    ]
+    assert not differences, '\n'.join(difference.get_summary() for difference in differences)
 
-        
 
 def assert_mesh_geometry(
-    expected_data: dict, 
-    current_data: dict,
+    diff_report,
     mesh_name: str,
     attribute: str,
-    axis_name: str,
-    changed_mesh_name: int,
+    changed_mesh_name: str,
     changed_vertex_index: int,
     changed_vertex_location: tuple[Vector, Vector, Vector],
     assert_mesh_indices: bool = True,
-    assert_index_order: bool = True,
-    tolerance: float = 1e-3
+    assert_index_order: bool = True
 ):
-    expected_mesh_index = expected_data['definition']['meshNames'].index(mesh_name)
-    current_mesh_index = current_data['definition']['meshNames'].index(mesh_name)
-
+    assert diff_report is not None, 'The DNA was not written.'
     if assert_mesh_indices:
-        assert expected_mesh_index == current_mesh_index, \
-            f'Mesh index mismatch. {mesh_name} should be at index {expected_mesh_index} but is at {current_mesh_index}'
-    
+        assert not diff_report.get('meshNames'), diff_report.get_summary()
+
+    # The vertex positions stay in vertex order, but otherwise the values and layouts can be reordered, so 
+    # they are compared through the faces instead
+    field = attribute
+    if not assert_index_order and attribute == 'textureCoordinates':
+        field = 'faceTextureCoordinates'
+
+    differences = diff_report.get(field, mesh_name)
+    assert not [difference for difference in differences if difference.message], \
+        '\n'.join(difference.get_summary() for difference in differences)
+
     # this ensures that we don't assert that the vertex was moved in the dna if it was not moved in blender by
     # comparing the original and new dna vertex positions
-    changed_position = False
-    if attribute == 'positions':
-        changed_position = getattr(changed_vertex_location[1], axis_name) - getattr(changed_vertex_location[-1], axis_name) != 0.0
-
-    expected_indices = expected_data['geometry']['meshes'][expected_mesh_index]['layouts'][attribute]
-    current_indices = current_data['geometry']['meshes'][current_mesh_index]['layouts'][attribute]
+    expected_indices = set()
+    if attribute == 'positions' and mesh_name == changed_mesh_name and \
+        changed_vertex_location[1] != changed_vertex_location[-1]:
+        expected_indices = {changed_vertex_index}
 
-    expected_values = expected_data['geometry']['meshes'][expected_mesh_index][attribute][f'{axis_name}s']
-    current_values = current_data['geometry']['meshes'][current_mesh_index][attribute][f'{axis_name}s']
+    changed_indices = diff_report.get_changed_indices(field, mesh_name)
+    assert changed_indices == expected_indices, \
+        f'Mesh {mesh_name} {attribute} should only have {expected_indices} changed, but has {sorted(changed_indices)[:20]}.'
 
-    # The mesh indices should be the same
     if assert_index_order:
-        assert len(expected_indices) == len(current_indices), \
-            f'Mesh {mesh_name} {attribute} indices length mismatch. Expected {len(expected_indices)} indices but has {len(current_indices)}.'
-
-        for index, (expected_index, current_index) in enumerate(zip(expected_indices, current_indices)):
-            assert expected_index == current_index, \
-                f'Mesh {mesh_name} {attribute} indices order mismatch at array index {index}. Expected {expected_index} but has {current_index}.'
-            
-        for expected_index, current_index in zip(expected_indices, current_indices):
-            expected_value = expected_values[expected_index]
-            current_value = current_values[current_index]
-
-            # if this is the changed vertex and the axis value is not ignored
-            if mesh_name == changed_mesh_name and expected_index == changed_vertex_index and changed_position:
-                assert expected_value != pytest.approx(current_value, abs=tolerance), \
-                    f'Mesh {mesh_name} {attribute} {axis_name} vertex index {changed_vertex_index} should not match, since it was moved in blender.'
-            else:
-                assert expected_value == pytest.approx(current_value, abs=tolerance), \
-                    f'Mesh {mesh_name} {attribute} {axis_name} vertex index {expected_index} mismatch. Expected {expected_value} but has {current_value}.'
-    
-    # Otherwise, the mesh indices can be in any order but still the number unique indices should be the same
-    else:     
-        sorted_expected_values = expected_values
-        sorted_current_values = current_values
-        # remove duplicate values and sort the lists for UVs since there can be multiple UVs for the same vertex
-        if attribute == 'textureCoordinates':
-            sorted_expected_values = sorted(set(expected_values))
-            sorted_current_values = sorted(set(current_values))
-        
-        for expected_value, current_value in zip(sorted_expected_values, sorted_current_values):
-            if expected_value != pytest.approx(current_value, abs=tolerance) and changed_position:
-                assert expected_values[changed_vertex_index] == expected_value, \
-                f'Mesh {mesh_name} {attribute} {axis_name} value mismatch. The vertex index that was moved was {changed_vertex_index} but this is not that one.'
-            else:
-                assert expected_value == pytest.approx(current_value, abs=tolerance), \
-                    f'Mesh {mesh_name} {attribute} {axis_name} value mismatch. Expected {expected_value} but has {current_value}.'
+        layout_differences = diff_report.get(LAYOUT_FIELDS[attribute], mesh_name)
+        assert not layout_differences, '\n'.join(difference.get_summary() for difference in layout_differences)
         
-        
\ No newline at end of file
+
+def assert_dna_diff(
+    diff_report,
+    changed_bone_name: str,
+    changed_mesh_name: str,
+    changed_vertex_index: int,
+    changed_vertex_location: tuple[Vector, Vector, Vector]
+):
+    assert diff_report is not None, 'The DNA was not written.'
+
+    # only the bone that was moved in blender should have changed
+    assert diff_report.changed_joint_names == {changed_bone_name}, \
+        f'Only {changed_bone_name} should have changed.\n{diff_report.get_summary()}'
+
+    # only the vertex that was moved in blender should have changed
+    expected_positions = set()
+    if changed_vertex_location[1] != changed_vertex_location[-1]:
+        expected_positions = {changed_vertex_index}
+    changed_positions = diff_report.get_changed_indices('positions', changed_mesh_name)
+    assert changed_positions == expected_positions, \
+        f'Mesh {changed_mesh_name} should only have {expected_positions} moved, but has {sorted(changed_positions)[:20]}.'
+
+    for difference in diff_report.get('positions', changed_mesh_name):
+        expected_delta = max(abs(value) for value in changed_vertex_location[-1] - changed_vertex_location[1])
+        assert difference.max_delta == pytest.approx(expected_delta, abs=1e-2)
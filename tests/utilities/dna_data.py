@@ -1,33 +1,6 @@
-import json
 from constants import SAMPLE_DNA_FILE
 from pathlib import Path
 
-def get_dna_json_data(dna_file_path: Path, json_file_path: Path) -> dict:
-    from meta_human_dna.bindings import riglogic
-    from meta_human_dna.dna_io import (
-        get_dna_reader, 
-        get_dna_writer
-    )
-    reader = get_dna_reader(dna_file_path, 'binary')
-    writer = get_dna_writer(json_file_path, 'json')
-    writer.setFrom(
-        reader,
-        riglogic.DataLayer.All,
-        riglogic.UnknownLayerPolicy.Preserve,
-        None
-    )
-    writer.write()
-    if not riglogic.Status.isOk():
-        status = riglogic.Status.get()
-        raise RuntimeError(f"Error saving DNA: {status.message}")
-    
-    with open(json_file_path, 'r') as file:
-        text = file.read()
-        text = ''.join(text.split())
-        text = text.replace('{"data":{"value":["A","N","D"]}}', '')
-        data = json.loads(text)
-        return data
-    
 
 def get_bone_names(dna_file_path: Path) -> list[str]:
     from meta_human_dna.dna_io import get_dna_reader
@@ -49,17 +22,9 @@ def get_mesh_names(dna_file_path: Path) -> list[str]:
 
 
 def get_test_bone_definitions_params():
-
-    for bone_name in get_bone_names(SAMPLE_DNA_FILE):
-        attributes = ['neutralJointRotations', 'neutralJointTranslations']
-        axis_names = ['x', 'y', 'z']
-        for attribute in attributes:
-            for axis_name in axis_names:
-                yield bone_name, attribute, axis_name
-
-def get_test_bone_behaviors_params():
-    for bone_name in get_bone_names(SAMPLE_DNA_FILE):
-        yield bone_name
+    for bone_index, bone_name in enumerate(get_bone_names(SAMPLE_DNA_FILE)):
+        for attribute in ['neutralJointRotations', 'neutralJointTranslations']:
+            yield bone_index, bone_name, attribute
 
 def get_test_mesh_geometry_params(
         lods: list[int] | None = None,
@@ -82,9 +47,4 @@ def get_test_mesh_geometry_params(
             attributes.append('textureCoordinates')
 
         for attribute in attributes:
-            axis_names = ['x', 'y', 'z']
-            if attribute == 'textureCoordinates':
-                axis_names = ['u', 'v']
-
-            for axis_name in axis_names:
-                yield mesh_name, attribute, axis_name
\ No newline at end of file
+            yield mesh_name, attribute
@@ -0,0 +1,89 @@
+import bpy
+import math
+import bmesh
+from mathutils import Vector, Matrix
+from meta_human_dna.constants import SCALE_FACTOR
+
+
+def get_reference_bmesh(mesh_object: bpy.types.Object, rotation: float = -90) -> bmesh.types.BMesh:
+    """
+    The original implementation that copies the mesh into a bmesh and rotates it to be Y-up.
+    """
+    bmesh_object = bmesh.new()
+    bmesh_object.from_mesh(mesh=mesh_object.data) # type: ignore
+    bmesh.ops.rotate(
+        bmesh_object,
+        cent=Vector((0,0,0)),
+        matrix=Matrix.Rotation(math.radians(rotation), 4, 'X'),
+        verts=bmesh_object.verts # type: ignore
+    )
+    bmesh_object.verts.index_update()
+    bmesh_object.verts.ensure_lookup_table()
+    return bmesh_object
+
+
+def get_reference_mesh_faces(bmesh_object: bmesh.types.BMesh) -> list[tuple[int, list[int]]]:
+    """
+    The original implementation that reads the vertex indices of each face from a bmesh.
+    """
+    bmesh_object.faces.ensure_lookup_table()
+    return [
+        (face.index, [vert.index for vert in face.verts])
+        for face in bmesh_object.faces # type: ignore
+    ]
+
+
+def get_reference_mesh_vertex_positions(
+        bmesh_object: bmesh.types.BMesh,
+        duplicate_lookup: dict | None = None
+    ) -> tuple[list[int], list[list[float]]]:
+    """
+    The original implementation that reads the vertex positions from a bmesh one vertex at a time.
+    """
+    indices = []
+    positions = []
+    if not duplicate_lookup:
+        duplicate_lookup = {}
+
+    for vert in bmesh_object.verts: # type: ignore
+        positions.append([
+            vert.co.x*SCALE_FACTOR,
+            vert.co.y*SCALE_FACTOR,
+            vert.co.z*SCALE_FACTOR
+        ])
+        # Get the original vertex index if the vertex is a duplicate, otherwise use the current index
+        indices.append(duplicate_lookup.get(vert.index, vert.index))
+    return indices, positions
+
+
+def get_reference_mesh_vertex_normals(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
+    """
+    The original implementation that reads the vertex normals from a bmesh one vertex at a time.
+    """
+    indices = []
+    normals = []
+    for vert in bmesh_object.verts: # type: ignore
+        normals.append([
+            vert.normal.x*SCALE_FACTOR,
+            vert.normal.y*SCALE_FACTOR,
+            vert.normal.z*SCALE_FACTOR
+        ])
+        indices.append(vert.index)
+    return indices, normals
+
+
+def get_reference_mesh_vertex_uvs(bmesh_object: bmesh.types.BMesh) -> tuple[list[int], list[list[float]]]:
+    """
+    The original implementation that reads the uvs from a bmesh one face loop at a time.
+    """
+    uv_layer = bmesh_object.loops.layers.uv.active
+    if not uv_layer:
+        return [], []
+
+    uv_indices = list(range(len(bmesh_object.verts)))
+    uv_positions = []
+    for face in bmesh_object.faces:
+        for loop in face.loops:
+            uv_indices[loop.vert.index] = loop.index
+            uv_positions.append(list(loop[uv_layer].uv[:]))
+    return uv_indices, uv_positions